@@ -221,7 +221,7 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
         else:
             po1_groups.append((0, current_group))
 
-    selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+    selected_seq_nums = {seq_num for seq_num, _ in selected_segments}
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
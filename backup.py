@@ -266,7 +266,7 @@ class EDIEditorGUI:
         
         filtered_body = []
         po1_index = 0
-        selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+        selected_seq_nums = {seq_num for seq_num, _ in selected_segments}
         selected_po1_lines = [line for _, line in selected_segments]
         selected_po1_index = 0
         
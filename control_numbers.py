@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import argparse
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+CONTROL_NUMBER_STATE_FILENAME = 'control_numbers.json'
+MAX_CONTROL_NUMBER = 999999999
+LOCK_TIMEOUT_SECONDS = 60.0
+LOCK_RETRY_INTERVAL = 0.05
+
+class FileLock:
+    """Exclusive lock on a side file, held across processes (fcntl on POSIX, msvcrt on Windows).
+
+    Gives up with TimeoutError when the lock is still held by someone else after timeout seconds.
+    """
+
+    def __init__(self, lock_path, timeout=LOCK_TIMEOUT_SECONDS):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self._file = None
+
+    def _try_lock(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def __enter__(self):
+        self._file = open(self.lock_path, 'a+b')
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock():
+            if time.monotonic() >= deadline:
+                self._file.close()
+                self._file = None
+                raise TimeoutError(f"Error: Could not lock {self.lock_path} within {self.timeout} seconds; another process is holding it")
+            time.sleep(LOCK_RETRY_INTERVAL)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+class ControlNumberService:
+    """Persistent ISA13/GS06 counters per sender/receiver pair.
+
+    The counters live in a JSON file that is only read and rewritten while
+    holding an exclusive lock on <state>.lock, so worker processes and
+    repeated runs never hand out the same number. A pair seen for the first
+    time starts at start; numbers wrap to 1 after 999999999.
+    """
+
+    def __init__(self, state_path, start=1):
+        folder = os.path.dirname(os.path.abspath(state_path))
+        os.makedirs(folder, exist_ok=True)
+        self.state_path = state_path
+        self.lock_path = state_path + '.lock'
+        self.start = start
+
+    def _next(self, key):
+        with FileLock(self.lock_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except FileNotFoundError:
+                state = {}
+            number = state[key] % MAX_CONTROL_NUMBER + 1 if key in state else self.start
+            state[key] = number
+            temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.state_path)
+        return number
+
+    def next_interchange(self, isa):
+        """Next ISA13 (9 digits) for the ISA06/ISA08 pair of the given ISA element list."""
+        return f"{self._next(f'ISA|{isa[6].strip()}|{isa[8].strip()}'):09d}"
+
+    def next_group(self, gs):
+        """Next GS06 for the GS02/GS03 pair of the given GS element list."""
+        return str(self._next(f'GS|{gs[2].strip()}|{gs[3].strip()}'))
+
+class SequentialControlNumbers:
+    """In-memory stand-in for ControlNumberService: 1, 2, 3, ... for the run."""
+
+    def __init__(self, start=1):
+        self._interchange = start - 1
+        self._group = start - 1
+
+    def next_interchange(self, isa):
+        self._interchange += 1
+        return f"{self._interchange:09d}"
+
+    def next_group(self, gs):
+        self._group += 1
+        return str(self._group)
+
+def renumber_envelopes(lines, service):
+    """Give every ISA/GS new control numbers and number ST02 0001.. within each group.
+
+    IEA02, GE02 and SE02 follow their headers. Works on a list or a stream of
+    split segments and yields the renumbered segments.
+    """
+    isa13 = gs06 = st02 = None
+    transaction_count = 0
+    for line in lines:
+        tag = line.split('*', 1)[0]
+        if tag not in ('ISA', 'IEA', 'GS', 'GE', 'ST', 'SE'):
+            yield line
+            continue
+        parts = line.split('*')
+        if tag == 'ISA' and len(parts) > 13:
+            isa13 = parts[13] = service.next_interchange(parts)
+        elif tag == 'IEA' and isa13 and len(parts) > 2:
+            parts[2] = isa13
+        elif tag == 'GS' and len(parts) > 6:
+            gs06 = parts[6] = service.next_group(parts)
+            transaction_count = 0
+        elif tag == 'GE' and gs06 and len(parts) > 2:
+            parts[2] = gs06
+        elif tag == 'ST' and len(parts) > 2:
+            transaction_count += 1
+            st02 = parts[2] = f"{transaction_count:04d}"
+        elif tag == 'SE' and st02 and len(parts) > 2:
+            parts[2] = st02
+        yield '*'.join(parts)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the persistent control-number counters.")
+    parser.add_argument('state', help=f"Counter file (normally {CONTROL_NUMBER_STATE_FILENAME} in the state folder)")
+    args = parser.parse_args()
+    try:
+        with open(args.state, 'r', encoding='utf-8') as f:
+            for key, number in sorted(json.load(f).items()):
+                print(f"{key}\t{number}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+DUPLICATE_INDEX_FILENAME = 'interchange_index.sqlite'
+DIGEST_CHUNK_SIZE = 1024 * 1024
+# A claim older than this is treated as left behind by a crashed run
+DEFAULT_STALE_CLAIM_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interchanges (
+    sender TEXT NOT NULL,
+    isa13 TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    source_file TEXT,
+    output_file TEXT,
+    processed_at TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'done',
+    PRIMARY KEY (sender, isa13, digest)
+);
+"""
+
+def content_digest(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def file_digest(file_path, chunk_size=DIGEST_CHUNK_SIZE):
+    """Same digest as content_digest(open(file_path).read()), computed in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for block in iter(lambda: f.read(chunk_size), ''):
+            digest.update(block.encode('utf-8'))
+    return digest.hexdigest()
+
+class DuplicateIndex:
+    """Interchanges already processed, keyed by ISA06 sender, ISA13 and content digest.
+
+    A file is claimed (state 'pending') before the transform with a single
+    INSERT OR IGNORE, so only one of several identical files in a parallel
+    run gets through. The claim becomes 'done' once the output is saved and
+    is released when the file is quarantined or fails, so a redelivery is
+    processed. Claims older than stale_after seconds were left by a run that
+    died and can be taken over.
+    """
+
+    def __init__(self, db_path, timeout=30.0, stale_after=DEFAULT_STALE_CLAIM_SECONDS):
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self._conn = sqlite3.connect(db_path, timeout=timeout)
+        self._conn.executescript(SCHEMA)
+
+    def lookup(self, sender, isa13, digest):
+        """Return (source_file, output_file, processed_at, state) of the earlier copy, or None."""
+        return self._conn.execute(
+            'SELECT source_file, output_file, processed_at, state FROM interchanges WHERE sender = ? AND isa13 = ? AND digest = ?',
+            (sender, isa13, digest)
+        ).fetchone()
+
+    def claim(self, sender, isa13, digest, source_file):
+        """Reserve an interchange for processing. Returns False when it is already done or claimed."""
+        now = datetime.now()
+        stale_before = (now - timedelta(seconds=self.stale_after)).isoformat(timespec='seconds')
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO interchanges (sender, isa13, digest, source_file, output_file, processed_at, state) "
+                "VALUES (?, ?, ?, ?, NULL, ?, 'pending')",
+                (sender, isa13, digest, source_file, now.isoformat(timespec='seconds'))
+            )
+            if cursor.rowcount == 1:
+                return True
+            cursor = self._conn.execute(
+                "UPDATE interchanges SET source_file = ?, processed_at = ? "
+                "WHERE sender = ? AND isa13 = ? AND digest = ? AND state = 'pending' AND processed_at < ?",
+                (source_file, now.isoformat(timespec='seconds'), sender, isa13, digest, stale_before)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, sender, isa13, digest, output_file=None):
+        """Mark a claimed interchange as processed."""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE interchanges SET output_file = ?, processed_at = ?, state = 'done' WHERE sender = ? AND isa13 = ? AND digest = ?",
+                (output_file, datetime.now().isoformat(timespec='seconds'), sender, isa13, digest)
+            )
+
+    def release(self, sender, isa13, digest):
+        """Forget a claim that did not produce an output."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM interchanges WHERE sender = ? AND isa13 = ? AND digest = ? AND state = 'pending'",
+                (sender, isa13, digest)
+            )
+
+    def entries(self):
+        """Every recorded interchange as (processed_at, state, sender, isa13, source_file, output_file), oldest first."""
+        return self._conn.execute(
+            'SELECT processed_at, state, sender, isa13, source_file, output_file FROM interchanges ORDER BY processed_at'
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Look up or list interchanges in the duplicate index.")
+    parser.add_argument('index', help=f"Index database (normally {DUPLICATE_INDEX_FILENAME} in the output folder)")
+    parser.add_argument('--file', help="Check whether this EDI file was already processed")
+    args = parser.parse_args()
+    try:
+        with DuplicateIndex(args.index) as index:
+            if args.file:
+                from final import read_interchange_key, split_segments, sniff_file
+                with open(args.file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                lines, _ = split_segments(content, sniff_file(args.file)['delimiters']['segment'])
+                seen = index.lookup(*read_interchange_key(lines, content_digest(content)))
+                if seen is None:
+                    print("Not seen before")
+                elif seen[3] == 'pending':
+                    print(f"In progress from {seen[0]} since {seen[2]}")
+                else:
+                    print(f"Already processed from {seen[0]} at {seen[2]} (output {seen[1]})")
+            else:
+                for row in index.entries():
+                    print('\t'.join(str(value or '') for value in row))
+    except Exception as e:
+        print(f"Error: {str(e)}")
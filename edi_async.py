@@ -0,0 +1,218 @@
+import os
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from final import (
+    SNIFF_SIZE, load_config, compile_config, discover_configured_inputs, read_input, sniff_input,
+    transform_file, save_result, OutputNamer, is_large_file, uses_streaming,
+)
+from edi_export import PO1Exporter
+from edi_stream import CHUNK_SIZE, process_file_streaming
+from edi_merge import merge_files
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+
+class ByteBudget:
+    """Caps the total size of input files held by the pipeline at once.
+
+    Files are admitted in discovery order: a file that does not fit blocks the
+    ones behind it until enough bytes are released. A file larger than the
+    whole budget is admitted alone once nothing else is in flight. A limit of
+    0 disables the cap.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._admission = asyncio.Lock()
+        self._changed = asyncio.Condition()
+
+    def _fits(self, size):
+        return not self.limit or self.in_flight == 0 or self.in_flight + size <= self.limit
+
+    async def acquire(self, size):
+        async with self._admission:
+            async with self._changed:
+                if not self._fits(size):
+                    print(f"Waiting for {self.in_flight} in-flight bytes to drain before reading {size} more...")
+                await self._changed.wait_for(lambda: self._fits(size))
+                self.in_flight += size
+
+    async def release(self, size):
+        async with self._changed:
+            self.in_flight -= size
+            self._changed.notify_all()
+
+async def _read_stage(paths, config, read_queue, budget):
+    """Read files in a thread so slow (network) reads overlap with transforms and writes.
+
+    Files that go through edi_stream (split mode, or single-line files over
+    stream_threshold_bytes) are only sniffed here; they are handed on without
+    content and never count against the byte budget.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            file_counter, file_path, size = paths.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        sniff = None
+        if config.get('split_transactions') or is_large_file(file_path, config):
+            sniff = await loop.run_in_executor(None, sniff_input, file_path, config)
+            if sniff is None:
+                continue
+            if uses_streaming(file_path, config, sniff):
+                await read_queue.put((file_counter, file_path, 0, None, sniff))
+                continue
+        await budget.acquire(size)
+        try:
+            content = await loop.run_in_executor(None, read_input, file_path)
+            sniff = sniff or sniff_input(file_path, config, content[:SNIFF_SIZE])
+        except Exception as e:
+            print(f"Error reading file {file_path}: {str(e)}")
+            sniff = None
+        if sniff is None:
+            await budget.release(size)
+            continue
+        await read_queue.put((file_counter, file_path, size, content, sniff))
+
+async def _transform_stage(config, read_queue, write_queue, executor, is_bulk_processing, budget):
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await read_queue.get()
+        if item is None:
+            return
+        file_counter, file_path, size, content, sniff = item
+        if content is None:
+            # Streamed files are transformed and written by the writer, which owns the exporter and namer
+            await write_queue.put((file_path, size, ('stream', file_counter, sniff)))
+            continue
+        print(f"\nProcessing file: {os.path.basename(file_path)}")
+        try:
+            result = await loop.run_in_executor(
+                executor, transform_file, file_path, content, config, sniff, is_bulk_processing, file_counter, False
+            )
+        except Exception as e:
+            print(f"Error processing file {file_path}: {str(e)}")
+            result = None
+        del content
+        if result is None:
+            await budget.release(size)
+        else:
+            await write_queue.put((file_path, size, result))
+
+async def _write_stage(write_queue, config, exporter, namer, budget, is_bulk_processing):
+    """Single writer: the exporter and output namer are only touched from here.
+
+    Streamed files are processed here end to end (in a thread) with
+    process_file_streaming, one at a time.
+    """
+    loop = asyncio.get_running_loop()
+    written = []
+    while True:
+        item = await write_queue.get()
+        if item is None:
+            return written
+        file_path, size, result = item
+        try:
+            if isinstance(result, tuple):
+                _, file_counter, sniff = result
+                print(f"\nProcessing file (streamed): {os.path.basename(file_path)}")
+                output = await loop.run_in_executor(
+                    None, process_file_streaming, file_path, config, sniff, is_bulk_processing, file_counter, exporter, False, namer,
+                    CHUNK_SIZE, bool(config.get('split_transactions'))
+                )
+            else:
+                output = await loop.run_in_executor(None, save_result, file_path, result, exporter, namer)
+            if output:
+                written.extend(output if isinstance(output, list) else [output])
+        except Exception as e:
+            print(f"Error writing output for {file_path}: {str(e)}")
+        del result
+        await budget.release(size)
+
+async def run_pipeline(config, workers=None, readers=2, queue_size=DEFAULT_QUEUE_SIZE, max_inflight_bytes=None):
+    """Process the input folder with reading, transforming and writing overlapped.
+
+    Bounded queues between the stages keep at most queue_size files waiting
+    at each hand-off, and max_inflight_bytes (default: the config's
+    max_inflight_bytes, else 256 MB) caps the input bytes read but not yet
+    written. Transforms run in a process pool; runs are always
+    non-interactive, so bulk runs keep all PO1 segments as in watch mode.
+    stream_threshold_bytes and split_transactions route files through
+    edi_stream as in the batch run, and merge_outputs merges the outputs
+    once the pipeline has drained and removes the per-file outputs it merged.
+    Returns the list of output paths left behind (the merged files when
+    merging).
+    """
+    config = compile_config(config)
+    input_folder = config.get('input_folder_path')
+    output_folder = config.get('output_folder_path')
+    if not input_folder or not os.path.exists(input_folder):
+        raise FileNotFoundError(f"Input folder '{input_folder}' not found!")
+    if not output_folder:
+        raise ValueError("Output folder path is missing in the configuration!")
+    os.makedirs(output_folder, exist_ok=True)
+
+    input_files = discover_configured_inputs(config)
+    if not input_files:
+        print("No files found in the input folder!")
+        return []
+    is_bulk_processing = len(input_files) > 1
+
+    if max_inflight_bytes is None:
+        max_inflight_bytes = config.get('max_inflight_bytes')
+    if max_inflight_bytes is None or max_inflight_bytes == '':
+        max_inflight_bytes = DEFAULT_MAX_INFLIGHT_BYTES
+    budget = ByteBudget(int(max_inflight_bytes))
+
+    paths = asyncio.Queue()
+    for file_counter, (file_path, stat) in enumerate(input_files, 1):
+        paths.put_nowait((file_counter, file_path, stat.st_size))
+    read_queue = asyncio.Queue(maxsize=queue_size)
+    write_queue = asyncio.Queue(maxsize=queue_size)
+
+    export_folder = config.get('export_folder_path')
+    exporter = PO1Exporter(export_folder) if export_folder else None
+    namer = OutputNamer(config.get('output_name_template'))
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            writer = asyncio.ensure_future(_write_stage(write_queue, config, exporter, namer, budget, is_bulk_processing))
+            transformers = [
+                asyncio.ensure_future(_transform_stage(config, read_queue, write_queue, executor, is_bulk_processing, budget))
+                for _ in range(workers)
+            ]
+            await asyncio.gather(*(_read_stage(paths, config, read_queue, budget) for _ in range(max(1, readers))))
+            for _ in transformers:
+                await read_queue.put(None)
+            await asyncio.gather(*transformers)
+            await write_queue.put(None)
+            written = await writer
+    finally:
+        if exporter:
+            exporter.close()
+    print(f"\nPipeline finished: {len(written)} output file(s) written from {len(input_files)} input file(s).")
+    if config.get('merge_outputs') and written:
+        print(f"\nMerging {len(written)} output file(s)...")
+        merged = merge_files(written, config, remove_sources=True)
+        written = [path for path in written if os.path.exists(path)] + merged
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Process the input folder with overlapped read, transform and write stages.")
+    parser.add_argument('--workers', type=int, default=None, help="Transform worker processes (default: CPU count)")
+    parser.add_argument('--readers', type=int, default=2, help="Concurrent file reads")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help="Files allowed to wait between stages")
+    parser.add_argument('--max-inflight-bytes', type=int, default=None, help="Input bytes allowed in flight (default: max_inflight_bytes from conf.json, else 256 MB; 0 = no limit)")
+    args = parser.parse_args()
+    try:
+        config = load_config()
+        asyncio.run(run_pipeline(config, workers=args.workers, readers=args.readers, queue_size=args.queue_size, max_inflight_bytes=args.max_inflight_bytes))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    except Exception as e:
+        print(f"Error: {str(e)}")
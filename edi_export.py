@@ -0,0 +1,193 @@
+import os
+import csv
+import argparse
+from datetime import datetime
+
+from edi_json import PO1_RELATED_SEGMENTS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+PRODUCT_ID_PAIRS = 8
+
+# (column, type) in output order; types drive CSV number formatting and the Parquet schema
+PO1_EXPORT_COLUMNS = [
+    ('source_file', 'string'),
+    ('po_number', 'string'),
+    ('po_date', 'string'),
+    ('line_seq', 'int'),
+    ('assigned_id', 'string'),
+    ('quantity', 'float'),
+    ('uom', 'string'),
+    ('unit_price', 'float'),
+    ('price_basis', 'string'),
+] + [
+    column
+    for n in range(1, PRODUCT_ID_PAIRS + 1)
+    for column in ((f'product_id_qualifier_{n}', 'string'), (f'product_id_{n}', 'string'))
+] + [
+    ('ctp_class', 'string'),
+    ('ctp_price', 'float'),
+    ('pid_description', 'string'),
+    ('po4_pack', 'float'),
+    ('po4_size', 'float'),
+    ('po4_uom', 'string'),
+    ('sdq', 'string'),
+    ('amt_qualifier', 'string'),
+    ('amt_amount', 'float'),
+]
+PO1_EXPORT_FIELDS = [name for name, _ in PO1_EXPORT_COLUMNS]
+
+def _element(parts, idx):
+    return parts[idx].strip() if idx < len(parts) else ''
+
+def _number(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def _join(existing, value):
+    return f"{existing} | {value}" if existing and value else existing or value
+
+def _new_row(parts, source_file, po_number, po_date, line_seq):
+    row = {
+        'source_file': source_file,
+        'po_number': po_number,
+        'po_date': po_date,
+        'line_seq': line_seq,
+        'assigned_id': _element(parts, 1),
+        'quantity': _number(_element(parts, 2)),
+        'uom': _element(parts, 3),
+        'unit_price': _number(_element(parts, 4)),
+        'price_basis': _element(parts, 5),
+        'ctp_class': '', 'ctp_price': None, 'pid_description': '',
+        'po4_pack': None, 'po4_size': None, 'po4_uom': '',
+        'sdq': '', 'amt_qualifier': '', 'amt_amount': None,
+    }
+    for n in range(1, PRODUCT_ID_PAIRS + 1):
+        row[f'product_id_qualifier_{n}'] = _element(parts, 4 + 2 * n)
+        row[f'product_id_{n}'] = _element(parts, 5 + 2 * n)
+    return row
+
+def _add_child(row, line):
+    parts = line.split('*')
+    if line.startswith('CTP*'):
+        if row['ctp_price'] is None:
+            row['ctp_class'] = _element(parts, 2)
+            row['ctp_price'] = _number(_element(parts, 3))
+    elif line.startswith('PID*'):
+        row['pid_description'] = _join(row['pid_description'], _element(parts, 5))
+    elif line.startswith('PO4*'):
+        row['po4_pack'] = _number(_element(parts, 1))
+        row['po4_size'] = _number(_element(parts, 2))
+        row['po4_uom'] = _element(parts, 3)
+    elif line.startswith('SDQ*'):
+        row['sdq'] = _join(row['sdq'], '*'.join(parts[1:]))
+    elif line.startswith('AMT*') and not row['amt_qualifier']:
+        row['amt_qualifier'] = _element(parts, 1)
+        row['amt_amount'] = _number(_element(parts, 2))
+
+def iter_po1_rows(lines, source_file):
+    """Yield one typed row per PO1 group in a single pass over split segments."""
+    po_number = po_date = ''
+    row = None
+    line_seq = 0
+    for line in lines:
+        if line.startswith('PO1*'):
+            if row:
+                yield row
+            line_seq += 1
+            row = _new_row(line.split('*'), source_file, po_number, po_date, line_seq)
+        elif row and line.startswith(PO1_RELATED_SEGMENTS):
+            _add_child(row, line)
+        else:
+            if row:
+                yield row
+                row = None
+            if line.startswith('BEG*'):
+                parts = line.split('*')
+                po_number, po_date = _element(parts, 3), _element(parts, 5)
+            elif line.startswith('ST*'):
+                po_number = po_date = ''
+                line_seq = 0
+    if row:
+        yield row
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+class PO1Exporter:
+    """Writes PO1 rows from many files to one CSV (and Parquet when pyarrow is installed).
+
+    The CSV is created exclusively; when another exporter already took the
+    run name, _1, _2, ... is added so runs never overwrite each other.
+    """
+
+    def __init__(self, export_folder, run_name=None):
+        os.makedirs(export_folder, exist_ok=True)
+        base_stem = stem = f"po1_export_{run_name or datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        attempt = 0
+        while True:
+            self.csv_path = os.path.join(export_folder, f"{stem}.csv")
+            try:
+                self._csv_file = open(self.csv_path, 'x', encoding='utf-8', newline='')
+                break
+            except FileExistsError:
+                attempt += 1
+                stem = f"{base_stem}_{attempt}"
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(PO1_EXPORT_FIELDS)
+        self.parquet_path = None
+        self._parquet_writer = None
+        if pq is not None:
+            self.parquet_path = os.path.join(export_folder, f"{stem}.parquet")
+            arrow_types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+            self._schema = pa.schema([(name, arrow_types[kind]) for name, kind in PO1_EXPORT_COLUMNS])
+            self._parquet_writer = pq.ParquetWriter(self.parquet_path, self._schema)
+        self.row_count = 0
+
+    def add_file(self, lines, source_file):
+        rows = list(iter_po1_rows(lines, os.path.basename(source_file)))
+        self._csv_writer.writerows([_csv_value(row[name]) for name in PO1_EXPORT_FIELDS] for row in rows)
+        if self._parquet_writer is not None and rows:
+            # One row group per file keeps the Parquet output streaming
+            self._parquet_writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+        self.row_count += len(rows)
+        return len(rows)
+
+    def close(self):
+        self._csv_file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        print(f"Exported {self.row_count} PO1 rows to {self.csv_path}" + (f" and {self.parquet_path}" if self.parquet_path else ""))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == '__main__':
+    from final import split_segments
+
+    parser = argparse.ArgumentParser(description="Export PO1 data from processed EDI files to columnar files.")
+    parser.add_argument('files', nargs='+', help="EDI files to export")
+    parser.add_argument('--export-folder', default='.', help="Folder for the CSV/Parquet output")
+    args = parser.parse_args()
+    try:
+        with PO1Exporter(args.export_folder) as exporter:
+            for file_path in args.files:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    lines, _ = split_segments(file.read())
+                exporter.add_file(lines, file_path)
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,226 @@
+"""JSON intermediate representation (IR) of an X12 interchange.
+
+Layout (version 1)::
+
+    {
+      "format": "x12-ir",
+      "version": 1,
+      "delimiters": {"element": "*", "component": ">", "repetition": "^" or null,
+                     "segment": "~", "line_break": "\\n" or "", "trailing": ""},
+      "interchanges": [{
+        "isa": ["ISA", "00", ...],
+        "groups": [{
+          "gs": ["GS", "PO", ...],
+          "transactions": [{
+            "st": ["ST", "850", "0001"],
+            "segments": [["BEG", ...], {"po1": ["PO1", ...], "children": [["CTP", ...], ...]}, ...],
+            "se": ["SE", "14", "0001"]
+          }],
+          "ge": ["GE", "1", "101"]
+        }],
+        "iea": ["IEA", "1", "000000101"]
+      }]
+    }
+
+Every segment is a list of elements with the segment ID first; composite
+elements are kept as strings. PO1 groups hold the PO1 and its CTP/PID/PO4/
+SDQ/AMT children exactly as modify_edi_file groups them. A trailer that is
+missing in the input (SE/GE/IEA) is null. to_x12 rebuilds the original text
+byte for byte when segments are uniformly terminated (one per line or all
+on one line), which is how the processors write them.
+
+The compact form is msgpack when the msgpack package is installed and
+minified JSON otherwise; from_compact reads either.
+"""
+import sys
+import json
+import argparse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+IR_FORMAT = 'x12-ir'
+IR_VERSION = 1
+# Segments that belong to the PO1 before them. Defined here because every
+# other module imports this one; final and the edi_* modules use this tuple.
+PO1_RELATED_SEGMENTS = ('CTP*', 'PID*', 'PO4*', 'SDQ*', 'AMT*')
+
+def detect_delimiters(content):
+    """Read element, component, repetition and segment delimiters from the ISA header."""
+    text = content.lstrip()
+    if not text.startswith('ISA') or len(text) < 106:
+        raise ValueError("Error: Content does not start with a complete ISA segment")
+    element = text[3]
+    position = 3
+    for _ in range(15):
+        position = text.find(element, position + 1)
+        if position == -1:
+            raise ValueError("Error: ISA segment has fewer than 16 elements")
+    component = text[position + 1]
+    segment = text[position + 2]
+    after = text[position + 3:position + 5]
+    line_break = '\r\n' if after.startswith('\r\n') else '\n' if after.startswith('\n') else ''
+    isa_parts = text[:position + 2].split(element)
+    # ISA11 is the repetition separator from version 00402 on, 'U' before that
+    repetition = isa_parts[11] if len(isa_parts) > 12 and isa_parts[12] >= '00402' else None
+    return {
+        'element': element,
+        'component': component,
+        'repetition': repetition,
+        'segment': segment,
+        'line_break': line_break,
+    }
+
+def _split(content, delimiters):
+    terminator = delimiters['segment']
+    pieces = content.split(terminator)
+    trailing = pieces.pop() if pieces else ''
+    if trailing.strip():
+        # Last segment lacks a terminator; keep it rather than dropping data
+        pieces.append(trailing)
+        trailing = ''
+    delimiters['trailing'] = trailing
+    element = delimiters['element']
+    return [piece.strip('\r\n').split(element) for piece in pieces if piece.strip('\r\n')]
+
+def parse_interchange(content):
+    """Parse X12 text into the IR dictionary. Raises ValueError on segments outside an envelope."""
+    delimiters = detect_delimiters(content)
+    interchanges = []
+    interchange = group = transaction = None
+    po1_group = None
+
+    for segment in _split(content, delimiters):
+        tag = segment[0]
+        if tag == 'ISA':
+            interchange = {'isa': segment, 'groups': [], 'iea': None}
+            interchanges.append(interchange)
+            group = transaction = po1_group = None
+        elif interchange is None:
+            raise ValueError(f"Error: Segment '{tag}' found outside an ISA/IEA envelope")
+        elif tag == 'IEA':
+            interchange['iea'] = segment
+            interchange = group = transaction = po1_group = None
+        elif tag == 'GS':
+            group = {'gs': segment, 'transactions': [], 'ge': None}
+            interchange['groups'].append(group)
+            transaction = po1_group = None
+        elif group is None:
+            raise ValueError(f"Error: Segment '{tag}' found outside a GS/GE functional group")
+        elif tag == 'GE':
+            group['ge'] = segment
+            group = transaction = po1_group = None
+        elif tag == 'ST':
+            transaction = {'st': segment, 'segments': [], 'se': None}
+            group['transactions'].append(transaction)
+            po1_group = None
+        elif transaction is None:
+            raise ValueError(f"Error: Segment '{tag}' found outside an ST/SE transaction set")
+        elif tag == 'SE':
+            transaction['se'] = segment
+            transaction = po1_group = None
+        elif tag == 'PO1':
+            po1_group = {'po1': segment, 'children': []}
+            transaction['segments'].append(po1_group)
+        elif po1_group is not None and f"{tag}*" in PO1_RELATED_SEGMENTS:
+            po1_group['children'].append(segment)
+        else:
+            po1_group = None
+            transaction['segments'].append(segment)
+
+    return {
+        'format': IR_FORMAT,
+        'version': IR_VERSION,
+        'delimiters': delimiters,
+        'interchanges': interchanges,
+    }
+
+def iter_segments(ir):
+    """Yield every segment of the IR as an element list, in document order."""
+    for interchange in ir['interchanges']:
+        yield interchange['isa']
+        for group in interchange['groups']:
+            yield group['gs']
+            for transaction in group['transactions']:
+                yield transaction['st']
+                for item in transaction['segments']:
+                    if isinstance(item, dict):
+                        yield item['po1']
+                        yield from item['children']
+                    else:
+                        yield item
+                if transaction['se'] is not None:
+                    yield transaction['se']
+            if group['ge'] is not None:
+                yield group['ge']
+        if interchange['iea'] is not None:
+            yield interchange['iea']
+
+def to_x12(ir):
+    """Serialize the IR back to X12 text using its original delimiters."""
+    if ir.get('format') != IR_FORMAT or ir.get('version') != IR_VERSION:
+        raise ValueError(f"Error: Unsupported IR format '{ir.get('format')}' version '{ir.get('version')}'")
+    delimiters = ir['delimiters']
+    element = delimiters['element']
+    terminator = delimiters['segment']
+    segments = [element.join(segment) for segment in iter_segments(ir)]
+    if not segments:
+        return delimiters.get('trailing', '')
+    separator = terminator + delimiters.get('line_break', '')
+    return separator.join(segments) + terminator + delimiters.get('trailing', '')
+
+def to_json(ir, indent=None):
+    return json.dumps(ir, indent=indent, ensure_ascii=False)
+
+def from_json(text):
+    return json.loads(text)
+
+def to_compact(ir):
+    if msgpack is not None:
+        return msgpack.packb(ir, use_bin_type=True)
+    return json.dumps(ir, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def from_compact(data):
+    """Read the output of to_compact: minified JSON when it parses as a JSON object, else msgpack."""
+    if data[:1] == b'{':
+        try:
+            ir = json.loads(data.decode('utf-8'))
+        except ValueError:
+            ir = None
+        if isinstance(ir, dict):
+            return ir
+    if msgpack is None:
+        raise ValueError("Error: Data is not a JSON object and the msgpack package is not installed to read it as msgpack")
+    return msgpack.unpackb(data, raw=False)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert between X12 and the JSON intermediate representation.")
+    parser.add_argument('command', choices=['to-json', 'to-compact', 'to-x12'])
+    parser.add_argument('input', help="Input file (X12 for to-json/to-compact, IR for to-x12)")
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    args = parser.parse_args()
+    try:
+        if args.command == 'to-x12':
+            with open(args.input, 'rb') as f:
+                data = f.read()
+            result = to_x12(from_compact(data))
+        else:
+            with open(args.input, 'r', encoding='utf-8', newline='') as f:
+                ir = parse_interchange(f.read())
+            result = to_compact(ir) if args.command == 'to-compact' else to_json(ir, indent=2)
+
+        if isinstance(result, bytes):
+            if args.output:
+                with open(args.output, 'wb') as f:
+                    f.write(result)
+            else:
+                sys.stdout.buffer.write(result)
+        elif args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                f.write(result)
+        else:
+            print(result)
+    except Exception as e:
+        print(f"Error: {str(e)}")
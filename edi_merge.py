@@ -0,0 +1,190 @@
+import os
+import argparse
+
+from final import load_config, compile_config, pad_isa_field, sniff_file, OutputNamer, control_number_service
+from edi_stream import iter_file_segments
+from control_numbers import SequentialControlNumbers
+
+DEFAULT_MERGE_MAX_TRANSACTIONS = 1000
+DEFAULT_MERGE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_MERGE_NAME_TEMPLATE = 'merged_{timestamp}_{seq}{ext}'
+
+class _OpenInterchange:
+    def __init__(self, part_path, isa, gs, separator, terminator, ext):
+        self.part_path = part_path
+        self.output = open(part_path, 'w', encoding='utf-8')
+        self.isa = isa
+        self.gs = gs
+        self.separator = separator
+        self.terminator = terminator
+        self.ext = ext
+        self.transaction_count = 0
+        self.size = 0
+        self.write('*'.join(isa))
+        self.write('*'.join(gs))
+
+    def write(self, line):
+        text = line + self.separator
+        self.output.write(text)
+        self.size += len(text)
+
+class InterchangeMerger:
+    """Streams the ST..SE bodies of many files into shared ISA/GS envelopes.
+
+    Transactions are grouped by their (rewritten) envelope: sender/receiver
+    IDs, GS01 functional ID and GS08 version. The configured ISA/GS IDs
+    override the ones in the files. A merged file takes the extension of the
+    first source file in it, unless merge_name_template sets its own. An interchange is closed and renamed into
+    place once it reaches max_transactions or max_bytes. Every interchange
+    gets new ISA13/GS06 values from control_numbers (a ControlNumberService,
+    or a per-run sequence when none is given), ST02/SE02 are renumbered
+    inside the group, and SE01/CTT01/GE01/IEA01 are counted as it is written.
+    """
+
+    def __init__(self, output_folder, config, max_transactions=DEFAULT_MERGE_MAX_TRANSACTIONS,
+                 max_bytes=DEFAULT_MERGE_MAX_BYTES, namer=None, control_numbers=None):
+        self.output_folder = output_folder
+        self.config = compile_config(config)
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.namer = namer or OutputNamer(self.config.get('merge_name_template') or DEFAULT_MERGE_NAME_TEMPLATE)
+        self.control_numbers = control_numbers or SequentialControlNumbers()
+        self.open = {}
+        self.paths = []
+        self.source_count = 0
+        self.merged_sources = []
+        os.makedirs(output_folder, exist_ok=True)
+
+    def add_file(self, file_path, sniff=None):
+        """Append every complete transaction set of one file. Returns the number of transaction sets added."""
+        sniff = sniff or sniff_file(file_path)
+        terminator = sniff['delimiters']['segment']
+        separator = terminator if sniff['is_single_line'] else terminator + '\n'
+        ext = os.path.splitext(file_path)[1]
+        self.source_count += 1
+        isa = gs = None
+        transaction = None
+        added = 0
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for line in iter_file_segments(file, terminator):
+                tag = line.split('*', 1)[0]
+                if tag == 'ISA':
+                    isa = line.split('*')
+                elif tag == 'GS':
+                    gs = line.split('*')
+                elif tag == 'ST':
+                    if isa is None or gs is None:
+                        raise ValueError(f"Error: {os.path.basename(file_path)} has an ST segment outside an ISA/GS envelope")
+                    transaction = [line]
+                elif transaction is not None:
+                    transaction.append(line)
+                    if tag == 'SE':
+                        self._add_transaction(isa, gs, transaction, separator, terminator, ext)
+                        transaction = None
+                        added += 1
+        if transaction is not None:
+            print(f"Warning: {os.path.basename(file_path)} ends inside a transaction set; it was not merged")
+        elif added:
+            self.merged_sources.append(file_path)
+        return added
+
+    def close(self):
+        """Close every open interchange. Returns the merged file paths."""
+        for key in list(self.open):
+            self._close_interchange(key)
+        print(f"Merged {self.source_count} file(s) into {len(self.paths)} interchange(s)")
+        return self.paths
+
+    def _envelope(self, isa, gs):
+        config = self.config
+        isa = list(isa)
+        gs = list(gs)
+        isa[6] = config.isa_sender_id or pad_isa_field(isa[6])
+        isa[8] = config.isa_receiver_id or pad_isa_field(isa[8])
+        gs[2] = config.gs_sender_id or gs[2]
+        gs[3] = config.gs_receiver_id or gs[3]
+        key = (isa[5], isa[6], isa[7], isa[8], isa[12] if len(isa) > 12 else '', gs[1], gs[2], gs[3], gs[8] if len(gs) > 8 else '')
+        return key, isa, gs
+
+    def _add_transaction(self, isa, gs, transaction, separator, terminator, ext):
+        key, isa, gs = self._envelope(isa, gs)
+        interchange = self.open.get(key)
+        if interchange is None:
+            isa[13] = self.control_numbers.next_interchange(isa)
+            gs[6] = self.control_numbers.next_group(gs)
+            part_path = os.path.join(self.output_folder, f".merge.{os.getpid()}.{len(self.paths) + len(self.open) + 1}.part")
+            interchange = self.open[key] = _OpenInterchange(part_path, isa, gs, separator, terminator, ext)
+
+        interchange.transaction_count += 1
+        control = f"{interchange.transaction_count:04d}"
+        st = transaction[0].split('*')
+        se = transaction[-1].split('*')
+        st[2:3] = [control]
+        se[1:3] = [str(len(transaction)), control]
+        interchange.write('*'.join(st))
+        po1_count = 0
+        for line in transaction[1:-1]:
+            if line.startswith('PO1*'):
+                po1_count += 1
+            elif line.startswith('CTT*'):
+                parts = line.split('*')
+                parts[1] = str(po1_count)
+                line = '*'.join(parts)
+            interchange.write(line)
+        interchange.write('*'.join(se))
+
+        if interchange.transaction_count >= self.max_transactions or (self.max_bytes and interchange.size >= self.max_bytes):
+            self._close_interchange(key)
+
+    def _close_interchange(self, key):
+        interchange = self.open.pop(key)
+        interchange.write(f"GE*{interchange.transaction_count}*{interchange.gs[6]}")
+        interchange.write(f"IEA*1*{interchange.isa[13]}")
+        interchange.output.close()
+        output_path = self.namer.reserve(self.output_folder, f"merged{interchange.ext}", [], len(self.paths) + 1)
+        os.replace(interchange.part_path, output_path)
+        self.paths.append(output_path)
+        print(f"Merged {interchange.transaction_count} transaction set(s) into {output_path}")
+
+def merge_files(file_paths, config, output_folder=None, max_transactions=None, max_bytes=None, remove_sources=False):
+    """Merge the given files using the merge_* settings. Returns the merged file paths.
+
+    With remove_sources, every file whose transaction sets were all merged is
+    deleted afterwards, so only the merged interchanges are left behind.
+    """
+    config = compile_config(config)
+    output_folder = output_folder or config.get('merge_folder_path') or os.path.join(config.get('output_folder_path'), 'merged')
+    if max_transactions is None:
+        max_transactions = config.get('merge_max_transactions') or DEFAULT_MERGE_MAX_TRANSACTIONS
+    if max_bytes is None:
+        max_bytes = config.get('merge_max_bytes')
+        if max_bytes is None or max_bytes == '':
+            max_bytes = DEFAULT_MERGE_MAX_BYTES
+    merger = InterchangeMerger(output_folder, config, int(max_transactions), int(max_bytes),
+                               control_numbers=control_number_service(config))
+    try:
+        for file_path in file_paths:
+            try:
+                merger.add_file(file_path)
+            except ValueError as e:
+                print(f"Error merging file {file_path}: {str(e)}")
+    finally:
+        paths = merger.close()
+    if remove_sources:
+        for file_path in merger.merged_sources:
+            os.remove(file_path)
+        print(f"Removed {len(merger.merged_sources)} merged source file(s)")
+    return paths
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Merge the transaction sets of many EDI files into shared interchanges.")
+    parser.add_argument('files', nargs='+', help="Processed EDI files to merge")
+    parser.add_argument('--output-folder', default=None, help="Folder for merged files (default: merge_folder_path or <output>/merged)")
+    parser.add_argument('--max-transactions', type=int, default=None, help="Transaction sets per interchange")
+    parser.add_argument('--max-bytes', type=int, default=None, help="Approximate size limit per interchange (0 = no limit)")
+    parser.add_argument('--remove-sources', action='store_true', help="Delete the source files once they are merged")
+    args = parser.parse_args()
+    try:
+        merge_files(args.files, load_config(), args.output_folder, args.max_transactions, args.max_bytes, args.remove_sources)
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,174 @@
+import os
+from datetime import datetime
+
+from edi_json import PO1_RELATED_SEGMENTS
+
+# Transaction set -> GS01 functional identifier
+OUTBOUND_DOCUMENTS = {
+    '855': 'PR',
+    '856': 'SH',
+    '810': 'IN',
+}
+
+def _element(parts, idx):
+    return parts[idx].strip() if idx < len(parts) else ''
+
+def collect_purchase_orders(lines):
+    """Gather the envelope, BEG and PO1 groups of each transaction in one pass over split segments.
+
+    Returns (isa_parts, gs_parts, orders); each order is a dict with po_number,
+    po_date and items, where an item is the PO1 element list plus its PID description.
+    """
+    isa = gs = None
+    orders = []
+    order = None
+    item = None
+    for line in lines:
+        parts = line.split('*')
+        tag = parts[0]
+        if tag == 'PO1' and order is not None:
+            item = {'po1': parts, 'description': ''}
+            order['items'].append(item)
+            continue
+        if item is not None and line.startswith(PO1_RELATED_SEGMENTS):
+            if tag == 'PID' and not item['description']:
+                item['description'] = _element(parts, 5)
+            continue
+        item = None
+        if tag == 'ISA' and isa is None:
+            isa = parts
+        elif tag == 'GS' and gs is None:
+            gs = parts
+        elif tag == 'ST':
+            order = {'po_number': '', 'po_date': '', 'items': []}
+            orders.append(order)
+        elif tag == 'BEG' and order is not None:
+            order['po_number'] = _element(parts, 3)
+            order['po_date'] = _element(parts, 5)
+        elif tag == 'SE':
+            order = None
+    if isa is None or gs is None:
+        raise ValueError("Error: Cannot build outbound documents without ISA and GS segments")
+    return isa, gs, orders
+
+def _po1_product_ids(po1):
+    """PO106 onwards as qualifier/ID pairs, reused verbatim in IT1/LIN."""
+    return po1[6:]
+
+def _build_855(order, seq, today):
+    segments = [f"BAK*00*AC*{order['po_number']}*{order['po_date'] or today}*****{today}"]
+    for item in order['items']:
+        po1 = item['po1']
+        segments.append('*'.join(po1))
+        segments.append(f"ACK*IA*{_element(po1, 2)}*{_element(po1, 3)}*068*{today}")
+    segments.append(f"CTT*{len(order['items'])}")
+    return segments
+
+def _build_856(order, seq, today):
+    now = datetime.now().strftime('%H%M')
+    segments = [
+        f"BSN*00*{order['po_number'] or seq}*{today}*{now}",
+        "HL*1**S",
+        "HL*2*1*O",
+        f"PRF*{order['po_number']}" + (f"****{order['po_date']}" if order['po_date'] else ''),
+    ]
+    hl = 2
+    for item in order['items']:
+        po1 = item['po1']
+        hl += 1
+        segments.append(f"HL*{hl}*2*I")
+        segments.append('*'.join(['LIN', _element(po1, 1)] + _po1_product_ids(po1)))
+        segments.append(f"SN1**{_element(po1, 2)}*{_element(po1, 3)}")
+    segments.append(f"CTT*{hl}")
+    return segments
+
+def _build_810(order, seq, today):
+    segments = [f"BIG*{today}*{order['po_number'] or seq}*{order['po_date']}*{order['po_number']}"]
+    total = 0.0
+    for item in order['items']:
+        po1 = item['po1']
+        segments.append('*'.join(['IT1'] + po1[1:]))
+        if item['description']:
+            segments.append(f"PID*F****{item['description']}")
+        try:
+            total += float(_element(po1, 2) or 0) * float(_element(po1, 4) or 0)
+        except ValueError:
+            pass
+    # TDS01 is the invoice total with an implied two decimals
+    segments.append(f"TDS*{int(round(total * 100))}")
+    segments.append(f"CTT*{len(order['items'])}")
+    return segments
+
+DOCUMENT_BUILDERS = {
+    '855': _build_855,
+    '856': _build_856,
+    '810': _build_810,
+}
+
+def build_outbound_document(transaction_set, isa, gs, orders, control_numbers=None):
+    """Build one interchange holding a transaction set of the given type per inbound PO.
+
+    Sender and receiver are swapped from the inbound envelope. ISA13/GS06 come
+    from control_numbers when given; otherwise the inbound control numbers
+    are reused so the response can be traced to its PO.
+    """
+    if transaction_set not in DOCUMENT_BUILDERS:
+        raise ValueError(f"Error: Unsupported outbound document '{transaction_set}'. Choose from {', '.join(OUTBOUND_DOCUMENTS)}")
+    now = datetime.now()
+    today = now.strftime('%Y%m%d')
+
+    out_isa = list(isa)
+    out_isa[5], out_isa[6], out_isa[7], out_isa[8] = isa[7], isa[8], isa[5], isa[6]
+    out_isa[9] = now.strftime('%y%m%d')
+    out_isa[10] = now.strftime('%H%M')
+    out_gs = list(gs)
+    out_gs[1] = OUTBOUND_DOCUMENTS[transaction_set]
+    out_gs[2], out_gs[3] = gs[3], gs[2]
+    out_gs[4] = today
+    out_gs[5] = now.strftime('%H%M')
+    if control_numbers is not None:
+        out_isa[13] = control_numbers.next_interchange(out_isa)
+        out_gs[6] = control_numbers.next_group(out_gs)
+
+    segments = ['*'.join(out_isa), '*'.join(out_gs)]
+    for seq, order in enumerate(orders, 1):
+        control = f"{seq:04d}"
+        body = DOCUMENT_BUILDERS[transaction_set](order, seq, today)
+        segments.append(f"ST*{transaction_set}*{control}")
+        segments.extend(body)
+        segments.append(f"SE*{len(body) + 2}*{control}")
+    segments.append(f"GE*{len(orders)}*{_element(out_gs, 6)}")
+    segments.append(f"IEA*1*{_element(out_isa, 13)}")
+    return segments
+
+def _create_exclusive(folder, stem, ext, content):
+    """Write content to a new file, adding _1, _2, ... when the name is taken. Returns the path."""
+    path = os.path.join(folder, f"{stem}{ext}")
+    attempt = 0
+    while True:
+        try:
+            with open(path, 'x', encoding='utf-8') as f:
+                f.write(content)
+            return path
+        except FileExistsError:
+            attempt += 1
+            path = os.path.join(folder, f"{stem}_{attempt}{ext}")
+
+def write_outbound_documents(lines, source_file, outbound_folder, documents, is_single_line=False, terminator='~', control_numbers=None):
+    """Generate the requested outbound documents from processed segments. Returns the written paths."""
+    isa, gs, orders = collect_purchase_orders(lines)
+    if not orders:
+        print(f"No purchase orders found in {os.path.basename(source_file)}, skipping outbound documents.")
+        return []
+    os.makedirs(outbound_folder, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base_filename, file_extension = os.path.splitext(os.path.basename(source_file))
+    paths = []
+    for transaction_set in documents:
+        segments = build_outbound_document(transaction_set, isa, gs, orders, control_numbers)
+        separator = terminator if is_single_line else terminator + '\n'
+        path = _create_exclusive(outbound_folder, f"{transaction_set}_{base_filename}_{timestamp}", file_extension,
+                                 separator.join(segments) + terminator)
+        print(f"Generated {transaction_set} for {len(orders)} purchase order(s): {path}")
+        paths.append(path)
+    return paths
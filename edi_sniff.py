@@ -0,0 +1,43 @@
+from edi_json import detect_delimiters
+
+SNIFF_SIZE = 8192
+
+TRANSACTION_SET_NAMES = {
+    '850': '850 (Purchase Order)',
+    '875': '875 (Grocery Products Purchase Order)',
+}
+
+def sniff_content(head):
+    """Identify delimiters, GS01/GS08 and the first ST01 from the start of an interchange.
+
+    Raises ValueError when the text does not begin with a complete ISA segment.
+    """
+    delimiters = detect_delimiters(head)
+    element = delimiters['element']
+    info = {
+        'delimiters': delimiters,
+        'is_single_line': delimiters['line_break'] == '',
+        'functional_id': None,
+        'version': None,
+        'transaction_set': None,
+    }
+    for segment in head.split(delimiters['segment']):
+        segment = segment.strip()
+        if segment.startswith('GS' + element) and info['version'] is None:
+            parts = segment.split(element)
+            info['functional_id'] = parts[1] if len(parts) > 1 else None
+            info['version'] = parts[8] if len(parts) > 8 else None
+        elif segment.startswith('ST' + element):
+            parts = segment.split(element)
+            info['transaction_set'] = parts[1] if len(parts) > 1 else None
+            break
+    return info
+
+def sniff_file(file_path, size=SNIFF_SIZE):
+    """Sniff a file by reading only its first few KB."""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        head = f.read(size)
+    return sniff_content(head)
+
+def describe_transaction_set(transaction_set):
+    return TRANSACTION_SET_NAMES.get(transaction_set, "Unknown")
@@ -0,0 +1,117 @@
+import os
+
+DEFAULT_SPLIT_NAME_TEMPLATE = 'processed_{stem}_{seq}_{timestamp}{ext}'
+
+class TransactionSplitter:
+    """Writes every ST..SE of a segment stream to its own interchange file as it goes.
+
+    Each output gets the current ISA and GS headers, its transaction set, and
+    a fresh GE*1/IEA*1 trailer whose control numbers match the headers.
+    With control_numbers, every output gets its own ISA13/GS06 and ST02 0001;
+    otherwise the inbound numbers are kept. SE01 and CTT01 are recounted per
+    transaction. A file is written under a hidden .part name and renamed once
+    its SE is written, so downstream loaders can pick up early POs while
+    later ones are still being processed and never see a half-written file.
+    """
+
+    def __init__(self, output_folder, source_file, namer, terminator='~', line_break='\n', control_numbers=None):
+        self.output_folder = output_folder
+        self.source_file = source_file
+        self.namer = namer
+        self.separator = terminator + line_break
+        self.control_numbers = control_numbers
+        self.isa = None
+        self.gs = None
+        self.out_isa = None
+        self.out_gs = None
+        self.st_control = None
+        self.output = None
+        self.part_path = None
+        self.name_lines = []
+        self.segment_count = 0
+        self.po1_count = 0
+        self.paths = []
+
+    def feed(self, line):
+        """Take one segment. Returns the path of a finished output file, or None."""
+        parts = line.split('*')
+        tag = parts[0]
+        if tag == 'ISA':
+            self.isa = parts
+        elif tag == 'GS':
+            self.gs = parts
+        elif tag in ('GE', 'IEA'):
+            # Trailers are regenerated per output file
+            pass
+        elif tag == 'ST':
+            self._start(line)
+        elif self.output is None:
+            print(f"Warning: Skipping {tag} segment outside a transaction set")
+        elif tag == 'SE':
+            parts[1] = str(self.segment_count + 1)
+            if len(parts) > 2 and self.st_control:
+                parts[2] = self.st_control
+            self._write('*'.join(parts))
+            return self._finish()
+        else:
+            if tag == 'PO1':
+                self.po1_count += 1
+            elif tag == 'CTT' and len(parts) > 1:
+                parts[1] = str(self.po1_count)
+                line = '*'.join(parts)
+            elif tag == 'BEG':
+                self.name_lines.append(line)
+            self._write(line)
+        return None
+
+    def close(self):
+        """Drop a transaction left without SE. Returns every output path written."""
+        if self.output is not None:
+            print(f"Warning: Transaction set {len(self.paths) + 1} in {os.path.basename(self.source_file)} has no SE; not written")
+            self.output.close()
+            os.remove(self.part_path)
+            self.output = None
+        return self.paths
+
+    def _start(self, line):
+        if self.isa is None or self.gs is None:
+            raise ValueError("Error: ST segment found before the ISA and GS headers")
+        if self.output is not None:
+            print(f"Warning: ST found before SE in {os.path.basename(self.source_file)}; dropping the unfinished transaction set")
+            self.output.close()
+            os.remove(self.part_path)
+        self.part_path = os.path.join(self.output_folder, f".{os.path.basename(self.source_file)}.{os.getpid()}.{len(self.paths) + 1}.part")
+        self.output = open(self.part_path, 'w', encoding='utf-8')
+        self.out_isa = list(self.isa)
+        self.out_gs = list(self.gs)
+        self.st_control = None
+        if self.control_numbers is not None:
+            self.out_isa[13] = self.control_numbers.next_interchange(self.out_isa)
+            self.out_gs[6] = self.control_numbers.next_group(self.out_gs)
+            st = line.split('*')
+            if len(st) > 2:
+                self.st_control = st[2] = '0001'
+                line = '*'.join(st)
+        self.name_lines = ['*'.join(self.out_isa)]
+        self.segment_count = 0
+        self.po1_count = 0
+        self.output.write('*'.join(self.out_isa) + self.separator)
+        self.output.write('*'.join(self.out_gs) + self.separator)
+        self._write(line)
+
+    def _write(self, line):
+        self.segment_count += 1
+        self.output.write(line + self.separator)
+
+    def _finish(self):
+        isa13 = self.out_isa[13] if len(self.out_isa) > 13 else ''
+        gs06 = self.out_gs[6] if len(self.out_gs) > 6 else ''
+        self.output.write(f"GE*1*{gs06}{self.separator}")
+        self.output.write(f"IEA*1*{isa13}{self.separator}")
+        self.output.close()
+        self.output = None
+        output_path = self.namer.reserve(self.output_folder, self.source_file, self.name_lines, len(self.paths) + 1)
+        os.replace(self.part_path, output_path)
+        self.paths.append(output_path)
+        print(f"Split transaction set {len(self.paths)}: {output_path}")
+        return output_path
@@ -0,0 +1,344 @@
+import os
+import hashlib
+import argparse
+from collections import deque
+
+from final import (
+    load_config, compile_config, read_partner_ids, rewrite_segment, rewrite_selected_po1,
+    select_po1_segments, get_user_input_for_po1_elements, allocate_po_suffix, check_and_quarantine,
+    OutputNamer, record_manifest, sniff_input, control_number_service,
+    read_interchange_key, claim_interchange, complete_interchange, release_interchange, record_po_index, apply_po1_filter,
+    PO1_RELATED_SEGMENTS,
+)
+from control_numbers import renumber_envelopes
+from edi_outbound import write_outbound_documents
+from edi_split import DEFAULT_SPLIT_NAME_TEMPLATE, TransactionSplitter
+
+CHUNK_SIZE = 1024 * 1024
+ENVELOPE_SEGMENTS = ('ISA*', 'GS*', 'GE*', 'IEA*')
+
+def iter_file_segments(file, terminator='~', chunk_size=CHUNK_SIZE, digest=None):
+    """Yield segments from an open file, reading fixed-size blocks and carrying partial segments over.
+
+    digest, when given, is a hashlib object updated with every block (as UTF-8), matching file_digest.
+    """
+    pending = ''
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            break
+        if digest is not None:
+            digest.update(block.encode('utf-8'))
+        pieces = (pending + block).split(terminator)
+        pending = pieces.pop()
+        for piece in pieces:
+            piece = piece.strip()
+            if piece:
+                yield piece
+    pending = pending.strip()
+    if pending:
+        yield pending
+
+class StreamingTransformer:
+    """transform_segments for a stream: feed() one segment at a time and write what comes back.
+
+    Output matches transform_segments. Only PO1 groups that are still waiting
+    for a selected group later in the same ST (GUI or template reordering) are
+    held back; everything else is released as soon as its PO1 group is
+    complete. CTT01 and SE01 are computed when they are released, from the
+    segments output so far in the same ST.
+    """
+
+    def __init__(self, config, selected_segments=None, new_elements_list=None, is_bulk_processing=False, file_counter=None):
+        self.config = compile_config(config)
+        self.is_bulk_processing = is_bulk_processing
+        self.file_counter = file_counter
+        # Rank of each selected sequence; pending holds them in rank order until they are output
+        self.selected_rank = {}
+        for seq_num, _ in selected_segments or []:
+            self.selected_rank.setdefault(seq_num, len(self.selected_rank))
+        self.pending = deque(self.selected_rank)
+        self.emitted = set()
+        # (st_number, rank-ordered deque) for an ST whose remaining slots are being filled
+        self.closing = None
+        self.new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list or []}
+        self.po1_index = 0
+        self.po1_counter = 0
+        self.st_number = 0
+        self.finished = False
+        self.group = None
+        # Output waiting to be released: ('lines', [...]), ('slot', po1_counter, st_number) or ('CTT'|'SE', parts)
+        self.queue = []
+        # Selected groups seen but not output yet: seq -> (st_number, group)
+        self.waiting_groups = {}
+        self.po1_out = 0
+        self.body_out = 0
+        self.saw_ctt = self.saw_se = False
+        self.st_control = '0001'
+
+    def feed(self, line):
+        """Take one segment (without terminator). Returns the segments ready to be written."""
+        if line.startswith('PO1*'):
+            self._close_group()
+            self.po1_index += 1
+            self.group = [line]
+        elif self.group is not None and line.startswith(PO1_RELATED_SEGMENTS):
+            self.group.append(line)
+        else:
+            self._close_group()
+            if line.startswith('CTT*'):
+                self.queue.append(('CTT', line.split('*')))
+            elif line.startswith('SE*'):
+                self.queue.append(('SE', line.split('*')))
+            else:
+                if line.startswith('ST*'):
+                    self.st_number += 1
+                    if line.count('*') >= 2:
+                        self.st_control = line.split('*')[2]
+                self.queue.append(('lines', [rewrite_segment(line, self.config, self.is_bulk_processing, self.file_counter)]))
+        return self._release()
+
+    def finish(self):
+        """Flush the last group and add CTT/SE when the input had none. Returns the remaining segments."""
+        self._close_group()
+        self.finished = True
+        output = self._release()
+        for seq_num in self.pending:
+            if seq_num not in self.emitted:
+                print(f"Warning: Selected PO1 sequence {seq_num} is not in the file and was dropped")
+        self.pending.clear()
+        if not self.saw_ctt:
+            output.append(self._emit(f"CTT*{self.po1_out}"))
+            print(f"Adding CTT segment with count: {self.po1_out}")
+        if not self.saw_se:
+            segment_count = self.body_out
+            output.append(self._emit(f"SE*{segment_count}*{self.st_control}"))
+            print(f"Adding SE segment with count: {segment_count}")
+        return output
+
+    def _close_group(self):
+        group, self.group = self.group, None
+        if group is None:
+            return
+        index = self.po1_index
+        if self.selected_rank and index in self.selected_rank:
+            self.po1_counter += 1
+            self.waiting_groups[index] = (self.st_number, group)
+            self.queue.append(('slot', self.po1_counter, self.st_number))
+        elif self.selected_rank:
+            print(f"Skipping unselected PO1 segment (sequence {index})")
+        else:
+            self.queue.append(('lines', group))
+
+    def _emit(self, line):
+        if line.startswith('ST*'):
+            self.po1_out = 0
+            self.body_out = 0
+        if line.startswith('PO1*'):
+            self.po1_out += 1
+        if not line.startswith(ENVELOPE_SEGMENTS):
+            self.body_out += 1
+        return line
+
+    def _release(self):
+        output = []
+        released = 0
+        for entry in self.queue:
+            kind = entry[0]
+            if kind == 'slot':
+                _, po1_counter, st_number = entry
+                seq = self._next_selected(st_number)
+                if seq is None:
+                    break
+                self.emitted.add(seq)
+                group = self.waiting_groups.pop(seq)[1]
+                group[0] = rewrite_selected_po1(group[0], po1_counter, seq, self.new_elements_dict.get(seq), self.config)
+                output.extend(self._emit(line) for line in group)
+            elif kind == 'CTT':
+                parts = entry[1]
+                parts[1] = str(self.po1_out)
+                print(f"Updating CTT count to: {self.po1_out}")
+                self.saw_ctt = True
+                output.append(self._emit('*'.join(parts)))
+            elif kind == 'SE':
+                parts = entry[1]
+                parts[1] = str(self.body_out + 1)
+                print(f"Updating SE Segment Count: {parts[1]}")
+                self.saw_se = True
+                output.append(self._emit('*'.join(parts)))
+            else:
+                output.extend(self._emit(line) for line in entry[1])
+            released += 1
+        del self.queue[:released]
+        return output
+
+    def _next_selected(self, st_number):
+        """The selected sequence for the next slot of an ST, or None while a better-ranked group may still follow."""
+        if self.finished or self.st_number > st_number:
+            # The ST is complete: its remaining slots take its own waiting groups in rank order
+            if self.closing is None or self.closing[0] != st_number:
+                candidates = [seq for seq, (seq_st, _) in self.waiting_groups.items() if seq_st == st_number]
+                self.closing = (st_number, deque(sorted(candidates, key=self.selected_rank.get)))
+            return self.closing[1].popleft()
+        while self.pending and self.pending[0] in self.emitted:
+            self.pending.popleft()
+        seq = self.pending[0] if self.pending else None
+        if seq in self.waiting_groups and self.waiting_groups[seq][0] == st_number:
+            return seq
+        return None
+
+def transform_stream(segments, config, selected_segments=None, new_elements_list=None, is_bulk_processing=False, file_counter=None):
+    """Generator form of StreamingTransformer over any iterable of segments."""
+    transformer = StreamingTransformer(config, selected_segments, new_elements_list, is_bulk_processing, file_counter)
+    for line in segments:
+        yield from transformer.feed(line)
+    yield from transformer.finish()
+
+def process_file_streaming(file_path, config, sniff, is_bulk_processing=False, file_counter=None, exporter=None,
+                           interactive=True, namer=None, chunk_size=CHUNK_SIZE, split=False):
+    """process_file for large single-line files and split mode: every pass reads fixed-size blocks, so memory stays flat.
+
+    The input is read twice: one pass validates it, hashes it for the duplicate
+    index and collects the PO1 segments for the optional prompt, and one pass
+    transforms and writes it. The output is always written, since comparing
+    it with the input would mean holding both. With split=True every
+    transaction set goes to its own re-enveloped file (see TransactionSplitter)
+    and the list of paths is returned.
+    """
+    if sniff['transaction_set'] != '850':
+        raise ValueError(f"Error: Streaming only supports 850 files, not '{sniff['transaction_set']}'")
+    terminator = sniff['delimiters']['segment']
+
+    def segments_of(path, digest=None):
+        with open(path, 'r', encoding='utf-8') as file:
+            yield from iter_file_segments(file, terminator, chunk_size, digest)
+
+    segments = segments_of(file_path)
+    config = compile_config(config).for_partner(*read_partner_ids(segments))
+    segments.close()
+    if config.profile_name:
+        print(f"Using trading-partner profile: {config.profile_name}")
+    output_folder = config.get('output_folder_path')
+    os.makedirs(output_folder, exist_ok=True)
+
+    digest = hashlib.sha256() if config.get('skip_duplicates') else None
+    po1_outline = [] if is_bulk_processing and interactive else None
+    inspected = _inspect_segments(segments_of(file_path, digest), po1_outline)
+    if not check_and_quarantine(file_path, inspected, config):
+        return None
+    if digest is not None or po1_outline is not None:
+        # Finish the pass when validation is switched off
+        for _ in inspected:
+            pass
+
+    duplicate_key = None
+    if digest is not None:
+        duplicate_key = read_interchange_key(segments_of(file_path), digest.hexdigest())
+        if not claim_interchange(file_path, duplicate_key, config):
+            return None
+    try:
+        output_paths = _stream_file(file_path, config, sniff, segments_of, is_bulk_processing, file_counter,
+                                    exporter, namer, split, po1_outline)
+    except Exception:
+        if duplicate_key:
+            release_interchange(duplicate_key, config)
+        raise
+    if duplicate_key:
+        complete_interchange(duplicate_key, output_paths[0] if output_paths else None, config)
+    print(f"Processed & saved (streamed): {len(output_paths)} file(s) from {os.path.basename(file_path)} (config version {config.version})")
+    return output_paths if split else output_paths[0]
+
+def _inspect_segments(segments, po1_outline=None):
+    """Pass segments through, keeping the ST/PO1/SE segments in po1_outline when given.
+
+    That outline is enough to apply po1_filter and list the PO1 segments for the prompt.
+    """
+    for line in segments:
+        if po1_outline is not None and line.startswith(('ST*', 'PO1*', 'SE*')):
+            po1_outline.append(line)
+        yield line
+
+def _stream_file(file_path, config, sniff, segments_of, is_bulk_processing, file_counter, exporter, namer, split, po1_outline):
+    """Transform and write one validated file for process_file_streaming. Returns the output paths."""
+    terminator = sniff['delimiters']['segment']
+    output_folder = config.get('output_folder_path')
+
+    selected_segments = []
+    new_elements_list = []
+    if po1_outline is not None:
+        po1_only_segments = [line for line in apply_po1_filter(po1_outline, config) if line.startswith('PO1*')]
+        print(f"Found {len(po1_only_segments)} PO1 segments in the file.")
+        selected_segments = select_po1_segments(po1_only_segments)
+        if selected_segments:
+            new_elements_list = get_user_input_for_po1_elements(selected_segments)
+    elif is_bulk_processing:
+        print("Non-interactive run, keeping all PO1 segments.")
+    else:
+        print("Single file detected, skipping PO1 segment updates.")
+
+    if is_bulk_processing and config.po_number:
+        file_counter = allocate_po_suffix(config, file_path)
+
+    transformed = transform_stream(apply_po1_filter(segments_of(file_path), config), config, selected_segments, new_elements_list,
+                                   is_bulk_processing, file_counter if is_bulk_processing else None)
+    control_numbers = control_number_service(config)
+    if split:
+        namer = OutputNamer(config.get('split_name_template') or DEFAULT_SPLIT_NAME_TEMPLATE, namer.run_id if namer else None)
+        splitter = TransactionSplitter(output_folder, file_path, namer, terminator, '' if sniff['is_single_line'] else '\n', control_numbers)
+        try:
+            for line in transformed:
+                splitter.feed(line)
+        finally:
+            transformed.close()
+            output_paths = splitter.close()
+    else:
+        namer = namer or OutputNamer(config.get('output_name_template'))
+        if control_numbers:
+            transformed = renumber_envelopes(transformed, control_numbers)
+        output_paths = [_write_streamed(transformed, output_folder, file_path, namer, terminator)]
+
+    outbound_documents = [str(document) for document in config.get('outbound_documents') or []]
+    outbound_folder = config.get('outbound_folder_path') or os.path.join(output_folder, 'outbound')
+    for output_file_path in output_paths:
+        if exporter:
+            exporter.add_file(segments_of(output_file_path), file_path)
+        if outbound_documents:
+            write_outbound_documents(segments_of(output_file_path), file_path, outbound_folder, outbound_documents,
+                                     sniff['is_single_line'], terminator, control_numbers)
+        record_manifest(file_path, output_file_path, config)
+        record_po_index(config, segments_of(output_file_path), file_path, output_file_path)
+    return output_paths
+
+def _write_streamed(transformed, output_folder, file_path, namer, terminator):
+    part_path = os.path.join(output_folder, f".{os.path.basename(file_path)}.{os.getpid()}.part")
+    # ISA and the first BEG are kept for the {isa13}/{beg03} name fields
+    name_lines = []
+    try:
+        with open(part_path, 'w', encoding='utf-8') as output:
+            for line in transformed:
+                if line.startswith(('ISA*', 'BEG*')) and not any(name.startswith('BEG*') for name in name_lines):
+                    name_lines.append(line)
+                output.write(line + terminator)
+        output_file_path = namer.reserve(output_folder, file_path, name_lines)
+        os.replace(part_path, output_file_path)
+    finally:
+        transformed.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return output_file_path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Transform large EDI files in constant memory.")
+    parser.add_argument('files', nargs='+', help="Files to process")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Read block size in bytes")
+    parser.add_argument('--split', action='store_true', help="Write one re-enveloped output file per transaction set")
+    args = parser.parse_args()
+    try:
+        config = compile_config(load_config())
+        for file_path in args.files:
+            print(f"\nProcessing file: {os.path.basename(file_path)}")
+            sniff = sniff_input(file_path, config)
+            if sniff is not None:
+                process_file_streaming(file_path, config, sniff, interactive=False, chunk_size=args.chunk_size, split=args.split)
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,155 @@
+import os
+import json
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from final import (
+    load_config, compile_config, modify_edi_file, split_segments, read_partner_ids, read_input,
+    discover_configured_inputs, OutputNamer, sniff_input, transform_file, save_result,
+)
+from edi_json import detect_delimiters
+
+TEMPLATE_VERSION = 1
+
+def capture_template(selected_seq_nums, element_overrides, order=None):
+    """Build an edit template from the edits made to one file in an editor.
+
+    selected_seq_nums: PO1 sequence numbers (1-based) kept in the output.
+    element_overrides: {seq_num: {element_index: new_value}}; only changed values.
+    order: output order of the selected sequence numbers (defaults to file order).
+    """
+    selected = sorted(set(int(seq) for seq in selected_seq_nums))
+    order = [int(seq) for seq in order] if order else list(selected)
+    template = {
+        'version': TEMPLATE_VERSION,
+        'selected': selected,
+        'order': order,
+        'elements': {
+            str(seq): {str(idx): str(value) for idx, value in elements.items() if value is not None}
+            for seq, elements in element_overrides.items() if elements
+        },
+    }
+    validate_template(template)
+    return template
+
+def validate_template(template):
+    if template.get('version') != TEMPLATE_VERSION:
+        raise ValueError(f"Error: Unsupported template version '{template.get('version')}'")
+    selected = template.get('selected', [])
+    order = template.get('order', selected)
+    if sorted(order) != sorted(selected) or len(set(order)) != len(order):
+        raise ValueError("Error: Template 'order' must list each selected PO1 sequence exactly once")
+    for seq in list(selected) + list(template.get('elements', {})):
+        if int(seq) < 1:
+            raise ValueError(f"Error: Template PO1 sequence {seq} is invalid; sequences start at 1")
+    for seq, elements in template.get('elements', {}).items():
+        for idx in elements:
+            if int(idx) < 2:
+                raise ValueError(f"Error: Template overrides element {idx} of PO1 sequence {seq}; only elements 2 and above can be edited")
+
+def save_template(template, path):
+    validate_template(template)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(template, f, indent=2)
+    print(f"Saved edit template: {path}")
+
+def load_template(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    validate_template(template)
+    return template
+
+def template_to_engine_args(template, po1_segments):
+    """Translate a template into modify_edi_file's selected_segments/new_elements_list."""
+    po1_count = len(po1_segments)
+    order = template.get('order') or template.get('selected', [])
+    if not order:
+        order = range(1, po1_count + 1)
+    missing = [seq for seq in order if seq > po1_count]
+    if missing:
+        print(f"Warning: Template PO1 sequences {missing} not present in file ({po1_count} PO1 segments). Skipping them.")
+    selected_segments = [(seq, po1_segments[seq - 1]) for seq in order if 1 <= seq <= po1_count]
+    elements = template.get('elements', {})
+    new_elements_list = [
+        (seq, {int(idx): value for idx, value in elements[str(seq)].items()})
+        for seq, _ in selected_segments if str(seq) in elements
+    ]
+    return selected_segments, new_elements_list
+
+def apply_template(content, template, config, is_bulk_processing=False, file_counter=None):
+    """Apply a template to one interchange's content with its partner profile. Returns the new content."""
+    terminator = detect_delimiters(content)['segment']
+    lines, _ = split_segments(content, terminator)
+    config = compile_config(config).for_partner(*read_partner_ids(lines))
+    po1_segments = [line for line in lines if line.startswith('PO1*')]
+    selected_segments, new_elements_list = template_to_engine_args(template, po1_segments)
+    return modify_edi_file(
+        content,
+        config,
+        selected_segments=selected_segments,
+        new_elements_list=new_elements_list,
+        is_bulk_processing=is_bulk_processing,
+        file_counter=file_counter,
+        terminator=terminator
+    )
+
+def _transform_with_template(file_path, template, config, is_bulk_processing, file_counter):
+    sniff = sniff_input(file_path, config)
+    if sniff is None:
+        return None
+    return transform_file(file_path, read_input(file_path), config, sniff, is_bulk_processing, file_counter,
+                          interactive=False, po1_edits=partial(template_to_engine_args, template))
+
+def apply_template_to_files(template, file_paths, config, workers=None):
+    """Replay a template over many files. Returns {file_path: output_path, None or error}.
+
+    Files go through the same sniff, prevalidation, profile, duplicate and
+    transaction-set routing as a normal run (transform_file in a worker pool),
+    with the template in place of the interactive PO1 selection; outputs are
+    saved here with save_result. None means the file was skipped, quarantined
+    or left unchanged.
+    """
+    config = compile_config(config)
+    output_folder = config.get('output_folder_path')
+    if not output_folder:
+        raise ValueError("Output folder path is missing in the configuration!")
+    os.makedirs(output_folder, exist_ok=True)
+
+    is_bulk_processing = len(file_paths) > 1
+    namer = OutputNamer(config.get('output_name_template'))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_transform_with_template, file_path, template, config, is_bulk_processing,
+                            seq if is_bulk_processing else None): file_path
+            for seq, file_path in enumerate(file_paths, 1)
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                result = future.result()
+                results[file_path] = save_result(file_path, result, namer=namer) if result else None
+            except Exception as e:
+                results[file_path] = e
+                print(f"Error processing file {file_path}: {str(e)}")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply a saved PO1 edit template to EDI files.")
+    parser.add_argument('template', help="Template JSON saved from the editor")
+    parser.add_argument('files', nargs='*', help="Files to process (default: all files in input_folder_path)")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+    try:
+        config = load_config()
+        template = load_template(args.template)
+        files = args.files
+        if not files:
+            files = [file_path for file_path, _ in discover_configured_inputs(config)]
+        if not files:
+            print("No files found in the input folder!")
+        else:
+            apply_template_to_files(template, files, config, workers=args.workers)
+    except Exception as e:
+        print(f"Error: {str(e)}")
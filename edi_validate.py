@@ -0,0 +1,289 @@
+import os
+import re
+import shutil
+from datetime import datetime
+
+ISA_SEGMENT_LENGTH = 105  # 106 with the segment terminator
+ISA_ELEMENT_COUNT = 16
+
+UNIT_OF_MEASURE_CODES = [
+    'BA', 'BD', 'BE', 'BG', 'BO', 'BR', 'BX', 'CA', 'CN', 'CQ', 'CS', 'CT', 'CU', 'CY', 'DR', 'DZ',
+    'EA', 'FT', 'GA', 'GR', 'GS', 'HU', 'IN', 'JR', 'KG', 'KT', 'LB', 'LF', 'LT', 'ML', 'MR', 'OZ',
+    'PA', 'PC', 'PH', 'PK', 'PL', 'PR', 'PT', 'QT', 'RL', 'RM', 'SF', 'SH', 'SJ', 'SO', 'ST', 'SY',
+    'TB', 'TK', 'TN', 'TY', 'UN', 'YD',
+]
+PRODUCT_ID_QUALIFIERS = [
+    'BO', 'BP', 'CB', 'CG', 'EN', 'EO', 'IB', 'IN', 'IT', 'MF', 'MG', 'N4', 'ND', 'PD', 'PI', 'PN',
+    'SK', 'SN', 'UA', 'UI', 'UK', 'UN', 'UP', 'VA', 'VC', 'VN', 'VP',
+]
+
+# Element definitions per segment: (position, name, mandatory, min length, max length, X12 type, code list)
+PO1_DEFINITION = [
+    (1, 'Assigned Identification', False, 1, 20, 'AN', None),
+    (2, 'Quantity', False, 1, 15, 'R', None),
+    (3, 'Unit of Measure Code', False, 2, 2, 'ID', UNIT_OF_MEASURE_CODES),
+    (4, 'Unit Price', False, 1, 17, 'R', None),
+    (5, 'Basis of Unit Price Code', False, 2, 2, 'ID', None),
+] + [
+    element
+    for n, position in enumerate(range(6, 26, 2), 1)
+    for element in (
+        (position, f'Product ID Qualifier {n}', False, 2, 2, 'ID', PRODUCT_ID_QUALIFIERS),
+        (position + 1, f'Product ID {n}', False, 1, 48, 'AN', None),
+    )
+]
+COMMON_DEFINITIONS = {
+    'DTM': [
+        (1, 'Date/Time Qualifier', True, 3, 3, 'ID', None),
+        (2, 'Date', False, 8, 8, 'DT', None),
+    ],
+    'G62': [
+        (1, 'Date Qualifier', False, 2, 2, 'ID', None),
+        (2, 'Date', False, 8, 8, 'DT', None),
+    ],
+    'N1': [
+        (1, 'Entity Identifier Code', True, 2, 3, 'ID', None),
+        (2, 'Name', False, 1, 60, 'AN', None),
+        (3, 'Identification Code Qualifier', False, 1, 2, 'ID', None),
+        (4, 'Identification Code', False, 2, 80, 'AN', None),
+    ],
+}
+SEGMENT_DEFINITIONS = {
+    '850': dict(COMMON_DEFINITIONS, **{
+        'BEG': [
+            (1, 'Transaction Set Purpose Code', True, 2, 2, 'ID', None),
+            (2, 'Purchase Order Type Code', True, 2, 2, 'ID', None),
+            (3, 'Purchase Order Number', True, 1, 22, 'AN', None),
+            (4, 'Release Number', False, 1, 30, 'AN', None),
+            (5, 'Date', True, 8, 8, 'DT', None),
+        ],
+        'PO1': PO1_DEFINITION,
+        'CTP': [
+            (2, 'Price Identifier Code', False, 3, 3, 'ID', None),
+            (3, 'Unit Price', False, 1, 17, 'R', None),
+        ],
+        'PID': [
+            (1, 'Item Description Type', True, 1, 1, 'ID', ['F', 'S', 'X']),
+            (5, 'Description', False, 1, 80, 'AN', None),
+        ],
+        'PO4': [
+            (1, 'Pack', False, 1, 6, 'N0', None),
+            (2, 'Size', False, 1, 8, 'R', None),
+            (3, 'Unit of Measure Code', False, 2, 2, 'ID', UNIT_OF_MEASURE_CODES),
+        ],
+        'AMT': [
+            (1, 'Amount Qualifier Code', True, 1, 3, 'ID', None),
+            (2, 'Monetary Amount', True, 1, 18, 'R', None),
+        ],
+        'CTT': [
+            (1, 'Number of Line Items', True, 1, 6, 'N0', None),
+            (2, 'Hash Total', False, 1, 10, 'R', None),
+        ],
+    }),
+    '875': dict(COMMON_DEFINITIONS, **{
+        'G50': [
+            (1, 'Purchase Order Type Code', True, 1, 1, 'ID', None),
+            (2, 'Purchase Order Date', True, 8, 8, 'DT', None),
+            (3, 'Purchase Order Number', True, 1, 22, 'AN', None),
+        ],
+        'G68': [
+            (1, 'Quantity Ordered', True, 1, 9, 'R', None),
+            (2, 'Unit of Measure Code', True, 2, 2, 'ID', UNIT_OF_MEASURE_CODES),
+            (3, 'Item List Cost', False, 1, 17, 'R', None),
+            (4, 'Product ID Qualifier', False, 2, 2, 'ID', PRODUCT_ID_QUALIFIERS),
+            (5, 'Product ID', False, 1, 48, 'AN', None),
+        ],
+        'G69': [
+            (1, 'Free-form Description', True, 1, 45, 'AN', None),
+        ],
+        'PO1': PO1_DEFINITION,
+    }),
+}
+
+_NUMERIC_RE = re.compile(r'^-?\d+$')
+_DECIMAL_RE = re.compile(r'^-?(\d+\.?\d*|\.\d+)$')
+
+def _valid_date(value):
+    if not value.isdigit():
+        return False
+    month, day = int(value[4:6]), int(value[6:8])
+    return 1 <= month <= 12 and 1 <= day <= 31
+
+TYPE_CHECKS = {
+    'AN': None,
+    'ID': None,
+    'N0': _NUMERIC_RE.match,
+    'R': _DECIMAL_RE.match,
+    'DT': _valid_date,
+}
+
+def compile_segment_definitions(definitions):
+    """Flatten definitions into {(transaction set, segment ID): rules}, with code lists as frozensets."""
+    compiled = {}
+    for transaction_set, segments in definitions.items():
+        for tag, elements in segments.items():
+            compiled[(transaction_set, tag)] = tuple(
+                (position, f"{tag}{position:02d}", name, mandatory, min_length, max_length,
+                 TYPE_CHECKS[data_type], frozenset(codes) if codes else None)
+                for position, name, mandatory, min_length, max_length, data_type, codes in elements
+            )
+    return compiled
+
+COMPILED_SEGMENT_DEFINITIONS = compile_segment_definitions(SEGMENT_DEFINITIONS)
+
+def check_segment_elements(rules, parts, number, errors):
+    """Append element-level errors for one split segment."""
+    for position, ref, name, mandatory, min_length, max_length, type_check, codes in rules:
+        value = parts[position] if position < len(parts) else ''
+        if not value:
+            if mandatory:
+                errors.append(f"Segment {number}: {ref} {name} is mandatory but empty")
+            continue
+        if not (min_length <= len(value) <= max_length):
+            errors.append(f"Segment {number}: {ref} {name} '{value}' length {len(value)} outside {min_length}-{max_length}")
+        elif codes is not None and value not in codes:
+            errors.append(f"Segment {number}: {ref} {name} '{value}' is not a valid code")
+        elif type_check is not None and not type_check(value):
+            errors.append(f"Segment {number}: {ref} {name} '{value}' has the wrong format")
+
+def validate_structure(lines):
+    """Envelope checks over split segments. Returns a list of error messages (empty when valid)."""
+    return validate_file(lines, check_elements=False)[0]
+
+def validate_file(lines, check_elements=True):
+    """Validate split segments in one pass. Returns (structure_errors, element_errors).
+
+    Structure checks cover the fixed ISA length, ISA/IEA, GS/GE and ST/SE
+    pairing, matching control numbers, and the IEA01/GE01/SE01/CTT01 counts.
+    Element checks apply the 850/875 segment definitions.
+    """
+    errors = []
+    element_errors = []
+    schema = COMPILED_SEGMENT_DEFINITIONS if check_elements else {}
+    transaction_set = None
+    isa = gs = st = None
+    group_count = transaction_count = segment_count = po1_count = 0
+    ctt_value = None
+    number = 0
+
+    # lines may be any iterable of segments, including a streaming reader
+    for number, line in enumerate(lines, 1):
+        if number == 1 and not line.startswith('ISA*'):
+            errors.append("File does not start with an ISA segment")
+        tag = line.split('*', 1)[0]
+        if st is not None:
+            segment_count += 1
+
+        if tag == 'ISA':
+            parts = line.split('*')
+            if len(line) != ISA_SEGMENT_LENGTH:
+                errors.append(f"Segment {number}: ISA is {len(line) + 1} characters, expected {ISA_SEGMENT_LENGTH + 1}")
+            if len(parts) != ISA_ELEMENT_COUNT + 1:
+                errors.append(f"Segment {number}: ISA has {len(parts) - 1} elements, expected {ISA_ELEMENT_COUNT}")
+            if isa is not None:
+                errors.append(f"Segment {number}: ISA {isa[13] if len(isa) > 13 else ''} has no IEA before the next ISA")
+            isa, group_count = parts, 0
+        elif tag == 'IEA':
+            parts = line.split('*')
+            if isa is None:
+                errors.append(f"Segment {number}: IEA without a matching ISA")
+                continue
+            if gs is not None:
+                errors.append(f"Segment {number}: GS {gs[6] if len(gs) > 6 else ''} not closed by GE before IEA")
+                gs = None
+            if len(parts) < 3 or len(isa) < 14 or parts[2] != isa[13]:
+                errors.append(f"Segment {number}: IEA02 control number does not match ISA13")
+            if len(parts) < 2 or parts[1] != str(group_count):
+                errors.append(f"Segment {number}: IEA01 is {parts[1] if len(parts) > 1 else '(missing)'}, but the interchange has {group_count} group(s)")
+            isa = None
+        elif tag == 'GS':
+            if isa is None:
+                errors.append(f"Segment {number}: GS outside an ISA/IEA envelope")
+            if gs is not None:
+                errors.append(f"Segment {number}: GS {gs[6] if len(gs) > 6 else ''} has no GE before the next GS")
+            gs, transaction_count = line.split('*'), 0
+            group_count += 1
+        elif tag == 'GE':
+            parts = line.split('*')
+            if gs is None:
+                errors.append(f"Segment {number}: GE without a matching GS")
+                continue
+            if st is not None:
+                errors.append(f"Segment {number}: ST {st[2] if len(st) > 2 else ''} not closed by SE before GE")
+                st = None
+            if len(parts) < 3 or len(gs) < 7 or parts[2] != gs[6]:
+                errors.append(f"Segment {number}: GE02 control number does not match GS06")
+            if len(parts) < 2 or parts[1] != str(transaction_count):
+                errors.append(f"Segment {number}: GE01 is {parts[1] if len(parts) > 1 else '(missing)'}, but the group has {transaction_count} transaction set(s)")
+            gs = None
+        elif tag == 'ST':
+            if gs is None:
+                errors.append(f"Segment {number}: ST outside a GS/GE group")
+            if st is not None:
+                errors.append(f"Segment {number}: ST {st[2] if len(st) > 2 else ''} has no SE before the next ST")
+            st = line.split('*')
+            transaction_set = st[1] if len(st) > 1 else None
+            transaction_count += 1
+            segment_count, po1_count, ctt_value = 1, 0, None
+        elif tag == 'SE':
+            parts = line.split('*')
+            if st is None:
+                errors.append(f"Segment {number}: SE without a matching ST")
+                continue
+            if len(parts) < 3 or len(st) < 3 or parts[2] != st[2]:
+                errors.append(f"Segment {number}: SE02 control number does not match ST02")
+            if len(parts) < 2 or parts[1] != str(segment_count):
+                errors.append(f"Segment {number}: SE01 is {parts[1] if len(parts) > 1 else '(missing)'}, but the transaction set has {segment_count} segments")
+            if len(st) > 1 and st[1] == '850':
+                if ctt_value is None:
+                    errors.append(f"Segment {number}: 850 transaction set {st[2] if len(st) > 2 else ''} has no CTT segment")
+                elif ctt_value != str(po1_count):
+                    errors.append(f"Segment {number}: CTT01 is {ctt_value}, but the transaction set has {po1_count} PO1 segment(s)")
+            st = None
+        elif st is None:
+            errors.append(f"Segment {number}: {tag} outside an ST/SE transaction set")
+        else:
+            rules = schema.get((transaction_set, tag))
+            if tag == 'PO1':
+                po1_count += 1
+            elif tag == 'CTT':
+                parts = line.split('*')
+                ctt_value = parts[1] if len(parts) > 1 else ''
+            if rules:
+                check_segment_elements(rules, line.split('*'), number, element_errors)
+
+    if number == 0:
+        errors.append("File does not start with an ISA segment")
+    if st is not None:
+        errors.append(f"ST {st[2] if len(st) > 2 else ''} is missing its SE segment")
+    if gs is not None:
+        errors.append(f"GS {gs[6] if len(gs) > 6 else ''} is missing its GE segment")
+    if isa is not None:
+        errors.append(f"ISA {isa[13] if len(isa) > 13 else ''} is missing its IEA segment")
+    return errors, element_errors
+
+def write_validation_report(file_path, errors, report_folder):
+    """Write the per-file element validation report. Returns the report path."""
+    os.makedirs(report_folder, exist_ok=True)
+    report_path = os.path.join(report_folder, f"{os.path.basename(file_path)}.validation.txt")
+    with open(report_path, 'w', encoding='utf-8') as report:
+        report.write(f"Source: {file_path}\n")
+        report.write(f"Checked: {datetime.now().isoformat(timespec='seconds')}\n")
+        report.writelines(f"{error}\n" for error in errors)
+    return report_path
+
+def quarantine_file(file_path, errors, quarantine_folder):
+    """Move a rejected file into the quarantine folder next to a report of why it was rejected.
+
+    Moving it out of the input folder keeps later runs from picking it up again.
+    """
+    os.makedirs(quarantine_folder, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base_filename = os.path.basename(file_path)
+    quarantined_path = os.path.join(quarantine_folder, f"{timestamp}_{base_filename}")
+    shutil.move(file_path, quarantined_path)
+    with open(quarantined_path + '.errors.txt', 'w', encoding='utf-8') as report:
+        report.write(f"Source: {file_path}\n")
+        report.writelines(f"{error}\n" for error in errors)
+    print(f"Quarantined {base_filename} ({len(errors)} error(s)): {quarantined_path}")
+    return quarantined_path
@@ -235,7 +235,7 @@ def modify_edi_file(content, config, is_bulk_processing=False, file_counter=None
         new_elements_list = get_user_input_for_po1_elements(selected_po1_segments)
 
     # Filter and process segments
-    selected_seq_nums = [seq_num for seq_num, _ in selected_po1_segments]
+    selected_seq_nums = {seq_num for seq_num, _ in selected_po1_segments}
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
@@ -1,8 +1,26 @@
 import os
 import json
-import glob
+import fnmatch
 from datetime import datetime, timedelta
 import re
+import string
+import time
+import hashlib
+import argparse
+from functools import lru_cache
+from collections import deque
+from types import MappingProxyType
+
+from po1_select import SELECTION_HELP, compile_selection, selected_sequence_numbers
+from edi_export import PO1Exporter
+from edi_validate import validate_file, quarantine_file, write_validation_report
+from edi_sniff import SNIFF_SIZE, sniff_content, sniff_file, describe_transaction_set
+from edi_json import PO1_RELATED_SEGMENTS
+from edi_outbound import OUTBOUND_DOCUMENTS, write_outbound_documents
+from po_allocator import PO_REGISTRY_FILENAME, POAllocator
+from control_numbers import CONTROL_NUMBER_STATE_FILENAME, MAX_CONTROL_NUMBER, ControlNumberService, renumber_envelopes
+from duplicate_index import DUPLICATE_INDEX_FILENAME, DuplicateIndex, content_digest, file_digest
+from po_index import PO_INDEX_FILENAME, POIndex
 
 def find_config_file(filename="conf.json"):
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,27 +30,162 @@ def find_config_file(filename="conf.json"):
     else:
         raise FileNotFoundError(f"Configuration file '{filename}' not found in {script_dir}")
 
-def load_config():
-    config_path = find_config_file()
+def load_config(config_path=None):
+    config_path = config_path or find_config_file()
     print(f"Loading configuration from {config_path}")
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    return read_config(config_path)
+
+def read_config(config_path, revision=1):
+    """Load, validate and compile a config file; the version combines a revision counter and a content hash."""
+    with open(config_path, 'rb') as f:
+        raw = f.read()
+    config = json.loads(raw.decode('utf-8'))
     validate_config(config)
-    
-    days_config = config.get("Number_of_days_Increment_and_Decrement")
-    if days_config is not None and str(days_config).strip() != "":
-        getting = str(days_config)
-        if not (getting.startswith('+') or getting.startswith('-')):
-            getting = '+' + getting
-        sign = getting[0]
-        number = int(getting[1:])
-        print(f"Sign: {sign}")
-        print(f"Number: {number}")
-        config['days_sign'] = sign
-        config['days_number'] = number
+    version = f"{revision}-{hashlib.sha1(raw).hexdigest()[:8]}"
+    config = compile_config(config, version)
+    if config.day_offset is not None:
+        print(f"Sign: {config.days_sign}")
+        print(f"Number: {config.days_number}")
     return config
 
+class ConfigWatcher:
+    """Reloads conf.json when its modification time changes.
+
+    A reload that fails validation is reported and the previous config stays
+    in use. Callers fetch current() between files, so a file in progress always
+    finishes with the config it started with.
+    """
+
+    def __init__(self, config_path=None):
+        self.config_path = config_path or find_config_file()
+        self.revision = 1
+        self._mtime = os.stat(self.config_path).st_mtime_ns
+        self.config = read_config(self.config_path, self.revision)
+
+    def current(self):
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError as e:
+            print(f"Warning: Cannot read {self.config_path} ({e}); keeping config version {self.config.version}")
+            return self.config
+        if mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                config = read_config(self.config_path, self.revision + 1)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Config reload failed, keeping version {self.config.version}: {str(e)}")
+            else:
+                self.revision += 1
+                self.config = config
+                print(f"Configuration reloaded (version {config.version})")
+        return self.config
+
+def parse_days_offset(days_config):
+    """Return (sign, number) from Number_of_days_Increment_and_Decrement, or None when blank."""
+    if days_config is None or str(days_config).strip() == "":
+        return None
+    getting = str(days_config)
+    if not (getting.startswith('+') or getting.startswith('-')):
+        getting = '+' + getting
+    return getting[0], int(getting[1:])
+
+PO1_FILTER_MODES = ('first', 'last', 'every')
+
+def parse_po1_filter(filter_config):
+    """Return (mode, count) from po1_filter such as "first:2", "last:5" or "every:10", or None when blank."""
+    if filter_config is None or str(filter_config).strip() == "":
+        return None
+    mode, _, count = str(filter_config).strip().partition(':')
+    mode = mode.strip().lower()
+    if mode not in PO1_FILTER_MODES or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f"Error: 'po1_filter' must look like first:N, last:N or every:N with N of at least 1. Found: '{filter_config}'")
+    return mode, int(count)
+
+class CompiledConfig:
+    """Read-only configuration with the per-segment derived values computed once.
+
+    Raw conf.json keys stay available through get()/[] for folder paths and
+    other settings; the transform reads the attributes below instead.
+    """
+    __slots__ = ('_raw', 'raw', 'version', 'profile_name', 'profiles', 'isa_sender_id', 'isa_receiver_id', 'gs_sender_id', 'gs_receiver_id',
+                 'po_number', 'first_po1_quantity', 'second_po1_quantity',
+                 'days_sign', 'days_number', 'day_offset', 'po1_filter')
+
+    def __init__(self, config, version=None, profile_name=None):
+        def text(key):
+            value = config.get(key)
+            return str(value).strip() if value is not None else ''
+
+        def set_value(name, value):
+            object.__setattr__(self, name, value)
+
+        raw = dict(config)
+        set_value('_raw', raw)
+        set_value('raw', MappingProxyType(raw))
+        set_value('version', version)
+        set_value('profile_name', profile_name)
+        # Trading-partner profiles, compiled once and keyed for a single hash lookup per file
+        set_value('profiles', {
+            profile_lookup_key(name, match): CompiledConfig(merged, f"{version}/{name}", name)
+            for name, match, merged in profile_configs(config)
+        })
+        # ISA IDs are stored padded; empty means "keep the partner's value"
+        set_value('isa_sender_id', pad_isa_field(text('ISA_Sender_ID')) if text('ISA_Sender_ID') else None)
+        set_value('isa_receiver_id', pad_isa_field(text('ISA_Receiver_ID')) if text('ISA_Receiver_ID') else None)
+        set_value('gs_sender_id', text('GS_Sender_ID') or None)
+        set_value('gs_receiver_id', text('GS_Receiver_ID') or None)
+        set_value('po_number', text('po_number'))
+        set_value('first_po1_quantity', text('First_PO1_Quantity') or None)
+        set_value('second_po1_quantity', text('Second_PO1_Quantity') or None)
+        set_value('po1_filter', parse_po1_filter(config.get('po1_filter')))
+
+        days = parse_days_offset(config.get("Number_of_days_Increment_and_Decrement"))
+        if days:
+            sign, number = days
+            set_value('days_sign', sign)
+            set_value('days_number', number)
+            set_value('day_offset', number if sign == '+' else -number)
+        else:
+            set_value('days_sign', None)
+            set_value('days_number', None)
+            set_value('day_offset', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledConfig is read-only")
+
+    def __reduce__(self):
+        return (CompiledConfig, (self._raw, self.version, self.profile_name))
+
+    def for_partner(self, isa06, isa08, gs02, gs03):
+        """Return the profile config matching the inbound IDs, or this config when none matches."""
+        if not self.profiles:
+            return self
+        for key in (('ISA', isa06, isa08), ('ISA', isa06, None), ('GS', gs02, gs03), ('GS', gs02, None)):
+            profile = self.profiles.get(key)
+            if profile is not None:
+                return profile
+        return self
+
+    def get(self, key, default=None):
+        return self._raw.get(key, default)
+
+    def __getitem__(self, key):
+        return self._raw[key]
+
+    def __contains__(self, key):
+        return key in self._raw
+
+def compile_config(config, version=None):
+    # When final.py runs as a script, the edi_* modules import a second copy of
+    # this module; its CompiledConfig is a different class but works the same
+    if isinstance(config, CompiledConfig) or hasattr(config, '_raw'):
+        return config
+    return CompiledConfig(config, version)
+
 def validate_config(config):
+    if not isinstance(config, dict):
+        raise ValueError("Error: The configuration must be a JSON object!")
+
     def check_length(field, value, max_length):
         if value and len(str(value)) > max_length:
             raise ValueError(f"Error: '{field}' exceeds max length of {max_length} characters! Found: '{value}'")
@@ -46,6 +199,10 @@ def validate_config(config):
             except ValueError:
                 raise ValueError(f"Error: '{field}' contains an invalid date. Expected format: YYYYMMDD, Found: '{value}'")
 
+    def check_whole_number(field, value, hint, minimum=0):
+        if value not in (None, '') and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+            raise ValueError(f"Error: '{field}' must be a whole number ({hint}). Found: '{value}'")
+
     def validate_po1_quantity(field, value):
         if value:
             try:
@@ -65,6 +222,8 @@ def validate_config(config):
     ]
 
     for field in fields_to_check:
+        if field not in config:
+            raise ValueError(f"Error: '{field}' is missing from the configuration!")
         value = config[field]
         if value == '0' or value == 0 or value == '00' or value == '000':
             raise ValueError(f"Error: '{field}' cannot be 0, 00, or 000!")
@@ -78,22 +237,101 @@ def validate_config(config):
     check_length("GS_Receiver_ID", config.get("GS_Receiver_ID"), 15)
     check_date_format("dtm_date", config.get("dtm_date"))
     check_length("po_number", config.get("po_number"), 22)
+    parse_po1_filter(config.get("po1_filter"))
+
+    outbound_documents = config.get("outbound_documents") or []
+    if not isinstance(outbound_documents, list):
+        raise ValueError("Error: 'outbound_documents' must be a list such as [\"855\", \"856\", \"810\"]")
+    for document in outbound_documents:
+        if str(document) not in OUTBOUND_DOCUMENTS:
+            raise ValueError(f"Error: 'outbound_documents' contains unsupported document '{document}'. Choose from {', '.join(OUTBOUND_DOCUMENTS)}")
+
+    profile_keys = {}
+    for name, match, merged in profile_configs(config):
+        key = profile_lookup_key(name, match)
+        if key in profile_keys:
+            raise ValueError(f"Error: Profiles '{profile_keys[key]}' and '{name}' match the same partner IDs {key[1:]}")
+        profile_keys[key] = name
+        print(f"Validating trading-partner profile '{name}'...")
+        validate_config(merged)
+
+    OutputNamer(config.get("output_name_template"))
+
+    check_whole_number("stream_threshold_bytes", config.get("stream_threshold_bytes"), "0 turns streaming off")
+    check_whole_number("max_inflight_bytes", config.get("max_inflight_bytes"), "0 for no limit")
+    check_whole_number("merge_max_transactions", config.get("merge_max_transactions"), "at least 1", minimum=1)
+    check_whole_number("merge_max_bytes", config.get("merge_max_bytes"), "0 for no limit")
+    check_whole_number("control_number_start", config.get("control_number_start"), "1 to 999999999", minimum=1)
+    if config.get("control_number_start") not in (None, '') and config.get("control_number_start") > MAX_CONTROL_NUMBER:
+        raise ValueError(f"Error: 'control_number_start' must be a whole number (1 to 999999999). Found: '{config.get('control_number_start')}'")
+
+    input_patterns = config.get("input_patterns")
+    if input_patterns is not None and (not isinstance(input_patterns, list) or not all(isinstance(pattern, str) and pattern for pattern in input_patterns)):
+        raise ValueError("Error: 'input_patterns' must be a list of file name patterns such as [\"*.edi\", \"*.txt\"]")
+    if config.get("input_sort") and config.get("input_sort") not in INPUT_SORT_KEYS:
+        raise ValueError(f"Error: 'input_sort' must be one of {', '.join(INPUT_SORT_KEYS)}. Found: '{config.get('input_sort')}'")
+    if config.get("schema_validation") and config.get("schema_validation") not in SCHEMA_VALIDATION_MODES:
+        raise ValueError(f"Error: 'schema_validation' must be one of {', '.join(SCHEMA_VALIDATION_MODES)}. Found: '{config.get('schema_validation')}'")
+    if config.get("unsupported_transaction_sets") and config.get("unsupported_transaction_sets") not in UNSUPPORTED_TRANSACTION_SET_ACTIONS:
+        raise ValueError(f"Error: 'unsupported_transaction_sets' must be one of {', '.join(UNSUPPORTED_TRANSACTION_SET_ACTIONS)}. Found: '{config.get('unsupported_transaction_sets')}'")
 
     print("Configuration validation passed!")
 
+def profile_configs(config):
+    """Yield (name, match, merged_config) for each entry of the 'profiles' section."""
+    profiles = config.get('profiles') or {}
+    if not isinstance(profiles, dict):
+        raise ValueError("Error: 'profiles' must be an object keyed by profile name")
+    base = {key: value for key, value in config.items() if key != 'profiles'}
+    for name, profile in profiles.items():
+        if not isinstance(profile, dict) or not isinstance(profile.get('match'), dict):
+            raise ValueError(f"Error: Profile '{name}' needs a 'match' object with ISA06/ISA08 or GS02/GS03")
+        merged = dict(base)
+        merged.update({key: value for key, value in profile.items() if key != 'match'})
+        yield name, profile['match'], merged
+
+def profile_lookup_key(name, match):
+    """Hash key for a profile: ('ISA', ISA06, ISA08) or ('GS', GS02, GS03); the receiver may be None."""
+    for kind, sender_key, receiver_key in (('ISA', 'ISA06', 'ISA08'), ('GS', 'GS02', 'GS03')):
+        sender = str(match.get(sender_key) or '').strip()
+        receiver = str(match.get(receiver_key) or '').strip() or None
+        if sender:
+            return (kind, sender, receiver)
+    raise ValueError(f"Error: Profile '{name}' must match on ISA06 (optionally ISA08) or GS02 (optionally GS03)")
+
+def read_partner_ids(lines):
+    """Return (ISA06, ISA08, GS02, GS03) from the envelope headers, stripped; missing values are ''."""
+    isa06 = isa08 = gs02 = gs03 = ''
+    for line in lines:
+        if line.startswith('ISA*'):
+            parts = line.split('*')
+            if len(parts) > 8:
+                isa06, isa08 = parts[6].strip(), parts[8].strip()
+        elif line.startswith('GS*'):
+            parts = line.split('*')
+            if len(parts) > 3:
+                gs02, gs03 = parts[2].strip(), parts[3].strip()
+        elif line.startswith('ST*'):
+            break
+    return isa06, isa08, gs02, gs03
+
 def pad_isa_field(value):
     return str(value).ljust(15)[:15]
 
+@lru_cache(maxsize=4096)
+def shift_date(date_str, day_offset):
+    """Shift a YYYYMMDD date; raises ValueError for impossible dates."""
+    original_date = datetime.strptime(date_str, '%Y%m%d')
+    return (original_date + timedelta(days=day_offset)).strftime('%Y%m%d')
+
 def adjust_date(date_str, config, segment_type):
     date_str = date_str.strip().rstrip('~')
-    if 'days_sign' in config and 'days_number' in config:
-        if date_str and re.match(r'^\d{8}$', date_str):
+    config = compile_config(config)
+    if config.day_offset is not None:
+        if date_str and len(date_str) == 8 and date_str.isdigit():
             try:
-                adjustment = config['days_number'] if config['days_sign'] == '+' else -config['days_number']
-                original_date = datetime.strptime(date_str, '%Y%m%d')
-                adjusted_date = original_date + timedelta(days=adjustment)
-                new_date = adjusted_date.strftime('%Y%m%d')
-                print(f"Updating {segment_type} Date: {date_str} → {new_date} (Adjusted by {config['days_sign']}{config['days_number']} days)")
+                new_date = shift_date(date_str, config.day_offset)
+                print(f"Updating {segment_type} Date: {date_str} → {new_date} (Adjusted by {config.days_sign}{config.days_number} days)")
                 return new_date
             except ValueError:
                 print(f"Warning: Invalid {segment_type} date '{date_str}' skipped")
@@ -112,28 +350,29 @@ def select_po1_segments(po1_segments):
     for i, segment in enumerate(po1_segments, 1):
         print(f"[ ] PO_sequence {i}: {segment}")
 
-    print("\nSelect PO1 segments by entering sequence numbers (e.g., '1,3,5'). Press Enter to select none:")
+    print("\nSelect PO1 segments by entering sequence numbers (e.g., '1,3,5', '1-500', '1-500,!17,qty>0'). Press Enter to select none:")
     while True:
         user_input = input("Sequence numbers: ").strip()
         if user_input == "":
             print("No segments selected for updating.")
             return []
 
+        if user_input in ('?', 'help'):
+            print(SELECTION_HELP)
+            continue
+
         try:
-            selected_indices = [int(x.strip()) for x in user_input.split(',')]
-            if not all(1 <= x <= len(po1_segments) for x in selected_indices):
-                print(f"Invalid sequence numbers. Enter numbers between 1 and {len(po1_segments)}.")
-                continue
-            if len(set(selected_indices)) != len(selected_indices):
-                print("Duplicate sequence numbers detected. Enter unique numbers.")
+            selected_indices = selected_sequence_numbers(compile_selection(user_input, po1_segments))
+            if not selected_indices:
+                print("No PO1 segments match the selection. Try again or press Enter to select none.")
                 continue
             selected_segments = [(i, po1_segments[i-1]) for i in selected_indices]
             print("\nSelected PO1 segments:")
             for seq_num, segment in selected_segments:
                 print(f"[✓] PO_sequence {seq_num}: {segment}")
             return selected_segments
-        except ValueError:
-            print("Invalid input. Enter comma-separated numbers (e.g., '1,3,5').")
+        except ValueError as e:
+            print(f"Invalid input: {e} Enter '?' for the selection syntax.")
 
 def get_user_input_for_po1_elements(selected_po1_segments):
     """Prompt user to edit specific elements in selected PO1 segments."""
@@ -186,29 +425,165 @@ def get_user_input_for_po1_elements(selected_po1_segments):
 
     return new_elements_list
 
-def modify_edi_file(content, config, selected_segments=None, new_elements_list=None, is_bulk_processing=False, file_counter=None):
-    selected_segments = selected_segments or []
-    new_elements_list = new_elements_list or []
-    
-    is_single_line = '\n' not in content and '*' in content
+def split_segments(content, terminator='~', is_single_line=None):
+    """Split EDI content into segments without terminators. Returns (lines, is_single_line)."""
+    if is_single_line is None:
+        is_single_line = '\n' not in content and '*' in content
+    if is_single_line:
+        lines = [line.strip().rstrip(terminator) for line in content.split(terminator) if line.strip()]
+    else:
+        lines = [line.strip().rstrip(terminator) for line in content.strip().split('\n') if line.strip()]
+    return lines, is_single_line
+
+def join_segments(lines, is_single_line, terminator='~'):
+    if is_single_line:
+        return terminator.join(lines) + terminator
+    else:
+        return '\n'.join(line + terminator for line in lines)
+
+def modify_edi_file(content, config, selected_segments=None, new_elements_list=None, is_bulk_processing=False, file_counter=None, terminator='~'):
+    lines, is_single_line = split_segments(content, terminator)
     if is_single_line:
         print("Detected single-line EDI file. Splitting into segments...")
-        lines = [line.strip().rstrip('~') for line in content.split('~') if line.strip()]
+    filtered_lines = transform_segments(lines, config, selected_segments, new_elements_list, is_bulk_processing, file_counter)
+    return join_segments(filtered_lines, is_single_line, terminator)
+
+def rewrite_segment(line, config, is_bulk_processing=False, file_counter=None):
+    """Apply the ISA/GS/DTM/G62/BEG rewrites to one segment; other segments come back unchanged."""
+    parts = line.split('*')
+    if line.startswith('ISA*') and len(parts) > 8:
+        parts[6] = config.isa_sender_id or pad_isa_field(parts[6])
+        parts[8] = config.isa_receiver_id or pad_isa_field(parts[8])
+    elif line.startswith('GS*') and len(parts) > 3:
+        parts[2] = config.gs_sender_id or parts[2]
+        parts[3] = config.gs_receiver_id or parts[3]
+    elif line.startswith('DTM*') and len(parts) > 2:
+        parts[2] = adjust_date(parts[2], config, "DTM")
+    elif line.startswith('G62*') and len(parts) > 2:
+        parts[2] = adjust_date(parts[2], config, "G62")
+    elif line.startswith('BEG*') and len(parts) > 3:
+        parts[3] = rewrite_po_number(parts[3], config, is_bulk_processing, file_counter)
+        print(f"Updating BEG Segment PO Number: {parts[3]}")
     else:
-        lines = [line.strip().rstrip('~') for line in content.strip().split('\n') if line.strip()]
+        return line
+    return '*'.join(parts)
+
+def rewrite_po_number(po_number, config, is_bulk_processing=False, file_counter=None):
+    """The configured PO number (with the bulk T suffix), or the inbound one without a trailing T1."""
+    if config.po_number:
+        if is_bulk_processing:
+            return f"{config.po_number}T{file_counter}"
+        return config.po_number
+    if po_number.endswith('T1'):
+        return po_number[:-2]
+    return po_number
+
+def rewrite_selected_po1(po1_line, po1_counter, index, new_elements, config):
+    """Renumber a selected PO1 and apply user edits and the configured quantities."""
+    parts = po1_line.split('*')
+    parts[1] = str(po1_counter)
+    print(f"Assigned serial number {po1_counter} to selected PO1 segment (original sequence {index})")
+    if new_elements:
+        for idx, value in new_elements.items():
+            if value is not None:
+                if idx >= len(parts):
+                    print(f"PO1 {po1_counter} has {len(parts) - 1} elements; padding it out to element {idx}")
+                    parts.extend([''] * (idx + 1 - len(parts)))
+                parts[idx] = value
+                print(f"Applying user element for PO1 {po1_counter} at position {idx}: {value}")
+    if po1_counter == 1 and config.first_po1_quantity is not None:
+        print(f"Using config First_PO1_Quantity: {config.first_po1_quantity}")
+        parts[2] = config.first_po1_quantity
+    elif po1_counter == 2 and config.second_po1_quantity is not None:
+        print(f"Using config Second_PO1_Quantity: {config.second_po1_quantity}")
+        parts[2] = config.second_po1_quantity
+    return '*'.join(parts)
+
+def filter_po1_groups(lines, mode, count):
+    """Keep some of the PO1 groups (PO1 plus its CTP/PID/PO4/SDQ/AMT) in each transaction set, as a stream.
+
+    first: the first count groups. last: the last count groups. every: every
+    count-th group (count, 2*count, ...). All other segments pass through in
+    order. Only 'last' holds anything back: the latest count groups and the
+    segments between them, released at SE, the next ST or the end of input.
+    """
+    held = deque()
+    held_groups = 0
+    index = 0
+    group = None
+    keep = False
+    in_group = False
+    for line in lines:
+        if line.startswith('PO1*'):
+            index += 1
+            in_group = True
+            if mode == 'last':
+                group = [line]
+                held.append(group)
+                held_groups += 1
+                if held_groups > count:
+                    # Release what came before the oldest group, then drop it
+                    entry = held.popleft()
+                    while not isinstance(entry, list):
+                        yield entry
+                        entry = held.popleft()
+                    held_groups -= 1
+                continue
+            keep = index <= count if mode == 'first' else index % count == 0
+            if keep:
+                yield line
+        elif in_group and line.startswith(PO1_RELATED_SEGMENTS):
+            if mode == 'last':
+                group.append(line)
+            elif keep:
+                yield line
+        else:
+            in_group = False
+            if line.startswith(('ST*', 'SE*')):
+                for entry in held:
+                    yield from (entry if isinstance(entry, list) else [entry])
+                held.clear()
+                held_groups = 0
+                if line.startswith('SE*') and index:
+                    kept = index // count if mode == 'every' else min(index, count)
+                    print(f"PO1 filter {mode}:{count} kept {kept} of {index} PO1 group(s)")
+                index = 0
+                yield line
+            elif held:
+                held.append(line)
+            else:
+                yield line
+    for entry in held:
+        yield from (entry if isinstance(entry, list) else [entry])
+
+def apply_po1_filter(lines, config):
+    """Run filter_po1_groups when po1_filter is set; otherwise return lines unchanged."""
+    if not config.po1_filter:
+        return lines
+    return filter_po1_groups(lines, *config.po1_filter)
+
+def transform_segments(lines, config, selected_segments=None, new_elements_list=None, is_bulk_processing=False, file_counter=None):
+    """Apply the configured rewrites and PO1 selection to split segments. Returns the output segments."""
+    config = compile_config(config)
+    selected_segments = selected_segments or []
+    new_elements_list = new_elements_list or []
 
     po1_groups = []
     current_group = []
     po1_index = 0
-    related_segments = ['CTP*', 'PID*', 'PO4*', 'SDQ*', 'AMT*']
+    st_number = 0
+    po1_st_numbers = {}
 
     for line in lines:
+        if line.startswith('ST*'):
+            st_number += 1
         if line.startswith('PO1*'):
             if current_group:
                 po1_groups.append((po1_index, current_group))
             po1_index += 1
+            po1_st_numbers[po1_index] = st_number
             current_group = [line]
-        elif any(line.startswith(seg) for seg in related_segments) and current_group and current_group[0].startswith('PO1*'):
+        elif line.startswith(PO1_RELATED_SEGMENTS) and current_group and current_group[0].startswith('PO1*'):
             current_group.append(line)
         else:
             if current_group:
@@ -221,35 +596,37 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
         else:
             po1_groups.append((0, current_group))
 
-    selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+    # Selected groups keep the slots of the selected groups in the file, but are
+    # emitted in the order given by selected_segments (GUI positions / templates).
+    # Reordering stays inside each ST, so a group never moves to another transaction set.
+    po1_group_by_index = {index: group for index, group in po1_groups if group[0].startswith('PO1*')}
+    selected_order = {}
+    selected_set = set()
+    for seq_num, _ in selected_segments:
+        if seq_num not in po1_group_by_index:
+            print(f"Warning: Selected PO1 sequence {seq_num} is not in the file and was dropped")
+            continue
+        if seq_num not in selected_set:
+            selected_set.add(seq_num)
+            selected_order.setdefault(po1_st_numbers[seq_num], deque()).append(seq_num)
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
+    # CTT01 and SE01 count the PO1s and segments of the current ST only
+    po1_in_st = 0
+    segments_in_st = 0
 
     for index, group in po1_groups:
         if group[0].startswith('PO1*'):
             # Only include PO1 groups that are selected for editing
-            if selected_segments and index in selected_seq_nums:
+            if selected_segments and index in selected_set:
+                index = selected_order[po1_st_numbers[index]].popleft()
+                group = po1_group_by_index[index]
                 po1_counter += 1
-                po1_line = group[0]
-                parts = po1_line.split('*')
-                parts[1] = str(po1_counter)
-                print(f"Assigned serial number {po1_counter} to selected PO1 segment (original sequence {index})")
-                if index in new_elements_dict:
-                    for idx, value in new_elements_dict[index].items():
-                        if value is not None:
-                            parts[idx] = value
-                            print(f"Applying user element for PO1 {po1_counter} at position {idx}: {value}")
-                first_qty = config.get("First_PO1_Quantity")
-                second_qty = config.get("Second_PO1_Quantity")
-                if po1_counter == 1 and first_qty is not None and str(first_qty).strip() != "":
-                    print(f"Using config First_PO1_Quantity: {first_qty}")
-                    parts[2] = str(first_qty)
-                elif po1_counter == 2 and second_qty is not None and str(second_qty).strip() != "":
-                    print(f"Using config Second_PO1_Quantity: {second_qty}")
-                    parts[2] = str(second_qty)
-                group[0] = '*'.join(parts)
+                group[0] = rewrite_selected_po1(group[0], po1_counter, index, new_elements_dict.get(index), config)
                 filtered_lines.extend(group)
+                po1_in_st += 1
+                segments_in_st += len(group)
             # Skip unselected PO1 groups when there are selected segments
             elif selected_segments:
                 print(f"Skipping unselected PO1 segment (sequence {index})")
@@ -257,70 +634,539 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
             # Include all PO1 groups when no segments are selected (single file case)
             else:
                 filtered_lines.extend(group)
+                po1_in_st += 1
+                segments_in_st += len(group)
         else:
             # Process non-PO1 segments
             modified_group = []
             for line in group:
                 parts = line.split('*')
-                if line.startswith('ISA*') and len(parts) > 8:
-                    sender_id = config.get('ISA_Sender_ID', '').strip() or parts[6]
-                    receiver_id = config.get('ISA_Receiver_ID', '').strip() or parts[8]
-                    parts[6] = pad_isa_field(sender_id)
-                    parts[8] = pad_isa_field(receiver_id)
-                    modified_group.append('*'.join(parts))
-                elif line.startswith('GS*') and len(parts) > 3:
-                    parts[2] = config.get('GS_Sender_ID', '').strip() or parts[2]
-                    parts[3] = config.get('GS_Receiver_ID', '').strip() or parts[3]
-                    modified_group.append('*'.join(parts))
-                elif line.startswith('DTM*') and len(parts) > 2:
-                    parts[2] = adjust_date(parts[2], config, "DTM")
-                    modified_group.append('*'.join(parts))
-                elif line.startswith('G62*') and len(parts) > 2:
-                    parts[2] = adjust_date(parts[2], config, "G62")
-                    modified_group.append('*'.join(parts))
-                elif line.startswith('BEG*') and len(parts) > 3:
-                    config_po_number = config.get('po_number', '').strip()
-                    if config_po_number:
-                        if is_bulk_processing:
-                            beg_identifier = f"{config_po_number}T{file_counter}"
-                        else:
-                            beg_identifier = config_po_number
-                    else:
-                        beg_identifier = parts[3]
-                        if beg_identifier.endswith('T1'):
-                            beg_identifier = beg_identifier[:-2]
-                    parts[3] = beg_identifier
-                    print(f"Updating BEG Segment PO Number: {parts[3]}")
-                    modified_group.append('*'.join(parts))
-                elif line.startswith('CTT*'):
-                    final_po1_count = sum(1 for l in filtered_lines if l.startswith('PO1*')) + sum(1 for l in group if l.startswith('PO1*'))
-                    parts[1] = str(final_po1_count)
+                if line.startswith('ST*'):
+                    po1_in_st = 0
+                    segments_in_st = 0
+                if not line.startswith(('ISA*', 'GS*', 'GE*', 'IEA*')):
+                    segments_in_st += 1
+                if line.startswith('CTT*'):
+                    parts[1] = str(po1_in_st)
                     modified_group.append('*'.join(parts))
-                    print(f"Updating CTT count to: {final_po1_count}")
+                    print(f"Updating CTT count to: {po1_in_st}")
                 elif line.startswith('SE*') and len(parts) > 1:
-                    segment_count = sum(1 for l in filtered_lines if not l.startswith(('ISA*', 'GS*', 'GE*', 'IEA*'))) + sum(1 for l in group if not l.startswith(('ISA*', 'GS*', 'GE*', 'IEA*')))
-                    parts[1] = str(segment_count)
-                    print(f"Updating SE Segment Count: {segment_count}")
+                    parts[1] = str(segments_in_st)
+                    print(f"Updating SE Segment Count: {segments_in_st}")
                     modified_group.append('*'.join(parts))
                 else:
-                    modified_group.append(line)
+                    modified_group.append(rewrite_segment(line, config, is_bulk_processing, file_counter))
             filtered_lines.extend(modified_group)
 
-    final_po1_count = sum(1 for line in filtered_lines if line.startswith('PO1*'))
     if not any(line.startswith('CTT*') for line in filtered_lines):
-        filtered_lines.append(f"CTT*{final_po1_count}")
-        print(f"Adding CTT segment with count: {final_po1_count}")
+        filtered_lines.append(f"CTT*{po1_in_st}")
+        segments_in_st += 1
+        print(f"Adding CTT segment with count: {po1_in_st}")
     if not any(line.startswith('SE*') for line in filtered_lines):
-        segment_count = sum(1 for line in filtered_lines if not line.startswith(('ISA*', 'GS*', 'GE*', 'IEA*')))
-        filtered_lines.append(f"SE*{segment_count}*0001")
+        segment_count = segments_in_st
+        # SE02 must repeat the control number of the open ST
+        st_control = next((line.split('*')[2] for line in reversed(filtered_lines) if line.startswith('ST*') and line.count('*') >= 2), '0001')
+        filtered_lines.append(f"SE*{segment_count}*{st_control}")
         print(f"Adding SE segment with count: {segment_count}")
 
-    if is_single_line:
-        return '~'.join(filtered_lines) + '~'
+    return filtered_lines
+
+def transform_875_segments(lines, config, is_bulk_processing=False, file_counter=None):
+    """Apply the configured rewrites to an 875: envelope IDs, DTM/G62 dates and the G50-03 PO number.
+
+    SE01 is recounted per transaction set; the G68 line items are left as they are.
+    """
+    config = compile_config(config)
+    output = []
+    segment_count = 0
+    for line in lines:
+        parts = line.split('*')
+        if line.startswith('ST*'):
+            segment_count = 0
+        if line.startswith('G50*') and len(parts) > 3:
+            parts[3] = rewrite_po_number(parts[3], config, is_bulk_processing, file_counter)
+            print(f"Updating G50 Segment PO Number: {parts[3]}")
+            line = '*'.join(parts)
+        elif line.startswith('SE*') and len(parts) > 1:
+            parts[1] = str(segment_count + 1)
+            print(f"Updating SE Segment Count: {parts[1]}")
+            line = '*'.join(parts)
+        else:
+            line = rewrite_segment(line, config, is_bulk_processing, file_counter)
+        if not line.startswith(('ISA*', 'GS*', 'GE*', 'IEA*')):
+            segment_count += 1
+        output.append(line)
+    return output
+
+DEFAULT_OUTPUT_NAME_TEMPLATE = 'processed_{stem}_{timestamp}{ext}'
+OUTPUT_NAME_FIELDS = ('stem', 'ext', 'isa13', 'beg03', 'run_id', 'seq', 'timestamp')
+
+def _safe_name_part(value):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(value))
+
+class OutputNamer:
+    """Names and creates output files for one run from output_name_template.
+
+    Template fields: {stem} {ext} {isa13} {beg03} {run_id} {seq} {timestamp}.
+    The timestamp and run ID are fixed when the run starts. Files are created
+    exclusively, and a name that is already taken gets a _1, _2, ... suffix,
+    so parallel writers and fast batches never overwrite each other.
+    """
+
+    def __init__(self, template=None, run_id=None):
+        self.template = template or DEFAULT_OUTPUT_NAME_TEMPLATE
+        for _, field, _, _ in string.Formatter().parse(self.template):
+            if field is not None and field not in OUTPUT_NAME_FIELDS:
+                raise ValueError(f"Error: 'output_name_template' uses unknown field '{{{field}}}'. Available: {', '.join(OUTPUT_NAME_FIELDS)}")
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.run_id = run_id or f"{self.timestamp}_{os.getpid()}"
+        self._next_seq = 1
+
+    def format(self, file_path, lines=(), seq=None):
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        stem, ext = os.path.splitext(os.path.basename(file_path))
+        fields = {'isa13': '', 'beg03': ''}
+        for line in lines:
+            if line.startswith('ISA*') and not fields['isa13']:
+                fields['isa13'] = line.split('*')[13] if line.count('*') >= 13 else ''
+            elif line.startswith('BEG*'):
+                parts = line.split('*')
+                fields['beg03'] = parts[3] if len(parts) > 3 else ''
+                break
+        fields = {key: _safe_name_part(value) for key, value in fields.items()}
+        return self.template.format(stem=stem, ext=ext, run_id=self.run_id, seq=seq, timestamp=self.timestamp, **fields)
+
+    def reserve(self, output_folder, file_path, lines=(), seq=None):
+        """Exclusively create an empty output file under a free name. Returns its path."""
+        name = self.format(file_path, lines, seq)
+        stem, ext = os.path.splitext(name)
+        output_path = os.path.join(output_folder, name)
+        attempt = 0
+        while True:
+            try:
+                with open(output_path, 'x', encoding='utf-8'):
+                    pass
+                return output_path
+            except FileExistsError:
+                attempt += 1
+                output_path = os.path.join(output_folder, f"{stem}_{attempt}{ext}")
+
+    def write(self, output_folder, file_path, content, lines=(), seq=None):
+        """Create the output file exclusively and write content. Returns the path written."""
+        output_path = self.reserve(output_folder, file_path, lines, seq)
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(content)
+        return output_path
+
+DEFAULT_INPUT_PATTERNS = ('*.edi', '*.txt')
+INPUT_SORT_KEYS = ('name', 'mtime')
+
+def discover_input_files(input_folder, patterns=DEFAULT_INPUT_PATTERNS, recursive=False, sort_by='name', exclude_folders=()):
+    """List input files in one os.scandir sweep. Returns sorted [(path, stat_result)].
+
+    Patterns are matched against file names; the stat result comes from the
+    directory entry, so callers do not need to stat the files again.
+    """
+    patterns = tuple(patterns or DEFAULT_INPUT_PATTERNS)
+    if sort_by not in INPUT_SORT_KEYS:
+        raise ValueError(f"Error: 'input_sort' must be one of {', '.join(INPUT_SORT_KEYS)}. Found: '{sort_by}'")
+    excluded = {os.path.normcase(os.path.abspath(folder)) for folder in exclude_folders if folder}
+    found = []
+    pending = [input_folder]
+    while pending:
+        folder = pending.pop()
+        try:
+            entries = os.scandir(folder)
+        except OSError as e:
+            print(f"Warning: Cannot read folder '{folder}': {str(e)}")
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if recursive and os.path.normcase(os.path.abspath(entry.path)) not in excluded:
+                            pending.append(entry.path)
+                    elif entry.is_file() and any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns):
+                        found.append((entry.path, entry.stat()))
+                except OSError:
+                    continue
+    if sort_by == 'mtime':
+        found.sort(key=lambda item: (item[1].st_mtime_ns, item[0]))
     else:
-        return '\n'.join(line + '~' for line in filtered_lines)
+        found.sort(key=lambda item: item[0])
+    return found
+
+def discover_configured_inputs(config):
+    """discover_input_files driven by input_patterns/recursive_input/input_sort; output folders are skipped."""
+    output_folder = config.get('output_folder_path')
+    return discover_input_files(
+        config.get('input_folder_path'),
+        patterns=config.get('input_patterns') or DEFAULT_INPUT_PATTERNS,
+        recursive=bool(config.get('recursive_input')),
+        sort_by=config.get('input_sort') or 'name',
+        exclude_folders=(output_folder, config.get('quarantine_folder_path'), config.get('outbound_folder_path'), config.get('export_folder_path')),
+    )
+
+def allocate_po_suffix(config, file_path):
+    """Reserve the bulk BEG03 suffix for a file from the persistent PO registry."""
+    registry_path = state_file_path(config, PO_REGISTRY_FILENAME, 'po_registry_path')
+    with POAllocator(registry_path) as allocator:
+        suffix, po_number = allocator.allocate(config.po_number, os.path.basename(file_path))
+    print(f"Allocated PO number {po_number} from {registry_path}")
+    return suffix
+
+STATE_FOLDER_NAME = 'state'
+
+def state_file_path(config, filename, key=None):
+    """The path set in config[key], else filename in state_folder_path.
+
+    Registries, counters and indexes live outside the output folder, which is
+    usually a drop folder for the partner; state_folder_path defaults to a
+    'state' folder next to this script.
+    """
+    if key and config.get(key):
+        return config.get(key)
+    state_folder = config.get('state_folder_path') or os.path.join(os.path.dirname(os.path.abspath(__file__)), STATE_FOLDER_NAME)
+    os.makedirs(state_folder, exist_ok=True)
+    return os.path.join(state_folder, filename)
+
+def control_number_service(config):
+    """ControlNumberService for the config when assign_control_numbers is on, else None (keep the partner's numbers)."""
+    if not config.get('assign_control_numbers'):
+        return None
+    state_path = state_file_path(config, CONTROL_NUMBER_STATE_FILENAME, 'control_number_state_path')
+    return ControlNumberService(state_path, config.get('control_number_start') or 1)
+
+def record_po_index(config, lines, input_path, output_path=None):
+    """Add a file's BEG03/BEG05 and PO1 product IDs to the PO index when index_purchase_orders is on."""
+    if not config.get('index_purchase_orders'):
+        return
+    index_path = state_file_path(config, PO_INDEX_FILENAME, 'po_index_path')
+    with POIndex(index_path) as index:
+        index.add_file(lines, input_path, output_path)
+
+def read_interchange_key(lines, digest):
+    """Duplicate-index key for an interchange: (ISA06 sender, ISA13, content digest), taken from the inbound ISA."""
+    for line in lines:
+        if line.startswith('ISA*'):
+            parts = line.split('*')
+            if len(parts) > 13:
+                return parts[6].strip(), parts[13].strip(), digest
+            break
+    return '', '', digest
+
+def duplicate_index_path(config):
+    return state_file_path(config, DUPLICATE_INDEX_FILENAME, 'duplicate_index_path')
+
+DUPLICATES_FILENAME = 'duplicates.jsonl'
+
+def claim_interchange(file_path, key, config):
+    """Reserve an interchange in the duplicate index before transforming it.
+
+    Returns True when this run owns it. Otherwise the file is a duplicate of
+    one processed (or being processed) before: it is reported and False is
+    returned. The claim is atomic, so identical files in one parallel run
+    cannot both get through.
+    """
+    with DuplicateIndex(duplicate_index_path(config)) as index:
+        if index.claim(*key, file_path):
+            return True
+        seen = index.lookup(*key)
+    if seen is None:
+        # Released by its owner between the claim and the lookup
+        return claim_interchange(file_path, key, config)
+    source_file, output_file, processed_at, state = seen
+    if state == 'pending':
+        print(f"Duplicate interchange (sender {key[0]}, ISA13 {key[1]}): {source_file} has been in progress since {processed_at}; skipping")
+    else:
+        print(f"Duplicate interchange (sender {key[0]}, ISA13 {key[1]}): already processed from {source_file} at {processed_at}; skipping")
+    entry = {
+        'input': file_path,
+        'sender': key[0],
+        'isa13': key[1],
+        'digest': key[2],
+        'first_input': source_file,
+        'first_output': output_file,
+        'first_processed_at': processed_at,
+        'first_state': state,
+        'detected_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(state_file_path(config, DUPLICATES_FILENAME), 'a', encoding='utf-8') as report:
+        report.write(json.dumps(entry) + '\n')
+    return False
+
+def complete_interchange(key, output_path, config):
+    """Mark a claimed interchange as processed once its output is saved."""
+    with DuplicateIndex(duplicate_index_path(config)) as index:
+        index.complete(*key, output_path)
+
+def release_interchange(key, config):
+    """Drop the claim on an interchange that was quarantined or failed, so a redelivery is processed."""
+    with DuplicateIndex(duplicate_index_path(config)) as index:
+        index.release(*key)
+
+MANIFEST_FILENAME = 'processing_manifest.jsonl'
+
+def record_manifest(input_path, output_path, config):
+    """Append an input/output/config-version line to processing_manifest.jsonl in the state folder."""
+    entry = {
+        'input': input_path,
+        'output': output_path,
+        'config_version': config.version,
+        'processed_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(state_file_path(config, MANIFEST_FILENAME), 'a', encoding='utf-8') as manifest:
+        manifest.write(json.dumps(entry) + '\n')
+
+def read_input(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+SCHEMA_VALIDATION_MODES = ('off', 'report', 'reject')
+
+def check_and_quarantine(file_path, lines, config):
+    """Run the configured validation. Returns False when the file was quarantined."""
+    output_folder = config.get('output_folder_path')
+    schema_validation = config.get('schema_validation') or 'report'
+    if not config.get('prevalidate_files', True) and schema_validation == 'off':
+        return True
+    errors, element_errors = validate_file(lines, check_elements=schema_validation != 'off')
+    if not config.get('prevalidate_files', True):
+        errors = []
+    if element_errors:
+        for error in element_errors[:10]:
+            print(f"Schema error: {error}")
+        report_path = write_validation_report(file_path, element_errors, os.path.join(output_folder, 'reports'))
+        print(f"{len(element_errors)} schema error(s) written to {report_path}")
+        if schema_validation == 'reject':
+            errors = errors + element_errors
+    if errors:
+        for error in errors[:10]:
+            print(f"Validation error: {error}")
+        quarantine_folder = config.get('quarantine_folder_path') or os.path.join(output_folder, 'quarantine')
+        quarantine_file(file_path, errors, quarantine_folder)
+        return False
+    return True
+
+def transform_file(file_path, content, config, sniff, is_bulk_processing=False, file_counter=None, interactive=True, po1_edits=None):
+    """Validate and transform one file's content without writing the output.
+
+    Returns a result dict for save_result, or None when the file was quarantined
+    or is a duplicate of an interchange processed before (skip_duplicates).
+    Runs in worker processes for the async pipeline, so it only writes
+    quarantine/report files, never the shared exporter or output names.
+    po1_edits, when given, replaces the interactive PO1 selection of an 850: it
+    is called with the PO1 segments and returns (selected_segments,
+    new_elements_list), as edi_template does when replaying a template.
+    """
+    terminator = sniff['delimiters']['segment']
+    lines, is_single_line = split_segments(content, terminator, sniff['is_single_line'])
+
+    config = compile_config(config).for_partner(*read_partner_ids(lines))
+    if config.profile_name:
+        print(f"Using trading-partner profile: {config.profile_name}")
+    output_folder = config.get('output_folder_path')
+    os.makedirs(output_folder, exist_ok=True)
+
+    duplicate_key = None
+    if config.get('skip_duplicates'):
+        duplicate_key = read_interchange_key(lines, content_digest(content))
+        if not claim_interchange(file_path, duplicate_key, config):
+            return None
+    try:
+        result = _transform_lines(file_path, content, lines, is_single_line, terminator, config, sniff,
+                                  is_bulk_processing, file_counter, interactive, po1_edits)
+    except Exception:
+        if duplicate_key:
+            release_interchange(duplicate_key, config)
+        raise
+    if result is None:
+        if duplicate_key:
+            release_interchange(duplicate_key, config)
+        return None
+    result['duplicate_key'] = duplicate_key
+    return result
+
+def _transform_lines(file_path, content, lines, is_single_line, terminator, config, sniff, is_bulk_processing, file_counter, interactive, po1_edits=None):
+    # Reject broken files before spending time on the transform
+    if not check_and_quarantine(file_path, lines, config):
+        return None
+
+    print(f"File type: {describe_transaction_set(sniff['transaction_set'])}")
+    transform = TRANSACTION_TRANSFORMS.get(sniff['transaction_set'])
+    if transform is None:
+        raise ValueError(f"Error: Unsupported transaction set '{sniff['transaction_set']}'")
+    filtered_lines = transform(file_path, lines, config, is_bulk_processing, file_counter, interactive, po1_edits)
+    control_numbers = control_number_service(config)
+    if control_numbers:
+        filtered_lines = list(renumber_envelopes(filtered_lines, control_numbers))
+    return {
+        'config': config,
+        'content': content,
+        'filtered_lines': filtered_lines,
+        'updated_content': join_segments(filtered_lines, is_single_line, terminator),
+        'is_single_line': is_single_line,
+        'terminator': terminator,
+        'transaction_set': sniff['transaction_set'],
+    }
+
+def _transform_850(file_path, lines, config, is_bulk_processing, file_counter, interactive, po1_edits=None):
+    if config.po1_filter:
+        lines = list(apply_po1_filter(lines, config))
+
+    selected_segments = []
+    new_elements_list = []
+
+    if po1_edits is not None:
+        selected_segments, new_elements_list = po1_edits([line for line in lines if line.startswith('PO1*')])
+    # For bulk processing, require PO1 updates
+    elif is_bulk_processing and interactive:
+        po1_only_segments = [line for line in lines if line.startswith('PO1*')]
+        print(f"Found {len(po1_only_segments)} PO1 segments in the file.")
+        selected_segments = select_po1_segments(po1_only_segments)
+        if selected_segments:
+            new_elements_list = get_user_input_for_po1_elements(selected_segments)
+    elif is_bulk_processing:
+        print("Non-interactive run, keeping all PO1 segments.")
+    # For single file, skip PO1 processing entirely
+    else:
+        print("Single file detected, skipping PO1 segment updates.")
+
+    # Bulk PO numbers come from the registry so reruns never reuse a suffix
+    if is_bulk_processing and config.po_number:
+        file_counter = allocate_po_suffix(config, file_path)
+
+    return transform_segments(
+        lines,
+        config,
+        selected_segments=selected_segments,
+        new_elements_list=new_elements_list,
+        is_bulk_processing=is_bulk_processing,
+        file_counter=file_counter if is_bulk_processing else None
+    )
+
+def _transform_875(file_path, lines, config, is_bulk_processing, file_counter, interactive, po1_edits=None):
+    # 875 line items are G68 segments, so PO1 selection and po1_filter do not apply
+    if po1_edits is not None:
+        print("875 files have no PO1 segments, PO1 edits are not applied.")
+    if is_bulk_processing and config.po_number:
+        file_counter = allocate_po_suffix(config, file_path)
+    return transform_875_segments(lines, config, is_bulk_processing, file_counter if is_bulk_processing else None)
+
+# Segment transform per supported transaction set; sniff_input skips or quarantines any other type
+TRANSACTION_TRANSFORMS = {
+    '850': _transform_850,
+    '875': _transform_875,
+}
+
+def save_result(file_path, result, exporter=None, namer=None):
+    """Export, generate outbound documents and write the output of transform_file. Returns the output path or None."""
+    duplicate_key = result.get('duplicate_key')
+    try:
+        output_file_path = _save_result(file_path, result, exporter, namer)
+    except Exception:
+        if duplicate_key:
+            release_interchange(duplicate_key, result['config'])
+        raise
+    if duplicate_key:
+        complete_interchange(duplicate_key, output_file_path, result['config'])
+    return output_file_path
+
+def _save_result(file_path, result, exporter, namer):
+    config = result['config']
+    output_folder = config.get('output_folder_path')
+    filtered_lines = result['filtered_lines']
+    updated_content = result['updated_content']
+    if exporter:
+        exporter.add_file(filtered_lines, file_path)
+    outbound_documents = [str(document) for document in config.get('outbound_documents') or []]
+    # The 855/856/810 builders read BEG/PO1 groups, so only 850 inputs get them
+    if outbound_documents and result.get('transaction_set') != '850':
+        print(f"Skipping outbound documents for transaction set {result.get('transaction_set') or 'unknown'}; they are built from 850s only")
+    elif outbound_documents:
+        outbound_folder = config.get('outbound_folder_path') or os.path.join(output_folder, 'outbound')
+        write_outbound_documents(filtered_lines, file_path, outbound_folder, outbound_documents, result['is_single_line'], result['terminator'],
+                                 control_number_service(config))
+
+    if result['content'] == updated_content:
+        print(f"No changes needed: {os.path.basename(file_path)}")
+        record_po_index(config, filtered_lines, file_path)
+        return None
+
+    namer = namer or OutputNamer(config.get('output_name_template'))
+    output_file_path = namer.write(output_folder, file_path, updated_content, filtered_lines)
+    record_manifest(file_path, output_file_path, config)
+    record_po_index(config, filtered_lines, file_path, output_file_path)
+    print(f"Processed & saved: {output_file_path} (config version {config.version})")
+    return output_file_path
+
+DEFAULT_STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+def is_large_file(file_path, config):
+    """True when a file is at or above stream_threshold_bytes (default 64 MB; 0 turns streaming off)."""
+    threshold = config.get('stream_threshold_bytes')
+    if threshold is None or threshold == '':
+        threshold = DEFAULT_STREAM_THRESHOLD_BYTES
+    return bool(threshold) and os.path.getsize(file_path) >= threshold
+
+def uses_streaming(file_path, config, sniff):
+    """True when an 850 goes through edi_stream: split mode, or a single-line file at or above stream_threshold_bytes."""
+    if sniff['transaction_set'] != '850':
+        return False
+    return bool(config.get('split_transactions')) or (sniff['is_single_line'] and is_large_file(file_path, config))
+
+def process_file(file_path, config, is_bulk_processing=False, file_counter=None, exporter=None, interactive=True, sniff=None, namer=None):
+    """Transform one input file and save the result. Returns the output path, or None when unchanged."""
+    sniff = sniff or sniff_file(file_path)
+    if uses_streaming(file_path, config, sniff):
+        # Imported here because edi_stream builds on this module
+        from edi_stream import process_file_streaming
+        return process_file_streaming(file_path, config, sniff, is_bulk_processing, file_counter, exporter, interactive, namer,
+                                      split=bool(config.get('split_transactions')))
+    content = read_input(file_path)
+    result = transform_file(file_path, content, config, sniff, is_bulk_processing, file_counter, interactive)
+    if result is None:
+        return None
+    return save_result(file_path, result, exporter, namer)
+
+UNSUPPORTED_TRANSACTION_SET_ACTIONS = ('skip', 'quarantine')
+
+def sniff_input(file_path, config, head=None):
+    """Sniff a file, or the head already read from it. Returns None when the file is unusable.
+
+    Unreadable files are quarantined. Files of a transaction set without a
+    transform are left in place and skipped, or quarantined when
+    unsupported_transaction_sets is 'quarantine'.
+    """
+    try:
+        sniff = sniff_content(head) if head is not None else sniff_file(file_path)
+        if sniff['delimiters']['element'] != '*':
+            raise ValueError(f"Unsupported element separator '{sniff['delimiters']['element']}'")
+        if sniff['transaction_set'] not in TRANSACTION_TRANSFORMS:
+            message = f"Unsupported transaction set '{sniff['transaction_set'] or 'none'}'; supported: {', '.join(TRANSACTION_TRANSFORMS)}"
+            if config.get('unsupported_transaction_sets') != 'quarantine':
+                print(f"Skipping {os.path.basename(file_path)}: {message}")
+                return None
+            raise ValueError(message)
+    except ValueError as e:
+        print(f"Validation error: {str(e)}")
+        quarantine_folder = config.get('quarantine_folder_path') or os.path.join(config.get('output_folder_path'), 'quarantine')
+        quarantine_file(file_path, [str(e)], quarantine_folder)
+        return None
+    print(f"Detected {sniff['transaction_set'] or 'no'} transaction set, version {sniff['version'] or 'unknown'}")
+    return sniff
+
+def route_file(file_path, config, is_bulk_processing=False, file_counter=None, exporter=None, interactive=True, namer=None):
+    """Sniff the head of a file and process it with the transform for its transaction set; unsupported files are skipped or quarantined."""
+    sniff = sniff_input(file_path, config)
+    if sniff is None:
+        return None
+    return process_file(file_path, config, is_bulk_processing, file_counter, exporter, interactive, sniff=sniff, namer=namer)
 
 def process_files_and_save(config):
+    config = compile_config(config)
     input_folder = config.get('input_folder_path')
     output_folder = config.get('output_folder_path')
 
@@ -331,7 +1177,7 @@ def process_files_and_save(config):
 
     os.makedirs(output_folder, exist_ok=True)
 
-    input_files = glob.glob(os.path.join(input_folder, '*.edi')) + glob.glob(os.path.join(input_folder, '*.txt'))
+    input_files = [file_path for file_path, _ in discover_configured_inputs(config)]
     if not input_files:
         print("No files found in the input folder!")
         return
@@ -339,77 +1185,93 @@ def process_files_and_save(config):
     is_bulk_processing = len(input_files) > 1
     file_counter = 1
 
+    export_folder = config.get('export_folder_path')
+    exporter = PO1Exporter(export_folder) if export_folder else None
+    namer = OutputNamer(config.get('output_name_template'))
+    written = []
+
     for file_path in input_files:
-        if os.path.isfile(file_path):
-            print(f"\nProcessing file: {os.path.basename(file_path)}")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
+        print(f"\nProcessing file: {os.path.basename(file_path)}")
+        try:
+            output = route_file(file_path, config, is_bulk_processing, file_counter, exporter, namer=namer)
+            if output:
+                written.extend(output if isinstance(output, list) else [output])
+            file_counter += 1
+        except Exception as e:
+            print(f"Error processing file {file_path}: {str(e)}")
+            file_counter += 1
+            continue
 
-                is_single_line = '\n' not in content and '*' in content
-                if is_single_line:
-                    lines = [line.strip().rstrip('~') for line in content.split('~') if line.strip()]
-                else:
-                    lines = [line.strip().rstrip('~') for line in content.strip().split('\n') if line.strip()]
-
-                file_type = "Unknown"
-                for line in lines:
-                    if line.startswith('ST*'):
-                        parts = line.split('*')
-                        if len(parts) > 1:
-                            transaction_set = parts[1]
-                            if transaction_set == '850':
-                                file_type = '850 (Purchase Order)'
-                            elif transaction_set == '875':
-                                file_type = '875 (Grocery Products Purchase Order)'
-                        break
-                print(f"File type: {file_type}")
-
-                selected_segments = []
-                new_elements_list = []
-
-                # For bulk processing, require PO1 updates
-                if is_bulk_processing:
-                    po1_only_segments = [line for line in lines if line.startswith('PO1*')]
-                    print(f"Found {len(po1_only_segments)} PO1 segments in the file.")
-                    selected_segments = select_po1_segments(po1_only_segments)
-                    if selected_segments:
-                        new_elements_list = get_user_input_for_po1_elements(selected_segments)
-                # For single file, skip PO1 processing entirely
-                else:
-                    print("Single file detected, skipping PO1 segment updates.")
-
-                updated_content = modify_edi_file(
-                    content,
-                    config,
-                    selected_segments=selected_segments,
-                    new_elements_list=new_elements_list,
-                    is_bulk_processing=is_bulk_processing,
-                    file_counter=file_counter if is_bulk_processing else None
-                )
-
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                base_filename, file_extension = os.path.splitext(os.path.basename(file_path))
-                new_filename = f"processed_{base_filename}_{timestamp}{file_extension}"
-                output_file_path = os.path.join(output_folder, new_filename)
-
-                if content != updated_content:
-                    with open(output_file_path, 'w', encoding='utf-8') as output_file:
-                        output_file.write(updated_content)
-                    print(f"Processed & saved: {output_file_path}")
-                else:
-                    print(f"No changes needed: {os.path.basename(file_path)}")
+    if exporter:
+        exporter.close()
+
+    if config.get('merge_outputs') and written:
+        # Imported here because edi_merge builds on this module
+        from edi_merge import merge_files
+        print(f"\nMerging {len(written)} output file(s)...")
+        merge_files(written, config, remove_sources=True)
 
-                file_counter += 1
+def watch_and_process(watcher, interval=5.0):
+    """Poll the input folder and process new or changed files until interrupted.
+
+    conf.json is re-checked before every file, so changes apply from the next
+    file on without a restart. Files modified within the last poll interval
+    are left for the next poll in case they are still being written.
+    """
+    seen = {}
+    file_counter = 1
+    print(f"Watching for input files every {interval} seconds (Ctrl+C to stop)...")
+    while True:
+        config = watcher.current()
+        input_folder = config.get('input_folder_path')
+        if not input_folder or not os.path.isdir(input_folder):
+            print(f"Warning: Input folder '{input_folder}' not found!")
+            time.sleep(interval)
+            continue
+
+        pending = []
+        now = time.time()
+        for file_path, stat in discover_configured_inputs(config):
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if seen.get(file_path) != signature and now - stat.st_mtime >= interval:
+                pending.append((file_path, signature))
+
+        exporter = None
+        namer = None
+        for file_path, signature in pending:
+            config = watcher.current()
+            print(f"\nProcessing file: {os.path.basename(file_path)}")
+            try:
+                os.makedirs(config.get('output_folder_path'), exist_ok=True)
+                export_folder = config.get('export_folder_path')
+                if export_folder and exporter is None:
+                    exporter = PO1Exporter(export_folder)
+                if namer is None or namer.template != (config.get('output_name_template') or DEFAULT_OUTPUT_NAME_TEMPLATE):
+                    namer = OutputNamer(config.get('output_name_template'))
+                route_file(file_path, config, True, file_counter, exporter, interactive=False, namer=namer)
             except Exception as e:
                 print(f"Error processing file {file_path}: {str(e)}")
-                file_counter += 1
-                continue
+            seen[file_path] = signature
+            file_counter += 1
+        if exporter:
+            exporter.close()
+
+        time.sleep(interval)
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Process EDI files from the configured input folder.")
+    parser.add_argument('--watch', action='store_true', help="Keep running, processing new files and reloading conf.json on change")
+    parser.add_argument('--interval', type=float, default=5.0, help="Polling interval in seconds for --watch")
+    parser.add_argument('--config', default=None, help="Configuration file (default: conf.json next to this script)")
+    args = parser.parse_args()
     try:
-        config = load_config()
-        process_files_and_save(config)
+        if args.watch:
+            watch_and_process(ConfigWatcher(args.config), args.interval)
+        else:
+            config = load_config(args.config)
+            process_files_and_save(config)
+    except KeyboardInterrupt:
+        print("\nStopped.")
     except Exception as e:
         print(f"Error: {str(e)}")
\ No newline at end of file
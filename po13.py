@@ -177,6 +177,7 @@ def switch_po1_segments(selected_po1_segments, new_elements_list):
 
     print(f"\nEnter new positions for each selected PO1 segment (1 to {len(selected_po1_segments)}). Press Enter to keep current order.")
     new_order = []
+    used_positions = set()
     for i, (seq_num, _) in enumerate(selected_po1_segments, 1):
         while True:
             user_input = input(f"New position for PO1 Segment (Sequence {seq_num}) (current position: {i}): ").strip()
@@ -186,8 +187,9 @@ def switch_po1_segments(selected_po1_segments, new_elements_list):
                 return selected_po1_segments, new_elements_list
             try:
                 pos = int(user_input)
-                if 1 <= pos <= len(selected_po1_segments) and pos not in new_order:
+                if 1 <= pos <= len(selected_po1_segments) and pos not in used_positions:
                     new_order.append(pos)
+                    used_positions.add(pos)
                     break
                 else:
                     print(f"Invalid position. Enter a unique number between 1 and {len(selected_po1_segments)}.")
@@ -295,7 +297,8 @@ def modify_edi_file(content, config, is_bulk_processing=False, file_counter=None
     filtered_body = []
     po1_index = 0
     selected_po1_index = 0
-    selected_seq_nums = [seq_num for seq_num, _ in selected_po1_segments]
+    # Sequence number -> position in the (possibly reordered) selection
+    selected_positions = {seq_num: pos for pos, (seq_num, _) in enumerate(selected_po1_segments)}
     selected_po1_lines = [line for _, line in selected_po1_segments]
 
     # Use config quantities only if specified, otherwise use user inputs
@@ -306,7 +309,7 @@ def modify_edi_file(content, config, is_bulk_processing=False, file_counter=None
         if line.startswith('PO1*'):
             po1_index += 1
             # Check if this PO1 segment is selected
-            if po1_index in selected_seq_nums:
+            if po1_index in selected_positions:
                 # Use the reordered selected PO1 segment
                 parts = selected_po1_lines[selected_po1_index].split('*')
                 selected_po1_index += 1
@@ -324,9 +327,9 @@ def modify_edi_file(content, config, is_bulk_processing=False, file_counter=None
             elif po1_index == 2 and second_qty is not None and str(second_qty).strip() != "":
                 print(f"Using config Second_PO1_Quantity: {second_qty}")
                 parts[2] = str(second_qty)
-            elif po1_index in selected_seq_nums and new_elements_list:
+            elif po1_index in selected_positions and new_elements_list:
                 # Apply user-provided elements
-                user_elements = new_elements_list[selected_seq_nums.index(po1_index)]
+                user_elements = new_elements_list[selected_positions[po1_index]]
                 for idx, value in user_elements.items():
                     if value is not None:  # Only update if user provided a value
                         parts[idx] = value
@@ -0,0 +1,87 @@
+from bisect import bisect_left
+
+# PO1 elements 6/7, 8/9, ... 24/25 are product ID qualifier/value pairs
+PO1_PRODUCT_ID_PAIRS = [(idx, idx + 1) for idx in range(6, 25, 2)]
+VENDOR_ID_QUALIFIERS = {'VN', 'VA', 'VP'}
+
+def normalize_quantity(value):
+    """Normalize a quantity so '5', '5.0' and '05' index to the same key."""
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return str(int(number)) if number.is_integer() else repr(number)
+
+class PO1Index:
+    """In-memory index from PO1 product IDs, vendor IDs and quantities to sequence numbers.
+
+    Built once when a file is loaded. Keys are (field, value) where field is
+    'id' (any product ID), 'vendor' (VN/VA/VP IDs), 'qty', or a product ID
+    qualifier such as 'UP' or 'IN'.
+    """
+
+    def __init__(self, po1_segments):
+        self._postings = {}
+        for seq, segment in enumerate(po1_segments, 1):
+            parts = segment.split('*')
+            if len(parts) > 2 and parts[2].strip():
+                self._add('qty', normalize_quantity(parts[2]), seq)
+            for qual_idx, id_idx in PO1_PRODUCT_ID_PAIRS:
+                if id_idx >= len(parts):
+                    break
+                qualifier = parts[qual_idx].strip().upper()
+                product_id = parts[id_idx].strip().upper()
+                if not product_id:
+                    continue
+                self._add('id', product_id, seq)
+                if qualifier:
+                    self._add(qualifier, product_id, seq)
+                if qualifier in VENDOR_ID_QUALIFIERS:
+                    self._add('vendor', product_id, seq)
+        self._sorted_keys = sorted(self._postings)
+
+    def __len__(self):
+        return len(self._postings)
+
+    def _add(self, field, value, seq):
+        postings = self._postings.setdefault((field, value), [])
+        if not postings or postings[-1] != seq:
+            postings.append(seq)
+
+    def lookup(self, field, value):
+        """Exact match; a trailing '*' on value matches by prefix."""
+        field = field.lower() if field.lower() in ('id', 'vendor', 'qty') else field.upper()
+        value = value.strip().upper()
+        if value.endswith('*'):
+            prefix = value[:-1]
+            matches = set()
+            pos = bisect_left(self._sorted_keys, (field, prefix))
+            while pos < len(self._sorted_keys):
+                key_field, key_value = self._sorted_keys[pos]
+                if key_field != field or not key_value.startswith(prefix):
+                    break
+                matches.update(self._postings[self._sorted_keys[pos]])
+                pos += 1
+            return matches
+        if field == 'qty':
+            value = normalize_quantity(value)
+        return set(self._postings.get((field, value), ()))
+
+    def search(self, query):
+        """Return sorted PO1 sequence numbers matching every term of the query.
+
+        Terms are separated by whitespace. 'field:value' restricts the field
+        (id, vendor, qty or a qualifier like UP); a bare value searches product
+        IDs. Examples: '012345678905', 'vendor:V100', 'qty:0', 'UP:0123*'.
+        """
+        result = None
+        for term in query.split():
+            field, sep, value = term.partition(':')
+            if not sep:
+                field, value = 'id', term
+            matches = self.lookup(field, value)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        return sorted(result) if result else []
@@ -0,0 +1,141 @@
+import re
+import operator
+
+# Named PO1 elements usable in predicates; 'qual' and 'id' match any product ID pair
+PO1_PREDICATE_FIELDS = {
+    'qty': 2,
+    'uom': 3,
+    'price': 4,
+    'basis': 5,
+}
+NUMERIC_FIELDS = {'qty', 'price'}
+COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+_RANGE_RE = re.compile(r'^(\d+)?\s*-\s*(\d+)?$')
+_PREDICATE_RE = re.compile(r'^([A-Za-z]+\d*)\s*(!=|>=|<=|=|>|<)\s*(.*)$')
+
+SELECTION_HELP = (
+    "Selection syntax (comma-separated terms):\n"
+    "  3            single PO1 sequence\n"
+    "  1-500        range (also '250-' for 250 to the end)\n"
+    "  1-500:2      every 2nd sequence in the range ('all:3' for every 3rd overall)\n"
+    "  all          every PO1 segment\n"
+    "  !17, !20-30  exclude sequences\n"
+    "  qty>0        keep only segments matching a predicate (qty, price, uom, basis,\n"
+    "               qual, id or eN for element N; operators = != > >= < <=)"
+)
+
+def _parse_position(term, count):
+    """Return (start, stop, step) for a positional term, or None if it is not positional."""
+    body, _, stride = term.partition(':')
+    body = body.strip()
+    step = 1
+    if stride:
+        if not stride.strip().isdigit() or int(stride) < 1:
+            raise ValueError(f"Invalid stride in '{term}'. Use a positive number, e.g. '1-500:2'.")
+        step = int(stride)
+    if body in ('all', '*'):
+        return 1, count, step
+    if body.isdigit():
+        start = stop = int(body)
+    else:
+        match = _RANGE_RE.match(body)
+        if not match or not (match.group(1) or match.group(2)):
+            return None
+        start = int(match.group(1)) if match.group(1) else 1
+        stop = int(match.group(2)) if match.group(2) else count
+    if not (1 <= start <= stop <= count):
+        raise ValueError(f"Invalid sequence numbers '{term}'. Enter numbers between 1 and {count}.")
+    return start, stop, step
+
+def _compile_predicate(term):
+    match = _PREDICATE_RE.match(term)
+    if not match:
+        raise ValueError(f"Invalid selection term '{term}'.")
+    field, op, expected = match.group(1).lower(), match.group(2), match.group(3).strip()
+    compare = COMPARISONS[op]
+
+    if field in NUMERIC_FIELDS:
+        try:
+            expected = float(expected)
+        except ValueError:
+            raise ValueError(f"'{field}' must be compared with a number. Found: '{expected}'")
+    else:
+        expected = expected.upper()
+
+    def test(value):
+        if field in NUMERIC_FIELDS:
+            try:
+                value = float(value)
+            except ValueError:
+                return False
+        else:
+            value = value.strip().upper()
+        return compare(value, expected)
+
+    if field in ('qual', 'id'):
+        offset = 6 if field == 'qual' else 7
+        return lambda parts: any(test(parts[idx]) for idx in range(offset, len(parts), 2) if parts[idx])
+
+    if field in PO1_PREDICATE_FIELDS:
+        element_index = PO1_PREDICATE_FIELDS[field]
+    elif field.startswith('e') and field[1:].isdigit():
+        element_index = int(field[1:])
+    else:
+        raise ValueError(f"Unknown PO1 field '{field}' in '{term}'.")
+    return lambda parts: element_index < len(parts) and test(parts[element_index])
+
+def compile_selection(expression, po1_segments):
+    """Compile a selection expression into a bitmap over PO1 segments.
+
+    Returns a bytearray where position i is 1 when PO1 sequence i+1 is selected.
+    Positional terms are unioned (all segments when there are none), predicates
+    must all hold, and '!' terms are removed. Raises ValueError on bad input.
+    """
+    count = len(po1_segments)
+    include = bytearray(count)
+    exclude = bytearray(count)
+    predicates = []
+    has_positional = False
+
+    for raw_term in expression.split(','):
+        term = raw_term.strip()
+        if not term:
+            continue
+        negate = term.startswith('!')
+        if negate:
+            term = term[1:].strip()
+        position = _parse_position(term, count)
+        if position is None:
+            if negate:
+                raise ValueError(f"Exclusions take sequence numbers or ranges. Found: '!{term}'")
+            predicates.append(_compile_predicate(term))
+            continue
+        start, stop, step = position
+        target = exclude if negate else include
+        target[start - 1:stop:step] = b'\x01' * len(range(start - 1, stop, step))
+        has_positional = has_positional or not negate
+
+    if not has_positional:
+        include = bytearray(b'\x01' * count)
+
+    bitmap = bytearray(count)
+    for i in range(count):
+        if include[i] and not exclude[i]:
+            if predicates:
+                parts = po1_segments[i].split('*')
+                if not all(predicate(parts) for predicate in predicates):
+                    continue
+            bitmap[i] = 1
+    return bitmap
+
+def selected_sequence_numbers(bitmap):
+    """Sequence numbers (1-based, ascending) set in a selection bitmap."""
+    return [i + 1 for i, bit in enumerate(bitmap) if bit]
@@ -4,6 +4,21 @@ from datetime import datetime
 import os
 import json
 
+from edi_template import capture_template, save_template
+from po1_search import PO1Index
+
+# PO1 element index behind each editable Treeview column
+PO1_FIELD_INDICES = {
+    'quantity': 2,
+    'unit': 4,
+    'price': 5,
+    'product_id': 7,
+    'vendor_id': 9,
+    'product_code': 11,
+    'contract_number': 13,
+    'buyer_code': 15
+}
+
 class EDIProcessor:
     def __init__(self, root):
         self.root = root
@@ -21,6 +36,8 @@ class EDIProcessor:
         self.selected_segments = set()
         self.edited_values = {}
         self.original_content = None
+        self.po1_index = None
+        self.tree_items = {}
 
         # Main container with padding
         main_container = ttk.Frame(root, padding="20")
@@ -44,6 +61,13 @@ class EDIProcessor:
         select_file_btn = ttk.Button(file_frame, text="Select EDI File", command=self.load_file, style="Custom.TButton")
         select_file_btn.grid(row=0, column=1, padx=10)
 
+        ttk.Label(file_frame, text="Search:").grid(row=0, column=2, padx=(30, 5))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(file_frame, textvariable=self.search_var, width=40)
+        search_entry.grid(row=0, column=3, padx=5)
+        search_entry.bind('<Return>', lambda event: self.search_segments())
+        ttk.Button(file_frame, text="Find", command=self.search_segments, style="Custom.TButton").grid(row=0, column=4, padx=5)
+
         # PO1 Segments Display with improved styling
         segments_frame = ttk.LabelFrame(main_container, text="PO1 Segments", padding="10")
         segments_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 20))
@@ -110,11 +134,13 @@ class EDIProcessor:
         button_frame.columnconfigure(1, weight=1)
         button_frame.columnconfigure(2, weight=1)
         button_frame.columnconfigure(3, weight=1)
+        button_frame.columnconfigure(4, weight=1)
 
         ttk.Button(button_frame, text="Save Changes", command=self.save_changes, style="Custom.TButton").grid(row=0, column=0, padx=5)
         ttk.Button(button_frame, text="Move Up", command=self.move_up, style="Custom.TButton").grid(row=0, column=1, padx=5)
         ttk.Button(button_frame, text="Move Down", command=self.move_down, style="Custom.TButton").grid(row=0, column=2, padx=5)
         ttk.Button(button_frame, text="Process File", command=self.process_file, style="Custom.TButton").grid(row=0, column=3, padx=5)
+        ttk.Button(button_frame, text="Save Template", command=self.save_template, style="Custom.TButton").grid(row=0, column=4, padx=5)
 
         # Status bar
         self.status_var = tk.StringVar()
@@ -154,6 +180,7 @@ class EDIProcessor:
             self.po1_segments = []
             self.selected_segments.clear()
             self.edited_values.clear()
+            self.tree_items.clear()
             
             lines = self.original_content.split('\n') if '\n' in self.original_content else self.original_content.split('~')
             lines = [line.strip().rstrip('~') for line in lines if line.strip()]
@@ -176,7 +203,7 @@ class EDIProcessor:
                     }
                     self.po1_segments.append(segment_data)
                     
-                    self.tree.insert('', 'end', values=(
+                    self.tree_items[seq] = self.tree.insert('', 'end', values=(
                         '☐', seq,
                         segment_data['quantity'],
                         segment_data['unit'],
@@ -189,12 +216,32 @@ class EDIProcessor:
                     ))
                     seq += 1
             
+            self.po1_index = PO1Index([segment['content'] for segment in self.po1_segments])
             self.status_var.set(f"Loaded {len(self.po1_segments)} PO1 segments")
             messagebox.showinfo("Success", f"Found {len(self.po1_segments)} PO1 segments")
         except Exception as e:
             self.status_var.set("Error loading file")
             messagebox.showerror("Error", f"Error loading file: {str(e)}")
 
+    def search_segments(self):
+        if self.po1_index is None:
+            self.status_var.set("No file loaded")
+            return
+        query = self.search_var.get().strip()
+        if not query:
+            self.tree.selection_remove(self.tree.selection())
+            self.status_var.set("Search cleared")
+            return
+
+        matches = self.po1_index.search(query)
+        items = [self.tree_items[seq] for seq in matches]
+        self.tree.selection_set(items)
+        if items:
+            self.tree.see(items[0])
+            self.status_var.set(f"Found {len(items)} matching segment(s): {', '.join(str(seq) for seq in matches[:20])}")
+        else:
+            self.status_var.set(f"No segments match '{query}'")
+
     def on_click(self, event):
         region = self.tree.identify_region(event.x, event.y)
         if region == "cell":
@@ -283,6 +330,7 @@ class EDIProcessor:
             
             self.tree.item(item, values=prev_values)
             self.tree.item(prev_item, values=values)
+            self.tree_items[prev_values[1]], self.tree_items[values[1]] = item, prev_item
             self.tree.selection_set(prev_item)
             self.status_var.set(f"Moved segment {values[1]} up")
 
@@ -300,9 +348,40 @@ class EDIProcessor:
             
             self.tree.item(item, values=next_values)
             self.tree.item(next_item, values=values)
+            self.tree_items[next_values[1]], self.tree_items[values[1]] = item, next_item
             self.tree.selection_set(next_item)
             self.status_var.set(f"Moved segment {values[1]} down")
 
+    def save_template(self):
+        if not self.po1_segments:
+            self.status_var.set("No file loaded")
+            messagebox.showerror("Error", "No file loaded")
+            return
+
+        # Current Treeview order is the output order; checked rows (or all rows) are kept
+        order = [int(self.tree.item(item)['values'][1]) for item in self.tree.get_children()]
+        selected = {int(seq) for seq in self.selected_segments} or set(order)
+        order = [seq for seq in order if seq in selected]
+
+        overrides = {}
+        for seq, edited in self.edited_values.items():
+            original = self.po1_segments[int(seq) - 1]
+            overrides[int(seq)] = {
+                idx: str(edited[field]) for field, idx in PO1_FIELD_INDICES.items()
+                if str(edited[field]) != original[field]
+            }
+
+        template_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Edit Templates", "*.json")])
+        if not template_path:
+            return
+        try:
+            save_template(capture_template(selected, overrides, order), template_path)
+            self.status_var.set(f"Template saved: {os.path.basename(template_path)}")
+            messagebox.showinfo("Success", f"Template saved as:\n{os.path.basename(template_path)}")
+        except (OSError, ValueError) as e:
+            self.status_var.set("Error saving template")
+            messagebox.showerror("Error", f"Error saving template: {str(e)}")
+
     def process_file(self):
         if not self.file_path:
             self.status_var.set("No file loaded")
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+
+PO_REGISTRY_FILENAME = 'po_numbers.sqlite'
+# BEG03 is at most 22 characters in X12
+MAX_PO_NUMBER_LENGTH = 22
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    base TEXT PRIMARY KEY,
+    next_suffix INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS issued (
+    po_number TEXT PRIMARY KEY,
+    base TEXT NOT NULL,
+    suffix INTEGER NOT NULL,
+    source_file TEXT,
+    issued_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issued_base ON issued (base, suffix);
+"""
+
+def format_po_number(base, suffix):
+    return f"{base}T{suffix}"
+
+class POAllocator:
+    """Hands out BEG03 suffixes that stay unique across runs and worker processes.
+
+    Each base PO number has a persistent counter, and every issued number is
+    recorded so a suffix that was already used is never handed out again.
+    A number longer than MAX_PO_NUMBER_LENGTH is refused rather than issued.
+    Allocation runs inside BEGIN IMMEDIATE, so concurrent workers serialize
+    on the database write lock instead of racing on the counter.
+    """
+
+    def __init__(self, db_path, timeout=30.0):
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+        self._conn.executescript(SCHEMA)
+
+    def allocate(self, base, source_file=None):
+        """Reserve the next free suffix for base. Returns (suffix, po_number)."""
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT next_suffix FROM counters WHERE base = ?', (base,)).fetchone()
+            suffix = row[0] if row else 1
+            while conn.execute('SELECT 1 FROM issued WHERE po_number = ?', (format_po_number(base, suffix),)).fetchone():
+                suffix += 1
+            po_number = format_po_number(base, suffix)
+            if len(po_number) > MAX_PO_NUMBER_LENGTH:
+                raise ValueError(f"Error: PO number '{po_number}' is longer than {MAX_PO_NUMBER_LENGTH} characters; use a shorter po_number")
+            conn.execute(
+                'INSERT INTO issued (po_number, base, suffix, source_file, issued_at) VALUES (?, ?, ?, ?, ?)',
+                (po_number, base, suffix, source_file, datetime.now().isoformat(timespec='seconds'))
+            )
+            conn.execute(
+                'INSERT INTO counters (base, next_suffix) VALUES (?, ?) '
+                'ON CONFLICT(base) DO UPDATE SET next_suffix = excluded.next_suffix',
+                (base, suffix + 1)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return suffix, po_number
+
+    def is_issued(self, po_number):
+        return self._conn.execute('SELECT 1 FROM issued WHERE po_number = ?', (po_number,)).fetchone() is not None
+
+    def issued_numbers(self, base=None):
+        if base:
+            cursor = self._conn.execute('SELECT po_number, source_file, issued_at FROM issued WHERE base = ? ORDER BY suffix', (base,))
+        else:
+            cursor = self._conn.execute('SELECT po_number, source_file, issued_at FROM issued ORDER BY base, suffix')
+        return cursor.fetchall()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show or allocate PO numbers from the persistent registry.")
+    parser.add_argument('registry', help=f"Registry database (normally {PO_REGISTRY_FILENAME} in the state folder)")
+    parser.add_argument('--base', help="Only list numbers issued for this base PO number")
+    parser.add_argument('--allocate', action='store_true', help="Allocate the next number for --base and print it")
+    args = parser.parse_args()
+    try:
+        with POAllocator(args.registry) as allocator:
+            if args.allocate:
+                if not args.base:
+                    raise ValueError("Error: --allocate requires --base")
+                print(allocator.allocate(args.base)[1])
+            else:
+                for po_number, source_file, issued_at in allocator.issued_numbers(args.base):
+                    print(f"{po_number}\t{issued_at}\t{source_file or ''}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
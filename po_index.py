@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+
+PO_INDEX_FILENAME = 'po_index.sqlite'
+INSERT_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    input_file TEXT NOT NULL,
+    output_file TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    po_number TEXT NOT NULL,
+    po_date TEXT
+);
+CREATE TABLE IF NOT EXISTS po_lines (
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    po_number TEXT,
+    line_seq INTEGER NOT NULL,
+    assigned_id TEXT,
+    quantity REAL,
+    uom TEXT,
+    product_qualifier TEXT,
+    product_id TEXT
+);
+CREATE INDEX IF NOT EXISTS purchase_orders_po_number ON purchase_orders (po_number);
+CREATE INDEX IF NOT EXISTS po_lines_product_id ON po_lines (product_id);
+CREATE INDEX IF NOT EXISTS po_lines_po_number ON po_lines (po_number);
+"""
+
+def _element(parts, idx):
+    return parts[idx].strip() if idx < len(parts) else ''
+
+def _number(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class POIndex:
+    """On-disk index of the BEG03/BEG05 and PO1 product IDs/quantities in every processed file.
+
+    add_file reads the segments once, so it works on a list or a stream, and
+    inserts in batches inside one transaction per file. Lookups by PO number
+    or product ID use the indexes and accept * and ? wildcards.
+    """
+
+    def __init__(self, db_path, timeout=30.0):
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=timeout)
+        self._conn.executescript(SCHEMA)
+
+    def add_file(self, lines, input_file, output_file=None):
+        """Index the purchase orders in one file's segments. Returns the number of PO1 lines indexed."""
+        with self._conn:
+            file_id = self._conn.execute(
+                'INSERT INTO files (input_file, output_file, indexed_at) VALUES (?, ?, ?)',
+                (input_file, output_file, datetime.now().isoformat(timespec='seconds'))
+            ).lastrowid
+            po_number = None
+            line_seq = 0
+            line_count = 0
+            rows = []
+            for line in lines:
+                if line.startswith('BEG*'):
+                    parts = line.split('*')
+                    po_number = _element(parts, 3)
+                    line_seq = 0
+                    self._conn.execute('INSERT INTO purchase_orders (file_id, po_number, po_date) VALUES (?, ?, ?)',
+                                       (file_id, po_number, _element(parts, 5)))
+                elif line.startswith('PO1*'):
+                    parts = line.split('*')
+                    line_seq += 1
+                    line_count += 1
+                    line_row = (file_id, po_number, line_seq, _element(parts, 1), _number(_element(parts, 2)), _element(parts, 3))
+                    pairs = [(_element(parts, idx), _element(parts, idx + 1)) for idx in range(6, len(parts), 2)]
+                    pairs = [pair for pair in pairs if pair[1]] or [('', '')]
+                    rows.extend(line_row + pair for pair in pairs)
+                    if len(rows) >= INSERT_BATCH_SIZE:
+                        self._insert_lines(rows)
+                        rows = []
+            self._insert_lines(rows)
+        return line_count
+
+    def _insert_lines(self, rows):
+        if rows:
+            self._conn.executemany(
+                'INSERT INTO po_lines (file_id, po_number, line_seq, assigned_id, quantity, uom, product_qualifier, product_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def find_po(self, pattern):
+        """Files containing a BEG03 matching pattern: (po_number, po_date, input_file, output_file, indexed_at)."""
+        return self._conn.execute(
+            'SELECT p.po_number, p.po_date, f.input_file, f.output_file, f.indexed_at '
+            'FROM purchase_orders p JOIN files f ON f.id = p.file_id '
+            'WHERE p.po_number GLOB ? ORDER BY f.indexed_at, p.po_number',
+            (pattern,)
+        ).fetchall()
+
+    def find_product(self, pattern):
+        """PO1 lines with a product ID matching pattern: (product_id, po_number, line_seq, quantity, uom, input_file, output_file)."""
+        return self._conn.execute(
+            'SELECT l.product_id, l.po_number, l.line_seq, l.quantity, l.uom, f.input_file, f.output_file '
+            'FROM po_lines l JOIN files f ON f.id = l.file_id '
+            'WHERE l.product_id GLOB ? ORDER BY f.indexed_at, l.po_number, l.line_seq',
+            (pattern,)
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Find which files contain a PO number or product ID.")
+    parser.add_argument('index', help=f"Index database (normally {PO_INDEX_FILENAME} in the state folder)")
+    parser.add_argument('--po', help="BEG03 PO number to look up (* and ? wildcards allowed)")
+    parser.add_argument('--product', help="PO1 product ID to look up (* and ? wildcards allowed)")
+    args = parser.parse_args()
+    try:
+        if not args.po and not args.product:
+            raise ValueError("Error: Give --po or --product")
+        with POIndex(args.index) as index:
+            rows = index.find_po(args.po) if args.po else index.find_product(args.product)
+            for row in rows:
+                print('\t'.join('' if value is None else str(value) for value in row))
+            print(f"{len(rows)} match(es)")
+    except Exception as e:
+        print(f"Error: {str(e)}")
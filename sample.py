@@ -4,9 +4,11 @@ import glob
 from datetime import datetime, timedelta
 import re
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, ttk, filedialog
 import uuid
 
+from edi_template import capture_template, save_template
+
 def find_config_file(filename="conf.json"):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(script_dir, filename)
@@ -141,7 +143,7 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
             po1_groups.append((0, current_group))
 
     # Process segments
-    selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+    selected_seq_nums = {seq_num for seq_num, _ in selected_segments}
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
@@ -305,7 +307,8 @@ class EDIEditorGUI:
         self.button_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.E))
         
         ttk.Button(self.button_frame, text="Apply Changes", command=self.apply_changes).grid(row=0, column=0, padx=5)
-        ttk.Button(self.button_frame, text="Cancel", command=self.root.destroy).grid(row=0, column=1, padx=5)
+        ttk.Button(self.button_frame, text="Save as Template", command=self.save_template).grid(row=0, column=1, padx=5)
+        ttk.Button(self.button_frame, text="Cancel", command=self.root.destroy).grid(row=0, column=2, padx=5)
         
         self.main_frame.columnconfigure(0, weight=1)
         self.main_frame.rowconfigure(0, weight=1)
@@ -373,6 +376,38 @@ class EDIEditorGUI:
             f.write(updated_content)
         print(f"Saved output to: {output_path}")
 
+    def save_template(self):
+        if not self.selected_segments:
+            messagebox.showerror("Template Error", "Select at least one PO1 segment before saving a template.")
+            return
+        try:
+            new_order = [int(var.get()) for var in self.order_vars]
+        except ValueError:
+            messagebox.showerror("Validation Error", "Invalid position input. Enter numbers only.")
+            return
+        if sorted(new_order) != list(range(1, len(new_order) + 1)):
+            messagebox.showerror("Validation Error", f"Invalid position order. Use unique numbers from 1 to {len(new_order)}")
+            return
+
+        # Record only the values that differ from the loaded file
+        order = [None] * len(new_order)
+        overrides = {}
+        for (seq_num, segment), entries, new_pos in zip(self.selected_segments, self.element_entries, new_order):
+            order[new_pos - 1] = seq_num
+            parts = segment.split('*')
+            overrides[seq_num] = {idx: entry.get() for idx, entry in entries.items() if entry.get() != parts[idx]}
+
+        template_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Edit Templates", "*.json")])
+        if not template_path:
+            return
+        try:
+            template = capture_template([seq_num for seq_num, _ in self.selected_segments], overrides, order)
+            save_template(template, template_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Template Error", str(e))
+            return
+        messagebox.showinfo("Success", f"Template saved as:\n{os.path.basename(template_path)}")
+
     def apply_changes(self):
         # Validate quantities
         for i, entries in enumerate(self.element_entries):
@@ -400,8 +435,7 @@ class EDIEditorGUI:
         
         # Prepare new elements list
         new_elements_list = []
-        for seq_num, _ in reordered_segments:
-            entries = reordered_entries[reordered_segments.index((seq_num, self.po1_segments[seq_num-1]))]
+        for (seq_num, _), entries in zip(reordered_segments, reordered_entries):
             elements = {idx: entry.get() for idx, entry in entries.items()}
             new_elements_list.append((seq_num, elements))
         
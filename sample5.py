@@ -4,6 +4,9 @@ import glob
 from datetime import datetime, timedelta
 import re
 
+from po1_search import PO1Index
+from po1_select import SELECTION_HELP, compile_selection, selected_sequence_numbers
+
 # PO1 element descriptions for better user interaction
 PO1_ELEMENT_DESCRIPTIONS = {
     1: "Assigned Identification",
@@ -149,28 +152,44 @@ def select_po1_segments(po1_segments):
     for i, segment in enumerate(po1_segments, 1):
         print(f"[ ] PO_sequence {i}: {segment[:80]}..." if len(segment) > 80 else f"[ ] PO_sequence {i}: {segment}")
 
-    print("\nSelect PO1 segments by entering sequence numbers (e.g., '1,3,5'). Press Enter to select none:")
+    po1_index = PO1Index(po1_segments)
+
+    print("\nSelect PO1 segments by entering sequence numbers (e.g., '1,3,5', '1-500', '1-500,!17,qty>0'). Press Enter to select none:")
+    print("To filter, enter '/' followed by a search (e.g., '/012345678905', '/vendor:V100', '/qty:0', '/UP:0123*').")
     while True:
         user_input = input("Sequence numbers: ").strip()
         if user_input == "":
             print("No segments selected for updating.")
             return []
 
-        try:
-            selected_indices = [int(x.strip()) for x in user_input.split(',')]
-            if not all(1 <= x <= len(po1_segments) for x in selected_indices):
-                print(f"Invalid sequence numbers. Enter numbers between 1 and {len(po1_segments)}.")
+        if user_input.startswith('/'):
+            matches = po1_index.search(user_input[1:])
+            if not matches:
+                print(f"No PO1 segments match '{user_input[1:].strip()}'.")
+                continue
+            for seq_num in matches:
+                segment = po1_segments[seq_num-1]
+                print(f"[ ] PO_sequence {seq_num}: {segment[:80]}..." if len(segment) > 80 else f"[ ] PO_sequence {seq_num}: {segment}")
+            if input(f"Select these {len(matches)} segment(s)? (y/N): ").strip().lower() != 'y':
                 continue
-            if len(set(selected_indices)) != len(selected_indices):
-                print("Duplicate sequence numbers detected. Enter unique numbers.")
+            user_input = ','.join(str(seq_num) for seq_num in matches)
+
+        if user_input in ('?', 'help'):
+            print(SELECTION_HELP)
+            continue
+
+        try:
+            selected_indices = selected_sequence_numbers(compile_selection(user_input, po1_segments))
+            if not selected_indices:
+                print("No PO1 segments match the selection. Try again or press Enter to select none.")
                 continue
             selected_segments = [(i, po1_segments[i-1]) for i in selected_indices]
             print("\nSelected PO1 segments:")
             for seq_num, segment in selected_segments:
                 print(f"[✓] PO_sequence {seq_num}: {segment[:80]}..." if len(segment) > 80 else f"[✓] PO_sequence {seq_num}: {segment}")
             return selected_segments
-        except ValueError:
-            print("Invalid input. Enter comma-separated numbers (e.g., '1,3,5').")
+        except ValueError as e:
+            print(f"Invalid input: {e} Enter '?' for the selection syntax.")
 
 def get_user_input_for_po1_elements(selected_po1_segments):
     """Prompt user to edit specific elements in selected PO1 segments."""
@@ -265,7 +284,7 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
             po1_groups.append((0, current_group))
 
     # Process selected PO1 segments and other segments
-    selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+    selected_seq_nums = {seq_num for seq_num, _ in selected_segments}
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+ISA = "ISA*00*          *00*          *ZZ*SENDER1        *ZZ*RECEIVER1      *240101*1200*U*00401*{isa13}*0*P*>"
+
+def build_850(po_numbers=('PO1000',), po1_count=3, isa13='000000101', gs06='101', terminator='~', line_break='\n'):
+    """A valid 850 interchange with one ST per PO number and po1_count PO1 groups (PO1 + PID) each."""
+    lines = [ISA.format(isa13=isa13), f"GS*PO*SENDER1*RECEIVER1*20240101*1200*{gs06}*X*004010"]
+    for st_number, po_number in enumerate(po_numbers, 1):
+        control = f"{st_number:04d}"
+        body = [f"ST*850*{control}", f"BEG*00*SA*{po_number}**20240101", "DTM*002*20240115"]
+        for seq in range(1, po1_count + 1):
+            body.append(f"PO1*{seq}*{seq}*EA*1.25*PE*UP*{seq:012d}*VN*V{seq}")
+            body.append(f"PID*F****ITEM {seq}")
+        body.append(f"CTT*{po1_count}")
+        body.append(f"SE*{len(body) + 1}*{control}")
+        lines.extend(body)
+    lines.append(f"GE*{len(po_numbers)}*{gs06}")
+    lines.append(f"IEA*1*{isa13}")
+    return ''.join(line + terminator + line_break for line in lines)
+
+def read_segments(path, terminator='~'):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [segment.strip() for segment in f.read().split(terminator) if segment.strip()]
+
+@pytest.fixture
+def config(tmp_path):
+    """The repo's conf.json pointed at temporary folders, with the persistent side features off."""
+    with open(os.path.join(ROOT, 'conf.json'), 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    raw.update({
+        'input_folder_path': str(tmp_path / 'in'),
+        'output_folder_path': str(tmp_path / 'out'),
+        'state_folder_path': str(tmp_path / 'state'),
+        'assign_control_numbers': False,
+        'skip_duplicates': False,
+        'index_purchase_orders': False,
+    })
+    os.makedirs(raw['input_folder_path'])
+    return raw
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import subprocess
+
+from conftest import ROOT, build_850, read_segments
+
+def run_final(config, tmp_path, answers=''):
+    config_path = tmp_path / 'conf.json'
+    config_path.write_text(json.dumps(config), encoding='utf-8')
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'final.py'), '--config', str(config_path)],
+                            input=answers, capture_output=True, text=True, cwd=str(tmp_path), timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'Error' not in result.stdout, result.stdout
+    return result.stdout
+
+def output_files(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path / 'out') if name.startswith('processed_'))
+
+def test_script_splits_transaction_sets(config, tmp_path):
+    config['split_transactions'] = True
+    (tmp_path / 'in' / 'po.edi').write_text(build_850(po_numbers=('PO1', 'PO2')), encoding='utf-8')
+    run_final(config, tmp_path)
+    outputs = output_files(tmp_path)
+    assert len(outputs) == 2
+    for name in outputs:
+        assert sum(segment.startswith('ST*') for segment in read_segments(tmp_path / 'out' / name)) == 1
+
+def test_script_streams_large_single_line_files(config, tmp_path):
+    config['stream_threshold_bytes'] = 1
+    (tmp_path / 'in' / 'po.edi').write_text(build_850(line_break=''), encoding='utf-8')
+    stdout = run_final(config, tmp_path)
+    assert 'Processed & saved (streamed)' in stdout
+    assert len(output_files(tmp_path)) == 1
+
+def test_script_merges_and_removes_the_per_file_outputs(config, tmp_path):
+    config['merge_outputs'] = True
+    for n in range(1, 3):
+        (tmp_path / 'in' / f"po{n}.edi").write_text(build_850(isa13=f"{n:09d}", gs06=str(n)), encoding='utf-8')
+    # Two files make a bulk run, which asks for the PO1 selection of each
+    stdout = run_final(config, tmp_path, answers='\n\n')
+    assert 'Merging 2 output file(s)' in stdout
+    assert output_files(tmp_path) == []
+    merged = os.listdir(tmp_path / 'out' / 'merged')
+    assert len(merged) == 1
+    assert sum(segment.startswith('ST*') for segment in read_segments(tmp_path / 'out' / 'merged' / merged[0])) == 2
@@ -0,0 +1,30 @@
+import pickle
+
+import pytest
+
+from final import compile_config, adjust_date
+
+def test_derived_values_are_computed_once(config):
+    config.update({'ISA_Sender_ID': 'ME', 'Number_of_days_Increment_and_Decrement': '-3', 'po1_filter': 'first:2'})
+    compiled = compile_config(config)
+    assert compiled.isa_sender_id == 'ME' + ' ' * 13
+    assert compiled.gs_sender_id is None
+    assert (compiled.days_sign, compiled.days_number, compiled.day_offset) == ('-', 3, -3)
+    assert compiled.po1_filter == ('first', 2)
+    assert compiled['output_folder_path'] == config['output_folder_path']
+    assert compile_config(compiled) is compiled
+
+def test_compiled_config_is_read_only_and_picklable(config):
+    compiled = compile_config(config, version='v1')
+    with pytest.raises(AttributeError):
+        compiled.po_number = 'X'
+    with pytest.raises(TypeError):
+        compiled.raw['po_number'] = 'X'
+    copy = pickle.loads(pickle.dumps(compiled))
+    assert copy.version == 'v1'
+    assert copy.raw == compiled.raw
+
+def test_date_shift_uses_the_compiled_offset(config):
+    config['Number_of_days_Increment_and_Decrement'] = '+5'
+    assert adjust_date('20241230', compile_config(config), 'DTM') == '20250104'
+    assert adjust_date('2024', compile_config(config), 'DTM') == '2024'
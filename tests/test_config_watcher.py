@@ -0,0 +1,49 @@
+import os
+import json
+
+import pytest
+
+from final import ConfigWatcher, validate_config
+
+def write_config(path, raw):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(raw, f)
+    # Make sure the watcher sees a new mtime even on coarse file systems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_validate_config_reports_missing_key_as_value_error(config):
+    del config['ISA_Sender_ID']
+    with pytest.raises(ValueError, match="ISA_Sender_ID"):
+        validate_config(config)
+
+def test_validate_config_rejects_non_object():
+    with pytest.raises(ValueError):
+        validate_config(["not", "a", "config"])
+
+def test_watcher_keeps_previous_version_when_key_is_missing(config, tmp_path):
+    path = tmp_path / 'conf.json'
+    write_config(path, config)
+    watcher = ConfigWatcher(str(path))
+    version = watcher.current().version
+
+    broken = dict(config)
+    del broken['ISA_Sender_ID']
+    write_config(path, broken)
+    assert watcher.current().version == version
+
+    config['po_number'] = 'NEWPO'
+    write_config(path, config)
+    reloaded = watcher.current()
+    assert reloaded.version != version
+    assert reloaded.po_number == 'NEWPO'
+
+def test_validate_config_rejects_unknown_schema_validation_mode(config):
+    config['schema_validation'] = 'rejct'
+    with pytest.raises(ValueError, match="schema_validation"):
+        validate_config(config)
+
+def test_validate_config_rejects_unknown_unsupported_transaction_set_action(config):
+    config['unsupported_transaction_sets'] = 'delete'
+    with pytest.raises(ValueError, match="unsupported_transaction_sets"):
+        validate_config(config)
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from conftest import build_850
+from final import compile_config, control_number_service, split_segments
+from control_numbers import ControlNumberService, FileLock, SequentialControlNumbers, MAX_CONTROL_NUMBER, renumber_envelopes
+
+ISA_PARTS = ['ISA', '', '', '', '', 'ZZ', 'SENDER1        ', 'ZZ', 'RECEIVER1      ']
+
+def test_service_counts_per_partner_pair_and_persists(tmp_path):
+    path = str(tmp_path / 'control_numbers.json')
+    service = ControlNumberService(path)
+    assert service.next_interchange(ISA_PARTS) == '000000001'
+    assert service.next_interchange(ISA_PARTS) == '000000002'
+    assert ControlNumberService(path).next_interchange(ISA_PARTS) == '000000003'
+    assert service.next_group(['GS', 'PO', 'SENDER1', 'OTHER']) == '1'
+
+def test_service_wraps_after_the_maximum(tmp_path):
+    path = tmp_path / 'control_numbers.json'
+    path.write_text(json.dumps({'ISA|SENDER1|RECEIVER1': MAX_CONTROL_NUMBER}), encoding='utf-8')
+    assert ControlNumberService(str(path)).next_interchange(ISA_PARTS) == '000000001'
+
+def test_new_pairs_start_at_the_configured_value(tmp_path):
+    service = ControlNumberService(str(tmp_path / 'control_numbers.json'), start=500)
+    assert service.next_interchange(ISA_PARTS) == '000000500'
+    assert service.next_interchange(ISA_PARTS) == '000000501'
+
+def test_service_is_opt_in_and_keeps_its_state_outside_the_output_folder(config, tmp_path):
+    assert control_number_service(compile_config(config)) is None
+    config['assign_control_numbers'] = True
+    config['control_number_start'] = 42
+    service = control_number_service(compile_config(config))
+    assert service.next_group(['GS', 'PO', 'SENDER1', 'RECEIVER1']) == '42'
+    assert service.state_path == str(tmp_path / 'state' / 'control_numbers.json')
+    assert not (tmp_path / 'out').exists()
+
+def test_lock_gives_up_after_timeout(tmp_path):
+    lock_path = str(tmp_path / 'state.lock')
+    with FileLock(lock_path):
+        with pytest.raises(TimeoutError, match="Could not lock"):
+            with FileLock(lock_path, timeout=0.1):
+                pass
+    with FileLock(lock_path, timeout=0.1):
+        pass
+
+def test_renumber_envelopes_keeps_trailers_in_step():
+    lines, _ = split_segments(build_850(po_numbers=('PO1', 'PO2'), isa13='000000777', gs06='777'))
+    renumbered = list(renumber_envelopes(lines, SequentialControlNumbers(start=5)))
+    assert renumbered[0].split('*')[13] == '000000005'
+    assert renumbered[1].split('*')[6] == '5'
+    assert [line.split('*')[2] for line in renumbered if line.startswith(('ST*', 'SE*'))] == ['0001', '0001', '0002', '0002']
+    assert renumbered[-2:] == ['GE*2*5', 'IEA*1*000000005']
@@ -0,0 +1,77 @@
+import os
+import json
+import asyncio
+
+from conftest import build_850
+from duplicate_index import DuplicateIndex, DUPLICATE_INDEX_FILENAME, content_digest, file_digest
+from final import compile_config, route_file
+from edi_async import run_pipeline
+
+KEY = ('SENDER1', '000000101', 'abc')
+
+def test_claim_is_exclusive_until_released(tmp_path):
+    with DuplicateIndex(str(tmp_path / 'index.sqlite')) as index:
+        assert index.claim(*KEY, 'a.edi')
+        assert not index.claim(*KEY, 'b.edi')
+        assert index.lookup(*KEY)[3] == 'pending'
+        index.release(*KEY)
+        assert index.lookup(*KEY) is None
+        assert index.claim(*KEY, 'b.edi')
+
+def test_completed_interchange_stays_claimed(tmp_path):
+    with DuplicateIndex(str(tmp_path / 'index.sqlite')) as index:
+        assert index.claim(*KEY, 'a.edi')
+        index.complete(*KEY, 'out/a.edi')
+        index.release(*KEY)
+        assert index.lookup(*KEY) == ('a.edi', 'out/a.edi', index.lookup(*KEY)[2], 'done')
+        assert not index.claim(*KEY, 'b.edi')
+
+def test_stale_claim_can_be_taken_over(tmp_path):
+    with DuplicateIndex(str(tmp_path / 'index.sqlite'), stale_after=-1) as index:
+        assert index.claim(*KEY, 'crashed.edi')
+        assert index.claim(*KEY, 'retry.edi')
+        assert index.lookup(*KEY)[0] == 'retry.edi'
+
+def test_file_digest_matches_content_digest(tmp_path):
+    path = tmp_path / 'a.edi'
+    content = build_850(po1_count=50)
+    path.write_text(content, encoding='utf-8')
+    assert file_digest(str(path), chunk_size=7) == content_digest(content)
+
+def test_redelivered_file_is_skipped(config, tmp_path):
+    config['skip_duplicates'] = True
+    content = build_850()
+    first = tmp_path / 'in' / 'a.edi'
+    again = tmp_path / 'in' / 'a_again.edi'
+    first.write_text(content, encoding='utf-8')
+    again.write_text(content, encoding='utf-8')
+    config = compile_config(config)
+    assert route_file(str(first), config, interactive=False)
+    assert route_file(str(again), config, interactive=False) is None
+    with open(tmp_path / 'state' / 'duplicates.jsonl', encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['input'] for entry in entries] == [str(again)]
+    # The index, the report and the manifest stay out of the output folder
+    assert [name.startswith('processed_') for name in os.listdir(tmp_path / 'out')] == [True]
+    assert (tmp_path / 'state' / 'processing_manifest.jsonl').exists()
+
+def test_quarantined_file_releases_its_claim(config, tmp_path):
+    config['skip_duplicates'] = True
+    path = tmp_path / 'in' / 'bad.edi'
+    path.write_text(build_850().replace('IEA*1*000000101', 'IEA*1*000000999'), encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False) is None
+    with DuplicateIndex(str(tmp_path / 'state' / DUPLICATE_INDEX_FILENAME)) as index:
+        assert index.entries() == []
+
+def test_identical_files_in_one_async_run_are_written_once(config, tmp_path):
+    config['skip_duplicates'] = True
+    content = build_850()
+    for name in ('a.edi', 'b.edi', 'c.edi'):
+        (tmp_path / 'in' / name).write_text(content, encoding='utf-8')
+    written = asyncio.run(run_pipeline(config, workers=3, readers=3))
+    assert len(written) == 1
+    assert os.path.exists(written[0])
+    with open(tmp_path / 'state' / 'duplicates.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    with DuplicateIndex(str(tmp_path / 'state' / DUPLICATE_INDEX_FILENAME)) as index:
+        assert [row[1] for row in index.entries()] == ['done']
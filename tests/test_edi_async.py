@@ -0,0 +1,74 @@
+import os
+import asyncio
+
+import edi_async
+from conftest import build_850, read_segments
+from edi_async import ByteBudget, run_pipeline
+
+def write_inputs(tmp_path, count, **kwargs):
+    for n in range(1, count + 1):
+        content = build_850(isa13=f"{n:09d}", **kwargs)
+        (tmp_path / 'in' / f"po{n}.edi").write_text(content, encoding='utf-8')
+
+def test_large_single_line_files_are_streamed(config, tmp_path, monkeypatch):
+    calls = []
+    streaming = edi_async.process_file_streaming
+
+    def spy(file_path, *args):
+        calls.append(os.path.basename(file_path))
+        return streaming(file_path, *args)
+
+    monkeypatch.setattr(edi_async, 'process_file_streaming', spy)
+    config['stream_threshold_bytes'] = 1
+    write_inputs(tmp_path, 2, line_break='')
+    written = asyncio.run(run_pipeline(config, workers=2))
+    assert sorted(calls) == ['po1.edi', 'po2.edi']
+    assert len(written) == 2
+
+def test_split_mode_writes_one_file_per_transaction_set(config, tmp_path):
+    config['split_transactions'] = True
+    write_inputs(tmp_path, 2, po_numbers=('PO1', 'PO2', 'PO3'))
+    written = asyncio.run(run_pipeline(config, workers=2))
+    assert len(written) == 6
+    for path in written:
+        assert sum(segment.startswith('ST*') for segment in read_segments(path)) == 1
+
+def test_merge_runs_after_the_pipeline(config, tmp_path):
+    config['merge_outputs'] = True
+    write_inputs(tmp_path, 3)
+    written = asyncio.run(run_pipeline(config, workers=2))
+    merged = os.listdir(tmp_path / 'out' / 'merged')
+    assert len(merged) == 1
+    assert written == [str(tmp_path / 'out' / 'merged' / merged[0])]
+    segments = read_segments(written[0])
+    assert sum(segment.startswith('ST*') for segment in segments) == 3
+    assert not [name for name in os.listdir(tmp_path / 'out') if name.startswith('processed_')]
+
+def test_byte_budget_admits_oversized_file_alone():
+    async def scenario():
+        budget = ByteBudget(10)
+        await budget.acquire(50)
+        assert budget.in_flight == 50
+        waiter = asyncio.ensure_future(budget.acquire(5))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await budget.release(50)
+        await waiter
+        assert budget.in_flight == 5
+
+    asyncio.run(scenario())
+
+def test_small_budget_processes_one_file_at_a_time(config, tmp_path, monkeypatch):
+    peaks = []
+
+    class RecordingBudget(ByteBudget):
+        async def acquire(self, size):
+            await super().acquire(size)
+            peaks.append((self.in_flight, size))
+
+    monkeypatch.setattr(edi_async, 'ByteBudget', RecordingBudget)
+    write_inputs(tmp_path, 4)
+    written = asyncio.run(run_pipeline(config, workers=4, readers=4, max_inflight_bytes=10))
+    assert len(written) == 4
+    assert len(peaks) == 4
+    assert all(in_flight == size for in_flight, size in peaks)
@@ -0,0 +1,26 @@
+import csv
+
+from conftest import build_850
+from final import split_segments
+from edi_export import PO1Exporter, PO1_EXPORT_FIELDS, iter_po1_rows
+
+def test_rows_follow_po_and_line_sequence():
+    lines, _ = split_segments(build_850(po_numbers=('PO1', 'PO2'), po1_count=2))
+    rows = list(iter_po1_rows(lines, 'po.edi'))
+    assert [(row['po_number'], row['line_seq']) for row in rows] == [('PO1', 1), ('PO1', 2), ('PO2', 1), ('PO2', 2)]
+    assert rows[1]['quantity'] == 2.0
+    assert rows[1]['product_id_qualifier_1'] == 'UP'
+    assert rows[1]['product_id_2'] == 'V2'
+    assert rows[1]['pid_description'] == 'ITEM 2'
+
+def test_exporters_with_the_same_run_name_do_not_overwrite_each_other(tmp_path):
+    lines, _ = split_segments(build_850(po1_count=2))
+    with PO1Exporter(str(tmp_path), run_name='run') as first, PO1Exporter(str(tmp_path), run_name='run') as second:
+        first.add_file(lines, 'a.edi')
+        second.add_file(lines[:5], 'b.edi')
+    assert first.csv_path != second.csv_path
+    with open(first.csv_path, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == PO1_EXPORT_FIELDS
+    assert len(rows) == 3
+    assert rows[1][PO1_EXPORT_FIELDS.index('quantity')] == '1'
@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import build_850
+import edi_json
+from edi_json import detect_delimiters, from_compact, from_json, parse_interchange, to_compact, to_json, to_x12
+
+@pytest.mark.parametrize('terminator, line_break', [('~', '\n'), ('~', '\r\n'), ('~', ''), ('\\', '')])
+def test_round_trip_is_byte_for_byte(terminator, line_break):
+    content = build_850(po_numbers=('PO1', 'PO2'), terminator=terminator, line_break=line_break)
+    ir = parse_interchange(content)
+    assert to_x12(from_json(to_json(ir))) == content
+    assert to_x12(from_compact(to_compact(ir))) == content
+
+def test_po1_groups_hold_their_children():
+    ir = parse_interchange(build_850(po1_count=2))
+    transaction = ir['interchanges'][0]['groups'][0]['transactions'][0]
+    groups = [item for item in transaction['segments'] if isinstance(item, dict)]
+    assert [group['po1'][1] for group in groups] == ['1', '2']
+    assert groups[0]['children'] == [['PID', 'F', '', '', '', 'ITEM 1']]
+    assert transaction['se'][0] == 'SE'
+
+def test_delimiters_come_from_the_isa_header():
+    delimiters = detect_delimiters(build_850(terminator="'", line_break='\r\n'))
+    assert (delimiters['element'], delimiters['component'], delimiters['segment'], delimiters['line_break']) == ('*', '>', "'", '\r\n')
+
+def test_segment_outside_envelope_is_rejected():
+    content = build_850()
+    with pytest.raises(ValueError, match="outside"):
+        parse_interchange(content.replace('GS*PO', 'XX*PO', 1))
+
+def test_from_compact_only_takes_json_objects_as_json(monkeypatch):
+    assert from_compact(b'{"format": "x12-ir"}') == {'format': 'x12-ir'}
+    monkeypatch.setattr(edi_json, 'msgpack', None)
+    with pytest.raises(ValueError, match="not a JSON object"):
+        from_compact(b'{\x92\xa3ISA')
@@ -0,0 +1,48 @@
+import os
+
+from conftest import build_850, read_segments
+from edi_merge import merge_files
+
+def write_inputs(tmp_path, names, **kwargs):
+    paths = []
+    for n, name in enumerate(names, 1):
+        path = tmp_path / 'in' / name
+        path.write_text(build_850(isa13=f"{n:09d}", gs06=str(n), **kwargs), encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+def test_merged_envelope_counts_match_the_transactions(config, tmp_path):
+    paths = write_inputs(tmp_path, ['a.edi', 'b.edi', 'c.edi'], po_numbers=('PO1', 'PO2'))
+    merged = merge_files(paths, config)
+    assert len(merged) == 1
+    segments = read_segments(merged[0])
+    assert sum(segment.startswith('ST*') for segment in segments) == 6
+    assert segments[-2] == f"GE*6*{segments[1].split('*')[6]}"
+    assert segments[-1] == f"IEA*1*{segments[0].split('*')[13]}"
+    assert [segment.split('*')[2] for segment in segments if segment.startswith('ST*')] == [f"{n:04d}" for n in range(1, 7)]
+
+def test_interchange_rolls_over_at_max_transactions(config, tmp_path):
+    paths = write_inputs(tmp_path, ['a.edi', 'b.edi', 'c.edi'])
+    merged = merge_files(paths, config, max_transactions=2)
+    assert len(merged) == 2
+    counts = [read_segments(path)[-2].split('*')[1] for path in merged]
+    assert counts == ['2', '1']
+    isa13s = {read_segments(path)[0].split('*')[13] for path in merged}
+    assert len(isa13s) == 2
+
+def test_merged_file_takes_the_source_extension(config, tmp_path):
+    for name, line_break in (('single.x12', ''), ('multi.txt', '\n')):
+        paths = write_inputs(tmp_path, [name], line_break=line_break)
+        merged = merge_files(paths, config, output_folder=str(tmp_path / name))
+        assert os.path.splitext(merged[0])[1] == os.path.splitext(name)[1]
+
+def test_remove_sources_keeps_files_that_were_not_fully_merged(config, tmp_path):
+    paths = write_inputs(tmp_path, ['a.edi', 'b.edi'])
+    with open(paths[1], 'r+', encoding='utf-8') as file:
+        content = file.read()
+        file.seek(0)
+        file.write(content[:content.index('SE*')])
+        file.truncate()
+    merge_files(paths, config, remove_sources=True)
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1])
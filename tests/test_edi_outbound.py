@@ -0,0 +1,57 @@
+from conftest import build_850, read_segments
+from final import split_segments
+from edi_outbound import build_outbound_document, collect_purchase_orders, write_outbound_documents
+
+def purchase_orders():
+    lines, _ = split_segments(build_850(po_numbers=('PO1', 'PO2'), po1_count=2))
+    return collect_purchase_orders(lines)
+
+def transaction_sets(segments):
+    """The ST..SE segments of each transaction set."""
+    sets = []
+    body = None
+    for segment in segments:
+        if segment.startswith('ST*'):
+            body = []
+            sets.append(body)
+        if body is not None:
+            body.append(segment)
+        if segment.startswith('SE*'):
+            body = None
+    return sets
+
+def test_855_acknowledgment_date_is_in_bak09():
+    isa, gs, orders = purchase_orders()
+    segments = build_outbound_document('855', isa, gs, orders)
+    bak = [segment.split('*') for segment in segments if segment.startswith('BAK*')]
+    assert len(bak) == 2
+    assert bak[0][3] == 'PO1'
+    assert bak[0][5:9] == ['', '', '', '']
+    assert len(bak[0]) == 10 and len(bak[0][9]) == 8
+
+def test_outbound_envelope_is_swapped_and_counted():
+    isa, gs, orders = purchase_orders()
+    for transaction_set in ('855', '856', '810'):
+        segments = build_outbound_document(transaction_set, isa, gs, orders)
+        out_isa = segments[0].split('*')
+        assert out_isa[6].strip() == 'RECEIVER1' and out_isa[8].strip() == 'SENDER1'
+        sets = transaction_sets(segments)
+        assert len(sets) == 2
+        for body in sets:
+            assert body[0].startswith(f"ST*{transaction_set}*")
+            assert body[-1].split('*')[1] == str(len(body))
+        assert segments[-2] == f"GE*2*{gs[6]}"
+
+def test_810_total_uses_implied_decimals():
+    isa, gs, orders = purchase_orders()
+    segments = build_outbound_document('810', isa, gs, orders)
+    # Two lines per PO: quantities 1 and 2 at 1.25 each
+    assert segments.count('TDS*375') == 2
+
+def test_written_documents_use_the_source_terminator(tmp_path):
+    lines, _ = split_segments(build_850(), '~')
+    paths = write_outbound_documents(lines, 'po.edi', str(tmp_path), ['855', '856'])
+    assert len(paths) == 2
+    for path in paths:
+        assert path.endswith('.edi')
+        assert read_segments(path)[-1].startswith('IEA*1*')
@@ -0,0 +1,41 @@
+import os
+
+from conftest import build_850, read_segments
+from final import OutputNamer, split_segments
+from control_numbers import SequentialControlNumbers
+from edi_split import TransactionSplitter
+
+def split(tmp_path, content, control_numbers=None):
+    splitter = TransactionSplitter(str(tmp_path), 'po.edi', OutputNamer('{stem}_{beg03}{ext}'), control_numbers=control_numbers)
+    for line in split_segments(content)[0]:
+        splitter.feed(line)
+    return splitter.close()
+
+def test_each_transaction_set_gets_its_own_counted_interchange(tmp_path):
+    # Cumulative counts, as the whole-file transform leaves them
+    content = build_850(po_numbers=('PO1', 'PO2', 'PO3'), po1_count=2).replace('CTT*2', 'CTT*6').replace('SE*9*0002', 'SE*18*0002')
+    paths = split(tmp_path, content)
+    assert [os.path.basename(path) for path in paths] == ['po_PO1.edi', 'po_PO2.edi', 'po_PO3.edi']
+    for n, path in enumerate(paths, 1):
+        segments = read_segments(path)
+        assert segments[0].split('*')[13] == '000000101'
+        assert sum(segment.startswith('ST*') for segment in segments) == 1
+        assert 'CTT*2' in segments
+        assert f"SE*9*{n:04d}" in segments
+        assert segments[-2:] == ['GE*1*101', 'IEA*1*000000101']
+
+def test_split_outputs_get_their_own_control_numbers(tmp_path):
+    paths = split(tmp_path, build_850(po_numbers=('PO1', 'PO2')), SequentialControlNumbers())
+    for n, path in enumerate(paths, 1):
+        segments = read_segments(path)
+        assert segments[0].split('*')[13] == f"{n:09d}"
+        assert segments[2] == 'ST*850*0001'
+        assert segments[-2:] == [f"GE*1*{n}", f"IEA*1*{n:09d}"]
+
+def test_unfinished_transaction_set_is_not_written(tmp_path):
+    content = build_850(po_numbers=('PO1', 'PO2'))
+    lines = split_segments(content)[0]
+    last_se = max(i for i, line in enumerate(lines) if line.startswith('SE*'))
+    paths = split(tmp_path, '\n'.join(line + '~' for line in lines[:last_se]))
+    assert len(paths) == 1
+    assert not any(name.endswith('.part') for name in os.listdir(tmp_path))
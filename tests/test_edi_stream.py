@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from conftest import build_850
+from final import apply_po1_filter, compile_config, route_file, split_segments
+import edi_stream
+from edi_stream import _inspect_segments, iter_file_segments
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_segments_are_reassembled_across_chunks(chunk_size):
+    content = build_850(po1_count=5, line_break='')
+    expected = [segment for segment in content.split('~') if segment]
+    assert list(iter_file_segments(io.StringIO(content), '~', chunk_size)) == expected
+
+def test_streamed_output_matches_the_in_memory_transform(config, tmp_path, monkeypatch):
+    streamed = []
+    streaming = edi_stream.process_file_streaming
+
+    def spy(file_path, *args, **kwargs):
+        streamed.append(file_path)
+        return streaming(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(edi_stream, 'process_file_streaming', spy)
+    config.update({'po_number': 'NEWPO', 'Number_of_days_Increment_and_Decrement': '+2'})
+    path = tmp_path / 'in' / 'big.edi'
+    path.write_text(build_850(po_numbers=('PO1', 'PO2'), po1_count=4, line_break=''), encoding='utf-8')
+    outputs = []
+    for threshold in (0, 1):
+        config.update({'stream_threshold_bytes': threshold, 'output_folder_path': str(tmp_path / f"out{threshold}")})
+        output_path = route_file(str(path), compile_config(config), interactive=False)
+        with open(output_path, encoding='utf-8') as f:
+            outputs.append(f.read())
+    assert streamed == [str(path)]
+    assert outputs[0] == outputs[1]
+    assert 'BEG*00*SA*NEWPO**20240101' in outputs[1]
+    assert 'DTM*002*20240117' in outputs[1]
+
+def test_input_is_read_in_two_full_passes(config, tmp_path, monkeypatch):
+    full_passes = []
+    reader = edi_stream.iter_file_segments
+
+    def counting(file, *args):
+        yield from reader(file, *args)
+        full_passes.append(file.name)
+
+    monkeypatch.setattr(edi_stream, 'iter_file_segments', counting)
+    config.update({'stream_threshold_bytes': 1, 'skip_duplicates': True})
+    path = tmp_path / 'in' / 'big.edi'
+    path.write_text(build_850(po1_count=4, line_break=''), encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False)
+    assert full_passes == [str(path), str(path)]
+
+def test_po1_outline_gives_the_same_prompt_list_as_the_filtered_file(config):
+    config['po1_filter'] = 'last:2'
+    compiled = compile_config(config)
+    lines = split_segments(build_850(po_numbers=('PO1', 'PO2'), po1_count=4))[0]
+    outline = []
+    assert list(_inspect_segments(iter(lines), outline)) == lines
+    expected = [line for line in apply_po1_filter(lines, compiled) if line.startswith('PO1*')]
+    assert [line for line in apply_po1_filter(outline, compiled) if line.startswith('PO1*')] == expected
+    assert len(expected) == 4
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import build_850, read_segments
+from test_routing import build_875
+from final import compile_config, split_segments
+from edi_template import apply_template, apply_template_to_files, capture_template, validate_template
+
+def test_capture_template_rejects_order_that_does_not_match_selection():
+    with pytest.raises(ValueError, match="order"):
+        capture_template([1, 2], {}, order=[1, 3])
+
+def test_validate_template_rejects_po1_sequence_edit():
+    template = capture_template([1], {})
+    template['elements'] = {'1': {'1': '9'}}
+    with pytest.raises(ValueError, match="element 1"):
+        validate_template(template)
+
+def test_validate_template_rejects_sequences_below_one():
+    template = capture_template([1], {})
+    template['selected'] = template['order'] = [0, 1]
+    with pytest.raises(ValueError, match="sequence 0"):
+        validate_template(template)
+
+def test_override_past_the_last_element_pads_the_po1(config):
+    template = capture_template([1], {1: {12: 'NOTE'}})
+    output = apply_template(build_850(po1_count=1), template, compile_config(config))
+    po1 = [line for line in split_segments(output, '~')[0] if line.startswith('PO1*')][0]
+    assert po1.split('*')[10:] == ['', '', 'NOTE']
+
+@pytest.mark.parametrize('terminator, line_break', [('~', '\n'), ('\\', ''), ("'", '\n')])
+def test_apply_template_uses_the_interchange_terminator(config, terminator, line_break):
+    content = build_850(po1_count=3, terminator=terminator, line_break=line_break)
+    template = capture_template([1, 3], {3: {4: '9.99'}}, order=[3, 1])
+    output = apply_template(content, template, compile_config(config))
+    lines, _ = split_segments(output, terminator)
+    po1_lines = [line for line in lines if line.startswith('PO1*')]
+    assert [line.split('*')[7] for line in po1_lines] == ['000000000003', '000000000001']
+    assert po1_lines[0].split('*')[4] == '9.99'
+    assert 'CTT*2' in lines
+    assert output.count(terminator) == len(lines)
+
+def test_replay_goes_through_the_file_pipeline(config, tmp_path):
+    config['po_number'] = 'NEWPO'
+    config['skip_duplicates'] = True
+    config['duplicate_index_path'] = str(tmp_path / 'index.sqlite')
+    paths = []
+    for name, content in (('a.edi', build_850(po1_count=3)), ('copy.edi', build_850(po1_count=3)), ('b.edi', build_875())):
+        path = tmp_path / 'in' / name
+        path.write_text(content, encoding='utf-8')
+        paths.append(str(path))
+    template = capture_template([1, 3], {}, order=[3, 1])
+    results = apply_template_to_files(template, paths, config, workers=1)
+    written = [results[path] for path in paths]
+    # The copy is a duplicate of a.edi, whichever of the two was saved first
+    assert sum(path is None for path in written[:2]) == 1
+    po1_lines = [segment for segment in read_segments(next(path for path in written[:2] if path)) if segment.startswith('PO1*')]
+    assert [line.split('*')[7] for line in po1_lines] == ['000000000003', '000000000001']
+    assert any(segment.startswith('G50*G*20240101*NEWPO') for segment in read_segments(written[2]))
@@ -0,0 +1,63 @@
+import os
+
+from conftest import build_850, read_segments
+from final import compile_config, route_file, split_segments
+from edi_validate import validate_file, validate_structure
+
+def segments(content):
+    return split_segments(content)[0]
+
+def test_valid_interchange_has_no_errors():
+    assert validate_file(segments(build_850(po_numbers=('PO1', 'PO2')))) == ([], [])
+
+def test_envelope_counts_and_control_numbers_are_checked():
+    lines = segments(build_850())
+    lines[-1] = 'IEA*2*000000999'
+    lines = [line.replace('CTT*3', 'CTT*4') for line in lines]
+    errors = validate_structure(lines)
+    assert any('IEA02 control number' in error for error in errors)
+    assert any('IEA01 is 2' in error for error in errors)
+    assert any('CTT01 is 4' in error for error in errors)
+
+def test_missing_trailers_are_reported():
+    lines = [line for line in segments(build_850()) if not line.startswith('SE*')]
+    assert any('not closed by SE before GE' in error for error in validate_structure(lines))
+    lines = [line for line in lines if not line.startswith('GE*')]
+    assert any('not closed by GE before IEA' in error for error in validate_structure(lines))
+
+def test_malformed_file_is_quarantined_before_transform(config, tmp_path):
+    path = tmp_path / 'in' / 'bad.edi'
+    path.write_text(build_850().replace('SE*', 'SE*9', 1), encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False) is None
+    quarantined = sorted(os.listdir(tmp_path / 'out' / 'quarantine'))
+    assert quarantined[0].endswith('bad.edi') and quarantined[1].endswith('bad.edi.errors.txt')
+    assert not path.exists()
+
+def test_element_rules_flag_codes_lengths_and_formats():
+    lines = segments(build_850(po1_count=1))
+    lines = [line.replace('PO1*1*1*EA*1.25', 'PO1*1*one*ZZ*1.25') if line.startswith('PO1*') else line for line in lines]
+    lines = [line.replace('DTM*002*20240115', 'DTM*002*20241345') for line in lines]
+    structure_errors, element_errors = validate_file(lines)
+    assert structure_errors == []
+    assert any('PO102' in error and 'wrong format' in error for error in element_errors)
+    assert any('PO103' in error and 'not a valid code' in error for error in element_errors)
+    assert any('DTM02' in error for error in element_errors)
+    assert validate_file(lines, check_elements=False)[1] == []
+
+def test_schema_errors_are_reported_or_rejected(config, tmp_path):
+    content = build_850(po1_count=1).replace('PO1*1*1*EA', 'PO1*1*1*ZZ')
+    path = tmp_path / 'in' / 'odd_uom.edi'
+    path.write_text(content, encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False)
+    assert os.listdir(tmp_path / 'out' / 'reports') == ['odd_uom.edi.validation.txt']
+    config['schema_validation'] = 'reject'
+    assert route_file(str(path), compile_config(config), interactive=False) is None
+    assert any(name.endswith('odd_uom.edi') for name in os.listdir(tmp_path / 'out' / 'quarantine'))
+
+def test_multi_transaction_output_passes_its_own_checks(config, tmp_path):
+    path = tmp_path / 'in' / 'two.edi'
+    path.write_text(build_850(po_numbers=('PO1', 'PO2', 'PO3'), po1_count=2), encoding='utf-8')
+    output_path = route_file(str(path), compile_config(config), interactive=False)
+    lines = read_segments(output_path)
+    assert [line for line in lines if line.startswith(('CTT*', 'SE*'))] == ['CTT*2', 'SE*9*0001', 'CTT*2', 'SE*9*0002', 'CTT*2', 'SE*9*0003']
+    assert validate_file(lines) == ([], [])
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from final import discover_configured_inputs, discover_input_files
+
+def touch(path, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('x', encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+def names(found):
+    return [os.path.basename(path) for path, _ in found]
+
+def test_patterns_and_name_order(tmp_path):
+    for name, mtime in (('b.edi', 3), ('a.txt', 2), ('c.edi', 1), ('notes.md', 4)):
+        touch(tmp_path / name, mtime)
+    assert names(discover_input_files(str(tmp_path))) == ['a.txt', 'b.edi', 'c.edi']
+    assert names(discover_input_files(str(tmp_path), sort_by='mtime')) == ['c.edi', 'a.txt', 'b.edi']
+    assert names(discover_input_files(str(tmp_path), patterns=['*.md'])) == ['notes.md']
+
+def test_recursive_discovery_skips_output_folders(config, tmp_path):
+    touch(tmp_path / 'in' / 'top.edi', 1)
+    touch(tmp_path / 'in' / 'sub' / 'nested.edi', 1)
+    touch(tmp_path / 'in' / 'done' / 'processed.edi', 1)
+    config.update({'recursive_input': True, 'output_folder_path': str(tmp_path / 'in' / 'done')})
+    assert sorted(names(discover_configured_inputs(config))) == ['nested.edi', 'top.edi']
+    config['recursive_input'] = False
+    assert names(discover_configured_inputs(config)) == ['top.edi']
+
+def test_unknown_sort_key_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="input_sort"):
+        discover_input_files(str(tmp_path), sort_by='size')
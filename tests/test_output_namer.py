@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from final import OutputNamer
+
+LINES = ["ISA*00*          *00*          *ZZ*SENDER1        *ZZ*RECEIVER1      *240101*1200*U*00401*000000101*0*P*>",
+         "BEG*00*SA*PO/1**20240101"]
+
+def test_template_fields_are_filled_from_the_file(tmp_path):
+    namer = OutputNamer('{stem}_{isa13}_{beg03}_{seq}{ext}')
+    assert namer.format('in/order.edi', LINES) == 'order_000000101_PO_1_1.edi'
+    assert namer.format('in/order.edi', LINES) == 'order_000000101_PO_1_2.edi'
+
+def test_taken_names_get_a_suffix_instead_of_being_overwritten(tmp_path):
+    namer = OutputNamer('{stem}{ext}')
+    paths = [namer.write(str(tmp_path), 'order.edi', f"content {n}") for n in range(3)]
+    assert [os.path.basename(path) for path in paths] == ['order.edi', 'order_1.edi', 'order_2.edi']
+    assert open(paths[0], encoding='utf-8').read() == 'content 0'
+
+def test_unknown_template_field_is_rejected():
+    with pytest.raises(ValueError, match="unknown field"):
+        OutputNamer('{stem}_{date}{ext}')
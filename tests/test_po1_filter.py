@@ -0,0 +1,44 @@
+import pytest
+
+from conftest import build_850, read_segments
+from final import compile_config, filter_po1_groups, parse_po1_filter, route_file, split_segments
+
+def kept(mode, count, po_numbers=('PO1', 'PO2')):
+    lines = split_segments(build_850(po_numbers=po_numbers, po1_count=5))[0]
+    output = list(filter_po1_groups(iter(lines), mode, count))
+    groups = []
+    for line in output:
+        if line.startswith('ST*'):
+            groups.append([])
+        elif line.startswith('PO1*'):
+            groups[-1].append(int(line.split('*')[1]))
+    return output, groups
+
+@pytest.mark.parametrize('mode, count, expected', [
+    ('first', 2, [1, 2]),
+    ('last', 2, [4, 5]),
+    ('every', 2, [2, 4]),
+    ('first', 9, [1, 2, 3, 4, 5]),
+])
+def test_filter_applies_per_transaction_set(mode, count, expected):
+    output, groups = kept(mode, count)
+    assert groups == [expected, expected]
+
+def test_children_stay_with_their_po1_and_order_is_kept():
+    output, _ = kept('last', 1, po_numbers=('PO1',))
+    assert output[output.index('PO1*5*5*EA*1.25*PE*UP*000000000005*VN*V5') + 1] == 'PID*F****ITEM 5'
+    assert [line.split('*')[0] for line in output[-5:]] == ['PID', 'CTT', 'SE', 'GE', 'IEA']
+    assert not any('ITEM 4' in line for line in output)
+
+def test_filtered_file_is_recounted(config, tmp_path):
+    config['po1_filter'] = 'every:2'
+    path = tmp_path / 'in' / 'po.edi'
+    path.write_text(build_850(po1_count=5), encoding='utf-8')
+    segments = read_segments(route_file(str(path), compile_config(config), interactive=False))
+    assert sum(segment.startswith('PO1*') for segment in segments) == 2
+    assert 'CTT*2' in segments
+
+@pytest.mark.parametrize('value', ['first', 'top:3', 'last:0', 'every:x'])
+def test_malformed_filter_is_rejected(value):
+    with pytest.raises(ValueError, match="po1_filter"):
+        parse_po1_filter(value)
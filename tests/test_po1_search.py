@@ -0,0 +1,24 @@
+from po1_search import PO1Index, normalize_quantity
+
+PO1_SEGMENTS = [
+    "PO1*1*5*EA*1.25*PE*UP*012345678905*VN*V100",
+    "PO1*2*05.0*EA*2.50*PE*UP*012345678912*VN*V200",
+    "PO1*3*0*CA*9.00*PE*IN*ABC123",
+]
+
+def test_quantities_are_normalized():
+    assert normalize_quantity('05') == normalize_quantity('5.0') == '5'
+    assert normalize_quantity('2.5') == '2.5'
+
+def test_search_by_field_prefix_and_bare_id():
+    index = PO1Index(PO1_SEGMENTS)
+    assert index.search('012345678905') == [1]
+    assert index.search('vendor:v200') == [2]
+    assert index.search('UP:0123456789*') == [1, 2]
+    assert index.search('qty:5') == [1, 2]
+    assert index.search('qty:0') == [3]
+
+def test_search_terms_are_combined_with_and():
+    index = PO1Index(PO1_SEGMENTS)
+    assert index.search('UP:0123* vendor:V100') == [1]
+    assert index.search('UP:0123* IN:ABC123') == []
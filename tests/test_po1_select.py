@@ -0,0 +1,40 @@
+from conftest import build_850
+from final import compile_config, split_segments, transform_segments
+from edi_stream import transform_stream
+
+def po1_order(segments):
+    """The original PO1 product IDs per ST, in output order."""
+    orders = []
+    for segment in segments:
+        if segment.startswith('ST*'):
+            orders.append([])
+        elif segment.startswith('PO1*'):
+            orders[-1].append(segment.split('*')[7])
+    return orders
+
+def transform_both(config, selected):
+    lines, _ = split_segments(build_850(po_numbers=('PO1', 'PO2'), po1_count=3))
+    selected_segments = [(seq, None) for seq in selected]
+    in_memory = transform_segments(list(lines), compile_config(config), selected_segments=selected_segments)
+    streamed = list(transform_stream(list(lines), compile_config(config), selected_segments=selected_segments))
+    return in_memory, streamed
+
+def test_reordering_stays_inside_each_transaction_set(config):
+    # Groups 1-3 are in the first ST and 4-6 in the second
+    in_memory, streamed = transform_both(config, [6, 2, 4, 1])
+    assert po1_order(in_memory) == [['000000000002', '000000000001'], ['000000000003', '000000000001']]
+    assert streamed == in_memory
+
+def test_selected_index_not_in_file_is_dropped(config):
+    in_memory, streamed = transform_both(config, [9, 3, 1])
+    assert po1_order(in_memory) == [['000000000003', '000000000001'], []]
+    assert streamed == in_memory
+
+def test_large_reversed_selection(config):
+    lines, _ = split_segments(build_850(po1_count=2000))
+    selected = list(range(2000, 0, -2))
+    selected_segments = [(seq, None) for seq in selected]
+    in_memory = transform_segments(list(lines), compile_config(config), selected_segments=selected_segments)
+    streamed = list(transform_stream(list(lines), compile_config(config), selected_segments=selected_segments))
+    assert po1_order(in_memory) == [[f"{seq:012d}" for seq in selected]]
+    assert streamed == in_memory
@@ -0,0 +1,24 @@
+import pytest
+
+from po1_select import compile_selection, selected_sequence_numbers
+
+PO1_SEGMENTS = [f"PO1*{seq}*{seq % 3}*EA*{seq}.00*PE*UP*{seq:012d}" for seq in range(1, 11)]
+
+def select(expression):
+    return selected_sequence_numbers(compile_selection(expression, PO1_SEGMENTS))
+
+def test_ranges_strides_and_exclusions():
+    assert select('2, 5-7') == [2, 5, 6, 7]
+    assert select('8-') == [8, 9, 10]
+    assert select('1-10:3') == [1, 4, 7, 10]
+    assert select('all, !2-9') == [1, 10]
+
+def test_predicates_filter_the_positional_selection():
+    assert select('qty>0, price<5') == [1, 2, 4]
+    assert select('1-6, qty=0') == [3, 6]
+    assert select('id=000000000007') == [7]
+
+@pytest.mark.parametrize('expression', ['0', '3-11', '1-5:0', '!qty>0', 'weight>1', 'qty>lots'])
+def test_invalid_selections_raise_value_error(expression):
+    with pytest.raises(ValueError):
+        select(expression)
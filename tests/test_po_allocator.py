@@ -0,0 +1,32 @@
+import pytest
+
+from conftest import build_850, read_segments
+from final import compile_config, route_file
+from po_allocator import POAllocator, MAX_PO_NUMBER_LENGTH, PO_REGISTRY_FILENAME
+
+def test_suffixes_are_unique_across_allocators(tmp_path):
+    path = str(tmp_path / 'po_numbers.sqlite')
+    with POAllocator(path) as first, POAllocator(path) as second:
+        issued = [first.allocate('PO100')[1], second.allocate('PO100')[1], first.allocate('PO100')[1]]
+    assert issued == ['PO100T1', 'PO100T2', 'PO100T3']
+    with POAllocator(path) as allocator:
+        assert allocator.allocate('PO100', 'next.edi') == (4, 'PO100T4')
+        assert allocator.is_issued('PO100T2')
+        assert [row[0] for row in allocator.issued_numbers('PO100')] == ['PO100T1', 'PO100T2', 'PO100T3', 'PO100T4']
+
+def test_po_number_longer_than_beg03_is_refused(tmp_path):
+    base = 'P' * (MAX_PO_NUMBER_LENGTH - 2)
+    with POAllocator(str(tmp_path / 'po_numbers.sqlite')) as allocator:
+        assert allocator.allocate(base)[1] == base + 'T1'
+        with pytest.raises(ValueError, match="longer than 22"):
+            allocator.allocate('P' * (MAX_PO_NUMBER_LENGTH - 1))
+        assert allocator.issued_numbers('P' * (MAX_PO_NUMBER_LENGTH - 1)) == []
+
+def test_bulk_run_keeps_the_registry_in_the_state_folder(config, tmp_path):
+    config['po_number'] = 'PO100'
+    path = tmp_path / 'in' / 'po.edi'
+    path.write_text(build_850(), encoding='utf-8')
+    output_path = route_file(str(path), compile_config(config), is_bulk_processing=True, file_counter=1, interactive=False)
+    assert 'BEG*00*SA*PO100T1**20240101' in read_segments(output_path)
+    assert (tmp_path / 'state' / PO_REGISTRY_FILENAME).exists()
+    assert not (tmp_path / 'out' / PO_REGISTRY_FILENAME).exists()
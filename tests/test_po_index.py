@@ -0,0 +1,24 @@
+from conftest import build_850, read_segments
+from final import compile_config, route_file, split_segments
+from po_index import PO_INDEX_FILENAME, POIndex
+
+def test_lookup_by_po_number_and_product_id(tmp_path):
+    lines = split_segments(build_850(po_numbers=('PO100', 'PO200'), po1_count=2))[0]
+    with POIndex(str(tmp_path / 'index.sqlite')) as index:
+        assert index.add_file(lines, 'in/a.edi', 'out/a.edi') == 4
+        assert [row[0] for row in index.find_po('PO*')] == ['PO100', 'PO200']
+        assert index.find_po('PO100')[0][1:4] == ('20240101', 'in/a.edi', 'out/a.edi')
+        rows = index.find_product('V2')
+        assert [(row[1], row[2], row[3]) for row in rows] == [('PO100', 2, 2.0), ('PO200', 2, 2.0)]
+        assert len(index.find_product('0000000000?1')) == 2
+
+def test_processed_files_are_indexed_with_their_output(config, tmp_path):
+    config['index_purchase_orders'] = True
+    path = tmp_path / 'in' / 'po.edi'
+    path.write_text(build_850(po_numbers=('PO300',)), encoding='utf-8')
+    output_path = route_file(str(path), compile_config(config), interactive=False)
+    assert 'BEG*00*SA*PO300**20240101' in read_segments(output_path)
+    with POIndex(str(tmp_path / 'state' / PO_INDEX_FILENAME)) as index:
+        rows = index.find_po('PO300')
+    assert [row[:4] for row in rows] == [('PO300', '20240101', str(path), output_path)]
+    assert not (tmp_path / 'out' / PO_INDEX_FILENAME).exists()
@@ -0,0 +1,36 @@
+import pytest
+
+from conftest import build_850, read_segments
+from final import compile_config, route_file, validate_config
+
+def add_profiles(config):
+    config['profiles'] = {
+        'acme': {'match': {'ISA06': 'SENDER1', 'ISA08': 'RECEIVER1'}, 'GS_Receiver_ID': 'ACMEGS'},
+        'acme-any': {'match': {'ISA06': 'SENDER1'}, 'GS_Receiver_ID': 'ANYGS'},
+        'other': {'match': {'GS02': 'OTHER'}, 'GS_Receiver_ID': 'OTHERGS'},
+    }
+    return config
+
+def test_most_specific_profile_wins(config):
+    compiled = compile_config(add_profiles(config))
+    assert compiled.for_partner('SENDER1', 'RECEIVER1', 'X', 'Y').profile_name == 'acme'
+    assert compiled.for_partner('SENDER1', 'ELSE', 'X', 'Y').profile_name == 'acme-any'
+    assert compiled.for_partner('NOBODY', 'ELSE', 'OTHER', 'Y').profile_name == 'other'
+    assert compiled.for_partner('NOBODY', 'ELSE', 'X', 'Y') is compiled
+
+def test_profile_settings_are_applied_to_the_file(config, tmp_path):
+    path = tmp_path / 'in' / 'po.edi'
+    path.write_text(build_850(), encoding='utf-8')
+    output_path = route_file(str(path), compile_config(add_profiles(config)), interactive=False)
+    assert read_segments(output_path)[1].split('*')[3] == 'ACMEGS'
+
+def test_profiles_matching_the_same_ids_are_rejected(config):
+    add_profiles(config)
+    config['profiles']['copy'] = {'match': {'ISA06': 'SENDER1', 'ISA08': 'RECEIVER1'}}
+    with pytest.raises(ValueError, match="match the same partner IDs"):
+        validate_config(config)
+
+def test_profile_without_match_is_rejected(config):
+    config['profiles'] = {'broken': {'GS_Receiver_ID': 'X'}}
+    with pytest.raises(ValueError, match="needs a 'match' object"):
+        validate_config(config)
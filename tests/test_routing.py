@@ -0,0 +1,61 @@
+import os
+
+from conftest import ISA, build_850, read_segments
+from final import compile_config, route_file, transform_875_segments
+from edi_sniff import sniff_content
+
+def build_875(po_number='PO875', isa13='000000201'):
+    body = [
+        "ST*875*0001",
+        f"G50*G*20240101*{po_number}",
+        "G62*10*20240115",
+        "G68*5*CA*2.50*UP*012345678905",
+        "G69*TOMATO SOUP",
+        "G76*1*20240101*PO875*5*CA",
+    ]
+    body.append(f"SE*{len(body) + 1}*0001")
+    lines = [ISA.format(isa13=isa13), "GS*OG*SENDER1*RECEIVER1*20240101*1200*201*X*004010", *body, "GE*1*201", f"IEA*1*{isa13}"]
+    return ''.join(line + '~\n' for line in lines)
+
+def test_sniff_reports_transaction_set_and_delimiters():
+    sniff = sniff_content(build_875())
+    assert sniff['transaction_set'] == '875'
+    assert sniff['delimiters']['element'] == '*'
+    assert sniff['delimiters']['segment'] == '~'
+
+def test_875_gets_configured_po_number_and_se_count(config):
+    config['po_number'] = 'NEWPO'
+    lines = [segment.strip() for segment in build_875().split('~') if segment.strip()]
+    lines.insert(5, "G69*EXTRA LINE")
+    output = transform_875_segments(lines, compile_config(config))
+    assert 'G50*G*20240101*NEWPO' in output
+    assert not any(segment.startswith(('PO1*', 'CTT*')) for segment in output)
+    assert [segment for segment in output if segment.startswith('SE*')] == ['SE*8*0001']
+
+def test_875_is_processed_through_its_own_transform(config, tmp_path):
+    config['po_number'] = 'NEWPO'
+    path = tmp_path / 'in' / 'order.edi'
+    path.write_text(build_875(), encoding='utf-8')
+    output_path = route_file(str(path), compile_config(config), interactive=False)
+    segments = read_segments(output_path)
+    assert 'G50*G*20240101*NEWPO' in segments
+    assert not any(segment.startswith('CTT*') for segment in segments)
+
+def test_unsupported_transaction_set_is_skipped_or_quarantined(config, tmp_path):
+    path = tmp_path / 'in' / 'invoice.edi'
+    path.write_text(build_850().replace('ST*850*', 'ST*810*'), encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False) is None
+    assert path.exists()
+    assert not os.path.exists(tmp_path / 'out' / 'quarantine')
+    config['unsupported_transaction_sets'] = 'quarantine'
+    assert route_file(str(path), compile_config(config), interactive=False) is None
+    quarantined = os.listdir(tmp_path / 'out' / 'quarantine')
+    assert any(name.endswith('invoice.edi') for name in quarantined)
+    assert not any(name.startswith('processed_') for name in os.listdir(tmp_path / 'out'))
+
+def test_875_gets_no_outbound_documents(config, tmp_path):
+    config['outbound_documents'] = ['855', '856', '810']
+    path = tmp_path / 'in' / 'order.edi'
+    path.write_text(build_875(), encoding='utf-8')
+    assert route_file(str(path), compile_config(config), interactive=False)
+    assert not os.path.exists(tmp_path / 'out' / 'outbound')
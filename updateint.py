@@ -141,7 +141,7 @@ def modify_edi_file(content, config, selected_segments=None, new_elements_list=N
             po1_groups.append((0, current_group))
 
     # Process segments
-    selected_seq_nums = [seq_num for seq_num, _ in selected_segments]
+    selected_seq_nums = {seq_num for seq_num, _ in selected_segments}
     new_elements_dict = {seq_num: elements for seq_num, elements in new_elements_list}
     filtered_lines = []
     po1_counter = 0
@@ -374,8 +374,7 @@ class EDIEditorGUI:
         
         # Prepare new elements list
         new_elements_list = []
-        for seq_num, _ in reordered_segments:
-            entries = reordered_entries[reordered_segments.index((seq_num, self.po1_segments[seq_num-1]))]
+        for (seq_num, _), entries in zip(reordered_segments, reordered_entries):
             elements = {idx: entry.get() for idx, entry in entries.items()}
             new_elements_list.append((seq_num, elements))
         